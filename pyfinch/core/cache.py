@@ -0,0 +1,222 @@
+"""
+Cache analysis results on disk
+
+Each cache file stores a key computed from the fingerprints (name, size, modification time) of the input files
+and the analysis parameters, so that results are recomputed automatically when any of them changes.
+Data are saved in .npz format without pickling:
+arrays are stored as they are and the structure of the dictionary is stored as json.
+"""
+
+import hashlib
+import json
+import zipfile
+from pathlib import Path, PurePath
+
+import numpy as np
+
+from .ragged import RaggedArray
+from .timeaxis import TimeAxis
+
+CACHE_VERSION = 5  # increase when the format or the content of cached results changes
+
+
+def _to_json(value):
+    """Convert parameter values (e.g., np.ndarray) into json-serializable objects for hashing"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, PurePath):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value)} cannot be used in a cache key")
+
+
+def file_fingerprint(files) -> list:
+    """
+    Get (name, size, modification time) of input files
+
+    Missing files are included with None so that their creation invalidates the cache.
+    """
+    fingerprint = []
+    for file in sorted(Path(file) for file in files):
+        if file.exists():
+            stat = file.stat()
+            fingerprint.append([file.name, stat.st_size, stat.st_mtime_ns])
+        else:
+            fingerprint.append([file.name, None, None])
+    return fingerprint
+
+
+def get_cache_key(files=(), parameters=None) -> str:
+    """
+    Hash of the input file fingerprints and the analysis parameters
+
+    Parameters
+    ----------
+    files : list
+        Input files the results are computed from
+    parameters : dict
+        Parameters the results depend on (e.g., values from ..core.parameters)
+
+    Returns
+    -------
+    key : str
+    """
+    key = {
+        "version": CACHE_VERSION,
+        "files": file_fingerprint(files),
+        "parameters": parameters,
+    }
+    key = json.dumps(key, sort_keys=True, default=_to_json)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _encode(value, arrays: dict):
+    """Convert value into a json-serializable object, moving arrays into arrays"""
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("Arrays of objects cannot be cached")
+        name = f"arr_{len(arrays)}"
+        arrays[name] = value
+        return {"__array__": name}
+    if isinstance(value, RaggedArray):
+        return {
+            "__ragged__": [
+                _encode(value.values, arrays),
+                _encode(value.offsets, arrays),
+            ]
+        }
+    if isinstance(value, TimeAxis):
+        return {
+            "__time_axis__": [
+                _encode(value.start, arrays),
+                _encode(value.size, arrays),
+                value.sample_rate,
+            ]
+        }
+    if isinstance(value, np.generic):
+        return {"__scalar__": value.dtype.str, "value": value.item()}
+    if isinstance(value, PurePath):
+        return {"__path__": str(value)}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item, arrays) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item, arrays) for item in value]
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {
+                "__dict__": {key: _encode(item, arrays) for key, item in value.items()}
+            }
+        return {
+            "__items__": [
+                [_encode(key, arrays), _encode(item, arrays)]
+                for key, item in value.items()
+            ]
+        }
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    raise TypeError(f"{type(value)} cannot be cached")
+
+
+def _decode(value, arrays):
+    """Inverse of _encode"""
+    if isinstance(value, list):
+        return [_decode(item, arrays) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__array__" in value:
+        return arrays[value["__array__"]]
+    if "__ragged__" in value:
+        return RaggedArray(*[_decode(item, arrays) for item in value["__ragged__"]])
+    if "__time_axis__" in value:
+        return TimeAxis(*[_decode(item, arrays) for item in value["__time_axis__"]])
+    if "__scalar__" in value:
+        return np.dtype(value["__scalar__"]).type(value["value"])
+    if "__path__" in value:
+        return Path(value["__path__"])
+    if "__tuple__" in value:
+        return tuple(_decode(item, arrays) for item in value["__tuple__"])
+    if "__dict__" in value:
+        return {key: _decode(item, arrays) for key, item in value["__dict__"].items()}
+    if "__items__" in value:
+        return {
+            _decode(key, arrays): _decode(item, arrays)
+            for key, item in value["__items__"]
+        }
+    raise Exception("Unknown entry in the cache file")
+
+
+def save_cache(file_name, data: dict, key: str) -> None:
+    """
+    Save data with its cache key in a .npz file
+
+    Parameters
+    ----------
+    file_name : path
+        Name of the cache file (.npz)
+    data : dict
+        Results to cache
+    key : str
+        Cache key (see get_cache_key)
+    """
+    arrays = {}
+    structure = _encode(data, arrays)
+    with open(file_name, "wb") as f:
+        np.savez(
+            f,
+            __key__=np.array(key),
+            __structure__=np.array(json.dumps(structure)),
+            **arrays,
+        )
+
+
+def load_cache(file_name, key: str):
+    """
+    Load data from a .npz cache file
+
+    Returns None if the file does not exist, cannot be read, or was saved with a different key
+    """
+    file_name = Path(file_name)
+    if not file_name.exists():
+        return None
+    try:
+        with np.load(file_name, allow_pickle=False) as npz:
+            if str(npz["__key__"]) != key:
+                return None
+            arrays = {name: npz[name] for name in npz.files}
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+    return _decode(json.loads(str(arrays["__structure__"])), arrays)
+
+
+def cached(file_name, compute, files=(), parameters=None, update=False) -> dict:
+    """
+    Load results from the cache, or compute and cache them if inputs or parameters changed
+
+    Parameters
+    ----------
+    file_name : path
+        Name of the cache file (.npz)
+    compute : callable
+        Function (without arguments) that returns the results (dict)
+    files : list
+        Input files the results are computed from
+    parameters : dict
+        Parameters the results depend on
+    update : bool
+        Recompute even if the cache is valid
+
+    Returns
+    -------
+    data : dict
+    """
+    key = get_cache_key(files, parameters)
+    if not update:
+        data = load_cache(file_name, key)
+        if data is not None:
+            return data
+    data = compute()
+    save_cache(file_name, data, key)
+    return data
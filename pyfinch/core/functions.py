@@ -49,8 +49,9 @@ def demarcate_bout(target, intervals: int):
 
     Returns
     -------
-    bout_labeling : str
+    bout_labeling : str or np.ndarray
         demarcated syllable string (e.g., 'iiiabc*abckn*')
+        numeric arrays (e.g., syllable onsets) are demarcated with NaN
     """
     from ..core.parameters import bout_crit
 
@@ -69,20 +70,13 @@ def demarcate_bout(target, intervals: int):
         bout_labeling += "*"  # end with an asterisk
 
     elif isinstance(target, np.ndarray):
-        if len(ind):
-            for i, item in enumerate(ind):
-                if i == 0:
-                    bout_labeling = target[: item + 1]
-                else:
-                    bout_labeling = np.append(bout_labeling, "*")
-                    bout_labeling = np.append(
-                        bout_labeling, target[ind[i - 1] + 1 : ind[i] + 1]
-                    )
-
-            bout_labeling = np.append(bout_labeling, "*")
-            bout_labeling = np.append(bout_labeling, target[ind[i] + 1 :])
-
-        bout_labeling = np.append(bout_labeling, "*")  # end with an asterisk
+        if np.issubdtype(target.dtype, np.number):
+            marker = np.nan
+            target = target.astype(np.float64)
+        else:
+            marker = "*"
+        bout_labeling = np.insert(target, ind + 1, marker)
+        bout_labeling = np.append(bout_labeling, marker)  # end with a marker
 
     return bout_labeling
 
@@ -203,7 +197,7 @@ def get_half_width(wf_ts: np.ndarray, avg_wf: np.ndarray):
     peak_trough_amp = np.sort(max_amp_arr)[::-1][0:2]
 
     # Decide which one is the peak
-    peak_trough_ind = np.array([], dtype=np.int)
+    peak_trough_ind = np.array([], dtype=int)
 
     for amp in peak_trough_amp:
         peak_trough_ind = np.append(peak_trough_ind, np.where(np.abs(avg_wf) == amp)[0])
@@ -251,7 +245,7 @@ def get_psd_mat(
     from ..utils import save
     from ..utils.draw import remove_right_top
     from ..utils.functions import extract_ind, normalize
-    from ..utils.spect import spectrogram
+    from ..utils.spect import spectrogram_batch
     from .load import read_not_mat
 
     # Parameters
@@ -290,18 +284,19 @@ def get_psd_mat(
                 np.linspace(0, length, data.shape[0]) * 1e3, 3
             )  # start from t = 0 in ms, reduce floating precision
             contexts = contexts * len(syllables)
-            list_zip = zip(onsets, offsets, syllables, contexts)
-
-            for i, (onset, offset, syllable, context) in enumerate(list_zip):
-
-                # Get spectrogram
+            segments = []  # note with buffers
+            for onset, offset in zip(onsets, offsets):
                 ind, _ = extract_ind(
                     timestamp, [onset - note_buffer, offset + note_buffer]
                 )
-                extracted_data = data[ind]
-                spect, freqbins, timebins = spectrogram(
-                    extracted_data, sample_rate, freq_range=freq_range
+                segments.append(data[ind])
+            if save_psd:  # spectrograms of all notes in the file at once
+                spects, freqbins, timebins = spectrogram_batch(
+                    segments, sample_rate, freq_range=freq_range
                 )
+            list_zip = zip(segments, syllables, contexts)
+
+            for i, (extracted_data, syllable, context) in enumerate(list_zip):
 
                 # Get power spectral density
                 # nfft = int(round(2 ** 14 / 32000.0 * sample_rate))  # used by Dave Mets
@@ -332,9 +327,9 @@ def get_psd_mat(
                     # Plot spectrogram
                     ax_spect = plt.subplot(gs[1:5, 0:2])
                     ax_spect.pcolormesh(
-                        timebins * 1e3,
+                        timebins[i] * 1e3,
                         freqbins,
-                        spect,  # data
+                        spects[i],  # data
                         cmap="hot_r",
                         norm=colors.SymLogNorm(
                             linthresh=0.05, linscale=0.03, vmin=0.5, vmax=100
@@ -467,6 +462,7 @@ def get_pre_motor_spk_per_note(
     pre_motor_spk_dict : dict
     """
     from ..core.parameters import pre_motor_win_size
+    from ..core.spkindex import SpikeIndex
     from ..db.load import ProjectLoader
     from ..utils import save
     from ..utils.functions import find_str, unique
@@ -487,7 +483,7 @@ def get_pre_motor_spk_per_note(
             npy_name, allow_pickle=True
         ).item()  # all pre-deafening data to be combined for being used as a template
     else:
-        nb_pre_motor_spk = np.array([], dtype=np.int)
+        nb_pre_motor_spk = np.array([], dtype=int)
         note_onset_ts = np.array([], dtype=np.float32)
         notes_all = ""
         contexts_all = ""
@@ -498,23 +494,16 @@ def get_pre_motor_spk_per_note(
             ClusterInfo.contexts,
             ClusterInfo.spk_ts,
         ):  # loop through files
-            onsets = np.delete(onsets, np.where(onsets == "*"))
-            onsets = np.asarray(list(map(float, onsets)))
+            onsets = onsets[~np.isnan(onsets)]  # remove bout markers
             notes = notes.replace("*", "")
             contexts = contexts * len(notes)
+            # Number of spikes in the pre-motor window of each note
+            nb_spk_list = SpikeIndex(spks).count(onsets - pre_motor_win_size, onsets)
 
-            for onset, note, context in zip(
-                onsets, notes, contexts
+            for onset, note, context, nb_spk in zip(
+                onsets, notes, contexts, nb_spk_list
             ):  # loop through notes
                 if note in song_note:
-                    pre_motor_win = [onset - pre_motor_win_size, onset]
-                    nb_spk = len(
-                        spks[
-                            np.where(
-                                (spks >= pre_motor_win[0]) & (spks <= pre_motor_win[-1])
-                            )
-                        ]
-                    )
                     nb_pre_motor_spk = np.append(nb_pre_motor_spk, nb_spk)
                     note_onset_ts = np.append(note_onset_ts, onset)
                     notes_all += note
@@ -566,28 +555,83 @@ def get_pre_motor_spk_per_note(
     return pre_motor_spk_dict
 
 
+def _get_entropy(psd: np.ndarray) -> np.ndarray:
+    """Entropy (in bits) of each row of psd normalized to sum to one (bins without power add zero)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        psd_norm = psd / psd.sum(axis=1, keepdims=True)  # nan for rows without power
+        log_psd = np.log2(np.where(psd_norm > 0, psd_norm, 1))
+    return -(psd_norm * log_psd).sum(axis=1)
+
+
 def get_spectral_entropy(psd_array, normalize=True, mode=None):
-    """Calculate spectral entropy and it variance"""
+    """
+    Calculate spectral entropy and it variance
+
+    Parameters
+    ----------
+    psd_array : np.ndarray or list
+        spectrogram (frequency x time)
+        or a batch of spectrograms (list of spectrograms, or array of spectrogram x frequency x time)
+    normalize : bool
+        normalize the spectro-temporal entropy by its maximum (log2 of the number of frequency bins)
+    mode : {'spectral', 'spectro_temporal'}
+
+    Returns
+    -------
+    se : float or dict
+        spectral entropy ('spectral')
+        or entropy of each time bin ('array') with its mean and variance ('spectro_temporal')
+        for a batch, one value per spectrogram and 'array' is a RaggedArray
+    """
+    from .ragged import RaggedArray
+
+    batch = not (isinstance(psd_array, np.ndarray) and psd_array.ndim == 2)
+    if batch:
+        psd_list = [np.asarray(psd) for psd in psd_array]
+        nb_bins = np.array([psd.shape[1] for psd in psd_list], dtype=np.int64)
+        if not psd_list:
+            psd_list = [np.empty((1, 0))]
+        # Time bins of all spectrograms (time x frequency)
+        psd_bins = np.concatenate([psd.T for psd in psd_list])
+    else:
+        nb_bins = np.array([psd_array.shape[1]])
+        psd_bins = psd_array.T
+    offsets = np.zeros(nb_bins.shape[0] + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(nb_bins)
+    nb_freq = psd_bins.shape[1]
+
     if mode == "spectral":
         # Get time resolved version of the spectral entropy
-        psd_array = psd_array.mean(axis=1)  # time-averaged spectrogram
-        psd_norm = psd_array / psd_array.sum()
-        se = -(psd_norm * np.log2(psd_norm)).sum()
-        se /= np.log2(psd_norm.shape[0])
-        return se
+        if not batch:
+            psd_mean = psd_bins.mean(axis=0, keepdims=True)  # time-averaged spectrogram
+        elif nb_bins.shape[0]:
+            psd_mean = np.add.reduceat(psd_bins, offsets[:-1], axis=0)
+            psd_mean /= nb_bins[:, np.newaxis]
+        else:
+            psd_mean = np.empty((0, nb_freq))
+        se = _get_entropy(psd_mean) / np.log2(nb_freq)
+        return se if batch else se[0]
 
     elif mode == "spectro_temporal":
+        se_array = _get_entropy(psd_bins)
+        if normalize:
+            se_array /= np.log2(nb_freq)
+
         se_dict = {}
-        se_array = np.array([], dtype=np.float32)
-        for i in range(psd_array.shape[1]):
-            psd_norm = psd_array[:, i] / psd_array[:, i].sum()
-            se = -(psd_norm * np.log2(psd_norm)).sum()
-            if normalize:
-                se /= np.log2(psd_norm.shape[0])
-            se_array = np.append(se_array, se)
-        se_dict["array"] = se_array
-        se_dict["mean"] = se_array.mean()
-        se_dict["var"] = se_array.var()
+        if batch:
+            se_dict["array"] = RaggedArray(se_array, offsets)
+            if nb_bins.shape[0]:
+                se_mean = np.add.reduceat(se_array, offsets[:-1]) / nb_bins
+                se_var = np.add.reduceat(
+                    (se_array - np.repeat(se_mean, nb_bins)) ** 2, offsets[:-1]
+                )
+                se_dict["mean"], se_dict["var"] = se_mean, se_var / nb_bins
+            else:
+                se_dict["mean"] = se_dict["var"] = np.array([])
+        else:
+            se_dict["array"] = se_array
+            se_dict["mean"] = se_array.mean()
+            se_dict["var"] = se_array.var()
         # se_dict['var'] = 1 / -np.log(se_array.var())
         # se_dict['var'] = se_array.std() / se_array.mean()  # calculate cv
         return se_dict
@@ -750,41 +794,96 @@ def align_waveform(spk_wf: np.ndarray) -> np.ndarray:
     -------
     aligned_wf : np.ndarray
         aligned spike waveforms (spike id x waveform)
+        samples shifted out of the window are filled with nan
     """
-
-    aligned_wf = np.empty((spk_wf.shape[0], spk_wf.shape[1]))
-    aligned_wf[:] = np.nan
-
-    max_first = False  # max value (peak) comes first
+    spk_wf = np.asarray(spk_wf)
+    nb_samples = spk_wf.shape[1]
 
     avg_wf = spk_wf.mean(axis=0)
-    if np.argmin(avg_wf) < np.argmax(
-        avg_wf
-    ):  # inverted waveform (peak comes first in extra-cellular recording)
-        max_first = True
+    # inverted waveform (peak comes first in extra-cellular recording)
+    max_first = np.argmin(avg_wf) < np.argmax(avg_wf)
 
     if max_first:
         template_max_ind = np.argmin(avg_wf)
+        max_ind = np.argmin(spk_wf, axis=1)
     else:
         template_max_ind = np.argmax(avg_wf)
+        max_ind = np.argmax(spk_wf, axis=1)
 
-    for ind, wf in enumerate(spk_wf):
+    # Gather the samples of each waveform from its shifted positions
+    sample_ind = np.arange(nb_samples) + (max_ind - template_max_ind)[:, np.newaxis]
+    in_window = (sample_ind >= 0) & (sample_ind < nb_samples)
+    aligned_wf = np.take_along_axis(
+        spk_wf, np.clip(sample_ind, 0, nb_samples - 1), axis=1
+    )
+    aligned_wf = np.where(in_window, aligned_wf, np.nan)
 
-        new_wf = np.empty((spk_wf.shape[1]))
-        new_wf[:] = np.nan
-        if max_first:
-            max_ind = np.argmin(wf)
-        else:
-            max_ind = np.argmax(wf)
+    return aligned_wf
 
-        if template_max_ind != max_ind:
-            max_diff = max_ind - template_max_ind
-            if max_diff > 0:
-                new_wf[:-max_diff] = wf[max_diff:]
-            else:
-                new_wf[abs(max_diff) :] = wf[:max_diff]
-            aligned_wf[ind] = new_wf
-        else:
-            aligned_wf[ind] = wf
 
-    return aligned_wf
+def get_spk_features(spk_wf: np.ndarray, sample_rate: float) -> dict:
+    """
+    Get waveform features of individual spikes
+
+    Missing samples (nan, e.g., after align_waveform) are treated as zero.
+
+    Parameters
+    ----------
+    spk_wf : np.ndarray
+        spike waveform matrix (spike id x waveform)
+    sample_rate : float
+        sampling rate of the waveforms (Hz)
+
+    Returns
+    -------
+    spk_features : dict
+        arrays of one value per spike
+        peak : max amplitude
+        trough : min amplitude
+        width : time between the peak and the trough, including both samples (in microseconds)
+        half_width : width of the largest deflection at half of its amplitude (in microseconds)
+            nan if the deflection does not come back to half amplitude within the waveform
+        energy : sum of squared amplitudes
+    """
+    spk_wf = np.nan_to_num(np.asarray(spk_wf, dtype=np.float64))
+    nb_spk, nb_samples = spk_wf.shape
+    spk_ind = np.arange(nb_spk)
+    sample_ind = np.arange(nb_samples)
+
+    peak_ind = np.argmax(spk_wf, axis=1)
+    trough_ind = np.argmin(spk_wf, axis=1)
+    width = (np.abs(peak_ind - trough_ind) + 1) * (1 / sample_rate) * 1e6
+
+    # Flip the waveforms so that the largest deflection is positive
+    deflection_ind = np.argmax(np.abs(spk_wf), axis=1)
+    deflection_wf = spk_wf * np.sign(spk_wf[spk_ind, deflection_ind])[:, np.newaxis]
+    half_amp = deflection_wf[spk_ind, deflection_ind] / 2
+
+    # Last sample before and first sample after the deflection below half amplitude
+    below = deflection_wf < half_amp[:, np.newaxis]
+    before = below & (sample_ind < deflection_ind[:, np.newaxis])
+    after = below & (sample_ind > deflection_ind[:, np.newaxis])
+    left_ind = np.where(before, sample_ind, -1).max(axis=1)
+    right_ind = np.where(after, sample_ind, nb_samples).min(axis=1)
+    valid = (left_ind >= 0) & (right_ind < nb_samples)
+    left_ind, right_ind = np.where(valid, left_ind, 0), np.where(valid, right_ind, 1)
+
+    # Linear interpolation of the half-amplitude crossings
+    def _crossing(ind, next_ind):
+        amp, next_amp = deflection_wf[spk_ind, ind], deflection_wf[spk_ind, next_ind]
+        return ind + (half_amp - amp) / (next_amp - amp) * (next_ind - ind)
+
+    with np.errstate(divide="ignore", invalid="ignore"):  # rows without crossings
+        half_width = _crossing(right_ind - 1, right_ind) - _crossing(
+            left_ind, left_ind + 1
+        )
+    half_width = np.where(valid, half_width * (1 / sample_rate) * 1e6, np.nan)
+
+    spk_features = {
+        "peak": spk_wf[spk_ind, peak_ind],
+        "trough": spk_wf[spk_ind, trough_ind],
+        "width": width,
+        "half_width": half_width,
+        "energy": np.einsum("ij,ij->i", spk_wf, spk_wf),
+    }
+    return spk_features
@@ -1,6 +1,8 @@
 """
 Load data (from .rhd, .txt, .wav, etc)
 """
+from pathlib import Path
+
 import numpy as np
 
 
@@ -59,6 +61,132 @@ def read_not_mat(notmat, unit="ms"):
     return onsets, offsets, intervals, durations, syllables, contexts
 
 
+def convert_spk_txt(spk_txt_file, delimiter="\t", chunk_size=100_000):
+    """
+    Convert the output .txt from the Offline Sorter into a binary sidecar folder (.spk) next to it
+
+    The text is parsed in chunks with the pandas C parser,
+    and units, timestamps and waveforms are written to raw binary files that can be memory-mapped (see load_spk_txt).
+
+    Parameters
+    ----------
+    spk_txt_file : path
+        Name of the spk txt file
+    delimiter : str
+        delimiter of the file (tab (\t) by default)
+    chunk_size : int
+        number of spikes parsed at a time
+
+    Returns
+    -------
+    spk_dir : path
+        Name of the sidecar folder
+    """
+    import json
+    import os
+    import tempfile
+
+    import pandas as pd
+
+    from ..core.cache import get_cache_key
+
+    spk_txt_file = Path(spk_txt_file)
+    spk_dir = spk_txt_file.with_suffix(".spk")
+    spk_dir.mkdir(exist_ok=True)
+
+    # Write into a temporary folder and move the files into place when they are complete,
+    # so that processes converting or memory-mapping the same file never see partial files
+    with tempfile.TemporaryDirectory(dir=spk_dir) as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        nb_spk = 0
+        nb_samples = 0
+        with open(tmp_dir / "unit.bin", "wb") as unit_file, open(
+            tmp_dir / "timestamp.bin", "wb"
+        ) as ts_file, open(tmp_dir / "waveform.bin", "wb") as wf_file:
+            try:
+                reader = pd.read_csv(
+                    spk_txt_file,
+                    sep=delimiter,
+                    skiprows=1,  # skip header
+                    header=None,
+                    dtype=np.float64,
+                    engine="c",
+                    float_precision="round_trip",  # same values as np.loadtxt
+                    chunksize=chunk_size,
+                )
+                for chunk in reader:
+                    spk_info = chunk.to_numpy()
+                    spk_info[:, 1].astype(np.int64).tofile(unit_file)
+                    spk_info[:, 2].tofile(ts_file)
+                    np.ascontiguousarray(spk_info[:, 3:]).tofile(wf_file)
+                    nb_spk += spk_info.shape[0]
+                    nb_samples = spk_info.shape[1] - 3
+            except pd.errors.EmptyDataError:  # no spikes
+                pass
+
+        info = {
+            "key": get_cache_key([spk_txt_file], {"delimiter": delimiter}),
+            "nb_spk": nb_spk,
+            "nb_samples": nb_samples,
+        }
+        (tmp_dir / "info.json").write_text(json.dumps(info))
+
+        # info.json is replaced last so that it always describes complete files
+        for name in ["unit.bin", "timestamp.bin", "waveform.bin", "info.json"]:
+            os.replace(tmp_dir / name, spk_dir / name)
+    return spk_dir
+
+
+def load_spk_txt(spk_txt_file, delimiter="\t", update=False) -> dict:
+    """
+    Load the output .txt from the Offline Sorter from its memory-mapped binary sidecar
+
+    The sidecar is created (see convert_spk_txt) if it does not exist or if the .txt file changed.
+
+    Parameters
+    ----------
+    spk_txt_file : path
+        Name of the spk txt file
+    delimiter : str
+        delimiter of the file (tab (\t) by default)
+    update : bool
+        Convert the .txt file again even if the sidecar is valid
+
+    Returns
+    -------
+    spk_info : dict
+        unit : unit number of each spike
+        spk_ts : spike timestamps (in second)
+        spk_wf : spike waveforms (spk id x waveform)
+    """
+    import json
+
+    from ..core.cache import get_cache_key
+
+    spk_txt_file = Path(spk_txt_file)
+    spk_dir = spk_txt_file.with_suffix(".spk")
+    info_file = spk_dir / "info.json"
+    key = get_cache_key([spk_txt_file], {"delimiter": delimiter})
+
+    info = json.loads(info_file.read_text()) if info_file.exists() else {}
+    if update or info.get("key") != key:
+        convert_spk_txt(spk_txt_file, delimiter)
+        info = json.loads(info_file.read_text())
+
+    nb_spk, nb_samples = info["nb_spk"], info["nb_samples"]
+
+    def _memmap(name, dtype, shape):
+        if not nb_spk or (len(shape) > 1 and not nb_samples):
+            return np.empty(shape, dtype=dtype)  # empty files cannot be memory-mapped
+        return np.memmap(spk_dir / name, dtype=dtype, mode="r", shape=shape)
+
+    return {
+        "unit": _memmap("unit.bin", np.int64, (nb_spk,)),
+        "spk_ts": _memmap("timestamp.bin", np.float64, (nb_spk,)),
+        "spk_wf": _memmap("waveform.bin", np.float64, (nb_spk, nb_samples)),
+    }
+
+
 def read_spk_txt(spk_txt_file, *unit_nb, time_unit="second"):
     """
     Read the output .txt from the Offline Sorter.
@@ -66,6 +194,8 @@ def read_spk_txt(spk_txt_file, *unit_nb, time_unit="second"):
     disregard the first column since it is always 1
     column 3 to 35 stores waveforms
 
+    Data are read from a memory-mapped binary copy of the file (see load_spk_txt).
+
     Parameters
     ----------
     spk_txt_file : str
@@ -84,19 +214,22 @@ def read_spk_txt(spk_txt_file, *unit_nb, time_unit="second"):
         Number of spikes
     """
 
-    spk_info = np.loadtxt(spk_txt_file, delimiter="\t", skiprows=1)  # skip header
+    spk_info = load_spk_txt(spk_txt_file)
+    spk_ts = spk_info["spk_ts"]  # analysis time stamps
+    spk_waveform = spk_info["spk_wf"]  # analysis waveform
 
     # Select only the unit (there could be multiple isolated units in the same file)
     if unit_nb:  # if the unit number is specified
-        spk_info = spk_info[spk_info[:, 1] == unit_nb, :]
+        ind = np.flatnonzero(np.isin(spk_info["unit"], unit_nb))
+        spk_ts, spk_waveform = spk_ts[ind], spk_waveform[ind]
 
-    spk_ts = spk_info[:, 2]  # analysis time stamps
-    spk_waveform = spk_info[:, 3:]  # analysis waveform
     nb_spk = spk_waveform.shape[0]  # total number of spikes
 
     # units are in second by default, but convert to  millisecond with the argument
     if time_unit == "ms":
-        spk_ts *= 1e3
+        spk_ts = spk_ts * 1e3
+    else:
+        spk_ts = np.array(spk_ts)  # copy from the memory-mapped file
 
     return spk_ts, spk_waveform, nb_spk
 
@@ -113,11 +246,22 @@ def read_rhd(filename):
     return intan
 
 
-def load_song(data_path, format="wav") -> dict:
+def open_rhd(filename):
     """
-    Obtain event info & serialized timestamps for song & neural analysis
+    Open Intan Technologies RHD2000 data file as a memory-mapped view.
 
-    Search all files in the sub-directory and read from the associated .not.mat files to add the info into a single files
+    Unlike read_rhd, channels are decoded only when requested (see RhdMemmap).
+    """
+    from ..utils.intan.rhd_memmap import RhdMemmap
+
+    return RhdMemmap(filename)
+
+
+def list_song_files(data_path, format="wav") -> list:
+    """
+    List audio files in the song folders (not calls) of data_path
+
+    Each audio file has its song annotation in the associated .not.mat file
 
     Parameters
     ----------
@@ -126,12 +270,8 @@ def load_song(data_path, format="wav") -> dict:
     format : str
         file extension (e.g., '.wav')
     """
-    from scipy.io import wavfile
-
-    from ..core.functions import demarcate_bout
     from ..utils.functions import list_files
 
-    # List all audio files in the dir
     if not data_path.stem == "Songs":
         song_dir = [
             folder for folder in data_path.rglob("Songs")
@@ -142,9 +282,81 @@ def load_song(data_path, format="wav") -> dict:
     audio_files = []
     for data_dir in song_dir:
         audio_files += list_files(data_dir, format)
+    return audio_files
+
+
+def read_wav_header(wav_file):
+    """
+    Read the sample rate and the number of samples from the header of a .wav file
+    without loading the data
+
+    Parameters
+    ----------
+    wav_file : path
+
+    Returns
+    -------
+    sample_rate : int
+    nb_samples : int
+        Number of samples (per channel)
+    nb_channels : int
+    """
+    import os
+    import struct
+
+    with open(wav_file, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise Exception(f"{wav_file} is not a .wav file")
+
+        sample_rate = nb_channels = block_align = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise Exception(f"No data chunk in {wav_file}")
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"fmt ":
+                _, nb_channels, sample_rate, _, block_align = struct.unpack(
+                    "<HHIIH", f.read(14)
+                )
+                f.seek(chunk_size - 14 + chunk_size % 2, 1)
+            elif chunk_id == b"data":
+                if block_align is None:
+                    raise Exception(f"No fmt chunk before the data in {wav_file}")
+                # Data size may exceed the file if the recording was interrupted
+                data_size = min(chunk_size, os.fstat(f.fileno()).st_size - f.tell())
+                return sample_rate, data_size // block_align, nb_channels
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)  # chunks are word-aligned
+
+
+def _get_sample_rate(headers, data_path):
+    """Sample rate shared by all audio files (from read_wav_header)"""
+    sample_rates = {sample_rate for sample_rate, _, _ in headers}
+    if len(sample_rates) > 1:
+        raise Exception(f"Audio files in {data_path} have different sample rates")
+    return sample_rates.pop() if sample_rates else None
+
+
+def load_song(data_path, format="wav") -> dict:
+    """
+    Obtain event info & serialized timestamps for song & neural analysis
+
+    Search all files in the sub-directory and read from the associated .not.mat files to add the info into a single files
+
+    Parameters
+    ----------
+    data_path : path
+
+    format : str
+        file extension (e.g., '.wav')
+    """
+    from ..core.functions import demarcate_bout
+    from ..core.ragged import RaggedArray
+    from ..core.timeaxis import TimeAxis
 
-    # Initialize
-    timestamp_serialized = np.array([], dtype=np.float32)
+    # List all audio files in the dir
+    audio_files = list_song_files(data_path, format)
 
     # Store values in these lists
     file_list = []
@@ -156,35 +368,35 @@ def load_song(data_path, format="wav") -> dict:
     syllable_list = []
     context_list = []
 
-    # Loop through Intan .rhd files
-    for file in audio_files:
-        # Load audio files
+    # Only the file durations are needed to serialize the timestamps,
+    # so read them from the headers instead of loading the audio
+    headers = [read_wav_header(file) for file in audio_files]
+    sample_rate = _get_sample_rate(headers, data_path)
+    # Consecutive files are separated by 1 / sample_rate, starting from t = 0 (in ms)
+    time_axis = TimeAxis.concatenate(
+        [nb_samples for _, nb_samples, _ in headers],
+        sample_rate,
+        gap=1 / sample_rate if sample_rate else 0,
+    )
+
+    for file, file_start, file_end in zip(
+        audio_files, time_axis.start.tolist(), time_axis.end.tolist()
+    ):
         print("Loading... " + file.stem)
-        sample_rate, data = wavfile.read(file)  # note that the timestamp is in second
-        length = data.shape[0] / sample_rate
-        timestamp = (
-            np.linspace(0.0, length, data.shape[0]) * 1e3
-        )  # start from t = 0 in ms
 
         # Load the .not.mat file
         notmat_file = file.with_suffix(".wav.not.mat")
         onsets, offsets, intervals, durations, syllables, contexts = read_not_mat(
             notmat_file, unit="ms"
         )
-        start_ind = timestamp_serialized.size  # start of the file
-
-        if timestamp_serialized.size:
-            timestamp += timestamp_serialized[-1] + (1 / sample_rate)
-        timestamp_serialized = np.append(timestamp_serialized, timestamp)
 
         # File information (name, start & end timestamp of each file)
-        # file_list.append(os.path.relpath(file, ProjectLoader().path))
         file_list.append(file.stem)
-        file_start_list.append(timestamp_serialized[start_ind])  # in ms
-        file_end_list.append(timestamp_serialized[-1])  # in ms
+        file_start_list.append(file_start)  # in ms
+        file_end_list.append(file_end)  # in ms
 
-        onsets += timestamp[0]
-        offsets += timestamp[0]
+        onsets += file_start
+        offsets += file_start
 
         # Demarcate song bouts
         onset_list.append(demarcate_bout(onsets, intervals))
@@ -194,13 +406,14 @@ def load_song(data_path, format="wav") -> dict:
         context_list.append(contexts)
 
     # Organize event-related info into a single dictionary object
+    # Event timestamps per file are stored in ragged arrays (NaN marks the end of a bout)
     song_info = {
         "files": file_list,
         "file_start": file_start_list,
         "file_end": file_end_list,
-        "onsets": onset_list,
-        "offsets": offset_list,
-        "durations": duration_list,
+        "onsets": RaggedArray.from_list(onset_list),
+        "offsets": RaggedArray.from_list(offset_list),
+        "durations": RaggedArray.from_list(duration_list),
         "syllables": syllable_list,
         "contexts": context_list,
     }
@@ -211,6 +424,9 @@ def load_audio(data_path, format="wav") -> dict:
     """
     Load and concatenate all audio files (e.g., .wav) in the input dir (path)
 
+    Headers are read first so that the data are loaded into a single preallocated array.
+    Timestamps are not stored but given by a TimeAxis (one segment per file).
+
     Parameters
     ----------
     data_path : path
@@ -225,43 +441,42 @@ def load_audio(data_path, format="wav") -> dict:
 
     from scipy.io import wavfile
 
+    from ..core.timeaxis import TimeAxis
     from ..utils.functions import list_files
 
     # List all audio files in the dir
     files = list_files(data_path, format)
 
-    # Initialize
-    timestamp_concat = np.array([], dtype=np.float64)
-    data_concat = np.array([], dtype=np.float64)
+    # Get the size of each file from its header
+    headers = [read_wav_header(file) for file in files]
+    sample_rate = _get_sample_rate(headers, data_path)
+    time_axis = TimeAxis.concatenate(
+        [nb_samples * nb_channels for _, nb_samples, nb_channels in headers],
+        sample_rate,
+    )
+
+    # Store data in one array
+    data_concat = np.empty(len(time_axis), dtype=np.float64)
 
     # Store values in these lists
     file_list = []
 
     # Loop through audio files
-    for file in files:
+    for file, size, start_ind in zip(files, time_axis.size, time_axis.offsets):
         # Load data file
         print("Loading... " + file.stem)
-        sample_rate, data = wavfile.read(file)  # note that the timestamp is in second
-
-        # Add timestamp info
-        data_concat = np.append(data_concat, data)
+        _, data = wavfile.read(file)
+        data_concat[start_ind : start_ind + size] = data.reshape(-1)[:size]
 
         # Store results
         file_list.append(file.name)
 
-    # Create timestamps
-    timestamp_concat = (
-        np.arange(0, data_concat.shape[0] / sample_rate, (1 / sample_rate)) * 1e3
-    )
-
     # Organize data into a dictionary
     audio_info = {
         "files": file_list,
-        "timestamp": timestamp_concat,
+        "time_axis": time_axis,
         "data": data_concat,
         "sample_rate": sample_rate,
     }
-    file_name = data_path / "AudioData.npy"
-    np.save(file_name, audio_info)
 
     return audio_info
@@ -105,6 +105,7 @@ isi_bin = np.arange(0, isi_win, 1 / isi_scale)
 corr_shuffle = {
     "shuffle_limit": 5,  # in ms
     "shuffle_iter": 100,  # bootstrap iterations
+    "seed": 0,  # seed of the random generator for the jitter (None for a random seed)
 }
 
 # shuffling_iter = 100  # shuffling iteration for obtaining baseline
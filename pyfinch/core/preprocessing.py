@@ -209,7 +209,7 @@ def intan2wav(data_path: str | Path, *args):
     """
     from math import ceil
 
-    from ..utils.intan.load_intan_rhd_format import read_rhd
+    from .load import open_rhd
     from ..utils.spect import spectrogram
 
     # Find data path
@@ -220,10 +220,11 @@ def intan2wav(data_path: str | Path, *args):
 
         file_name = Path(rhd).stem
         fig_name = Path(rhd).with_suffix(".png")
-        intan = read_rhd(rhd)  # load the .rhd file
+        intan = open_rhd(rhd)  # memory-mapped, channels are decoded one at a time
 
-        nb_channels = len(intan["amplifier_data"])
-        intan["t_amplifier"] -= intan["t_amplifier"][0]  # start from t = 0
+        nb_channels = len(intan.amplifier_channels)
+        t_amplifier = intan.t_amplifier()
+        t_amplifier -= t_amplifier[0]  # start from t = 0
 
         fig, ax = plt.subplots(
             nrows=nb_channels + 1, ncols=1, sharex=True, figsize=(8, 2 * nb_channels)
@@ -244,13 +245,13 @@ def intan2wav(data_path: str | Path, *args):
 
         ax[0].set_title(file_name, fontsize=12)
         spect, spect_freq, _ = spectrogram(
-            intan["board_adc_data"][0],
+            intan.board_adc_data(0),
             samp_freq=sample_rate,
             freq_range=freq_range,
             transform_type="log_spect",
         )
         spect_time = np.linspace(
-            intan["t_amplifier"][0], intan["t_amplifier"][-1], spect.shape[1]
+            t_amplifier[0], t_amplifier[-1], spect.shape[1]
         )  # timestamp for spectrogram
 
         ax[0].pcolormesh(
@@ -272,21 +273,21 @@ def intan2wav(data_path: str | Path, *args):
         ax[0].set_yticks([freq_range[0], freq_range[1]])
         ax[0].set_yticklabels([str(freq_range[0]), str(freq_range[1])])
 
-        # Set the range of the y-axis
-        y_range = [
-            abs(intan["amplifier_data"].min()),
-            abs(intan["amplifier_data"].max()),
-        ]
-        y_range = ceil(max(y_range) / 1e2) * 1e2
-
-        for i, ch in enumerate(intan["amplifier_data"]):
-            ax[i + 1].plot(intan["t_amplifier"], ch, "k", linewidth=0.5, clip_on=False)
+        y_max = 0
+        for i in range(nb_channels):
+            ch = intan.amplifier_data(i)
+            ax[i + 1].plot(t_amplifier, ch, "k", linewidth=0.5, clip_on=False)
             ax[i + 1].spines["right"].set_visible(False)
             ax[i + 1].spines["top"].set_visible(False)
-            ax[i + 1].set_ylabel(intan["amplifier_channels"][i]["native_channel_name"])
+            ax[i + 1].set_ylabel(intan.amplifier_channels[i]["native_channel_name"])
+            y_max = max(y_max, abs(ch.min()), abs(ch.max()))
+
+        # Set the range of the y-axis
+        y_range = ceil(y_max / 1e2) * 1e2
+        for i in range(nb_channels):
             ax[i + 1].set_ylim([-y_range, y_range])
 
-            if i is nb_channels - 1:  # the bottom plot
+            if i == nb_channels - 1:  # the bottom plot
                 ax[i + 1].set_xlabel("Time (s)")
 
         plt.tight_layout()
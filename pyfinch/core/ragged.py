@@ -0,0 +1,181 @@
+"""
+Ragged array for event data (e.g., spike timestamps, syllable onsets per file or per motif)
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+
+class RaggedArray:
+    """
+    Sequence of 1-D arrays of different lengths stored as one flat array
+
+    values[offsets[i]:offsets[i + 1]] holds the i-th array.
+    Indexing with an integer returns a view on the flat array (no copy),
+    indexing with a slice, a boolean mask or a list of indices returns a new RaggedArray.
+    It can be used in place of a list of arrays (len, iteration, zip).
+    """
+
+    def __init__(self, values, offsets):
+        """
+        Parameters
+        ----------
+        values : np.ndarray
+            All arrays concatenated
+        offsets : np.ndarray
+            Start of each array in values (length = number of arrays + 1)
+        """
+        self.values = np.asanyarray(values)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if (
+            self.offsets.ndim != 1
+            or self.offsets.shape[0] < 1
+            or self.offsets[0] != 0
+            or self.offsets[-1] != self.values.shape[0]
+            or np.any(np.diff(self.offsets) < 0)
+        ):
+            raise Exception("offsets do not match the values")
+
+    @classmethod
+    def from_list(cls, arrays, dtype=np.float64):
+        """
+        Create a RaggedArray from a list of arrays (or lists, strings of numbers)
+
+        Parameters
+        ----------
+        arrays : list
+        dtype : data-type
+            float64 by default
+        """
+        arrays = [np.asarray(array, dtype=dtype).reshape(-1) for array in arrays]
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([array.shape[0] for array in arrays])
+        if arrays:
+            values = np.concatenate(arrays)
+        else:
+            values = np.array([], dtype=dtype)
+        return cls(values, offsets)
+
+    @classmethod
+    def from_ranges(cls, values, start_ind, stop_ind):
+        """
+        Create a RaggedArray whose i-th array is values[start_ind[i]:stop_ind[i]]
+
+        Parameters
+        ----------
+        values : np.ndarray
+        start_ind : np.ndarray
+            Start index of each array
+        stop_ind : np.ndarray
+            Stop index of each array (exclusive)
+        """
+        start_ind = np.asarray(start_ind, dtype=np.int64).reshape(-1)
+        lengths = np.asarray(stop_ind, dtype=np.int64).reshape(-1) - start_ind
+        offsets = np.zeros(start_ind.shape[0] + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(lengths)
+        # Positions of the selected elements in values
+        value_ind = np.arange(offsets[-1]) + np.repeat(
+            start_ind - offsets[:-1], lengths
+        )
+        return cls(values[value_ind], offsets)
+
+    def __len__(self):
+        return self.offsets.shape[0] - 1
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of elements in each array"""
+        return np.diff(self.offsets)
+
+    @property
+    def row_ind(self) -> np.ndarray:
+        """Index of the array that each element of values belongs to"""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def diff(self):
+        """Differences between successive elements of each array (np.diff of each array)"""
+        nb_values = self.values.shape[0]
+        offsets = np.zeros_like(self.offsets)
+        offsets[1:] = np.cumsum(np.maximum(self.lengths - 1, 0))
+        # Remove the differences between the last and the first element of successive arrays
+        same_array = np.ones(max(nb_values - 1, 0), dtype=bool)
+        start_ind = self.offsets[1:-1]
+        same_array[start_ind[(start_ind > 0) & (start_ind < nb_values)] - 1] = False
+        return RaggedArray(np.diff(self.values)[same_array], offsets)
+
+    def compress(self, condition):
+        """
+        Keep the elements where condition is True (arrays are kept even if they become empty)
+
+        Parameters
+        ----------
+        condition : np.ndarray
+            boolean array with one value per element of values
+        """
+        condition = np.asarray(condition, dtype=bool)
+        offsets = np.zeros_like(self.offsets)
+        offsets[1:] = np.cumsum(
+            np.bincount(self.row_ind[condition], minlength=len(self))
+        )
+        return RaggedArray(self.values[condition], offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("RaggedArray index out of range")
+            return self.values[self.offsets[index] : self.offsets[index + 1]]
+
+        if isinstance(index, slice) and index.step in (None, 1):
+            start, stop, _ = index.indices(len(self))
+            stop = max(start, stop)
+            offsets = self.offsets[start : stop + 1]
+            return RaggedArray(
+                self.values[offsets[0] : offsets[-1]], offsets - offsets[0]
+            )
+
+        index = np.arange(len(self))[index]  # slice, mask or integers
+        return RaggedArray.from_ranges(
+            self.values, self.offsets[index], self.offsets[index + 1]
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.values[self.offsets[index] : self.offsets[index + 1]]
+
+    def __repr__(self):
+        return "RaggedArray({})".format(self.to_list())
+
+    def to_list(self) -> list:
+        """List of arrays (views on values)"""
+        return list(self)
+
+    def copy(self):
+        return RaggedArray(self.values.copy(), self.offsets.copy())
+
+    def save(self, file_name) -> None:
+        """
+        Save as two .npy files (file_name.values.npy & file_name.offsets.npy)
+        so that they can be memory-mapped with load
+        """
+        file_name = Path(file_name)
+        np.save(file_name.with_suffix(".values.npy"), self.values)
+        np.save(file_name.with_suffix(".offsets.npy"), self.offsets)
+
+    @classmethod
+    def load(cls, file_name, mmap_mode="r"):
+        """
+        Load a RaggedArray saved with save
+
+        Parameters
+        ----------
+        file_name : path
+        mmap_mode : {None, 'r+', 'r', 'w+', 'c'}
+            Memory-map the values (read-only by default), see np.load
+        """
+        file_name = Path(file_name)
+        values = np.load(file_name.with_suffix(".values.npy"), mmap_mode=mmap_mode)
+        offsets = np.load(file_name.with_suffix(".offsets.npy"))
+        return cls(values, offsets)
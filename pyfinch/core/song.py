@@ -11,7 +11,9 @@ class SongInfo:
     """
 
     def __init__(self, path, name=None, update=False):
-        from ..core.load import load_song
+        from ..core.cache import cached
+        from ..core.load import list_song_files, load_song
+        from ..core.parameters import bout_crit
 
         self.path = path
         if name:
@@ -21,15 +23,16 @@ class SongInfo:
         self.__print_name()
 
         # Load song
-        file_name = self.path / "SongInfo.npy"
-        if (
-            update or not file_name.exists()
-        ):  # if .npy doesn't exist or want to update the file
-            song_info = load_song(self.path)
-            # Save song_info as a numpy object
-            np.save(file_name, song_info)
-        else:
-            song_info = np.load(file_name, allow_pickle=True).item()
+        file_name = self.path / "SongInfo.npz"
+        audio_files = list_song_files(self.path)
+        song_info = cached(
+            file_name,
+            lambda: load_song(self.path),
+            files=audio_files
+            + [file.with_suffix(".wav.not.mat") for file in audio_files],
+            parameters={"bout_crit": bout_crit},
+            update=update,
+        )
 
         # Set the dictionary values to class attributes
         for key in song_info:
@@ -253,6 +256,10 @@ class BoutInfo(SongInfo):
     def __init__(self, path, song_note, name=None, update=False):
         super().__init__(path, song_note, name, update=False)
 
+        from ..core.cache import cached
+        from ..core.load import list_song_files
+        from ..core.parameters import bout_crit
+
         self.song_note = song_note
 
         if name:
@@ -261,15 +268,16 @@ class BoutInfo(SongInfo):
             self.name = str(self.path)
 
         # Load bout info
-        file_name = self.path / "BoutInfo.npy"
-        if (
-            update or not file_name.exists()
-        ):  # if .npy doesn't exist or want to update the file
-            bout_info = self._load_bouts()
-            # Save info dict as a numpy object
-            np.save(file_name, bout_info)
-        else:
-            bout_info = np.load(file_name, allow_pickle=True).item()
+        file_name = self.path / "BoutInfo.npz"
+        audio_files = list_song_files(self.path)
+        bout_info = cached(
+            file_name,
+            self._load_bouts,
+            files=audio_files
+            + [file.with_suffix(".wav.not.mat") for file in audio_files],
+            parameters={"song_note": song_note, "bout_crit": bout_crit},
+            update=update,
+        )
 
         # Set the dictionary values to class attributes
         for key in bout_info:
@@ -5,6 +5,10 @@ from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import numpy as np
 
+from .ragged import RaggedArray
+from .spkindex import SpikeIndex
+from .timeaxis import TimeAxis
+
 
 def get_isi(spk_ts_list: list):
     """
@@ -12,22 +16,85 @@ def get_isi(spk_ts_list: list):
 
     Parameters
     ----------
-    spk_ts_list : list
+    spk_ts_list : list or RaggedArray
+        spike timestamps per trial (intervals between trials are not included)
 
     Returns
     -------
     isi : class object
         class object for inter-spike intervals
     """
+    if not isinstance(spk_ts_list, RaggedArray):
+        spk_ts_list = RaggedArray.from_list(spk_ts_list)
 
-    isi = np.array([], dtype=np.float64)
-    for spk in spk_ts_list:
-        isi = np.append(isi, np.diff(spk))
-
-    isi = ISI(isi)  # return the class object
+    isi = ISI(spk_ts_list.diff().values)  # return the class object
     return isi
 
 
+def get_bursts(spk_ts_list, burst_hz=None) -> dict:
+    """
+    Detect bursts (runs of spikes with instantaneous firing rates >= burst_hz) in all trials at once
+
+    Parameters
+    ----------
+    spk_ts_list : list or RaggedArray
+        spike timestamps (in ms) per trial (e.g., motif, bout, baseline)
+    burst_hz : float
+        instantaneous firing rate threshold (Hz), parameters.burst_hz by default
+
+    Returns
+    -------
+    bursts : dict
+        per burst (in the order of trials and time)
+            "onset", "offset" : timestamps of the first and last spike
+            "onset_ind", "offset_ind" : index of the first and last spike in the concatenated spikes
+            "nb_spk" : number of spikes
+            "trial" : trial index
+        per trial
+            "nb_bursts", "nb_burst_spk", "duration" : number of bursts, burst spikes and total burst duration
+    """
+    if burst_hz is None:
+        from ..core.parameters import burst_hz
+
+    if not isinstance(spk_ts_list, RaggedArray):
+        spk_ts_list = RaggedArray.from_list(spk_ts_list)
+    spk_ts = spk_ts_list.values
+    nb_trials = len(spk_ts_list)
+
+    # Intervals between successive spikes of the same trial
+    same_trial = np.ones(max(spk_ts.shape[0] - 1, 0), dtype=bool)
+    trial_start = spk_ts_list.offsets[1:-1]
+    trial_start = trial_start[(trial_start > 0) & (trial_start < spk_ts.shape[0])]
+    same_trial[trial_start - 1] = False
+    with np.errstate(divide="ignore"):
+        inst_fr = 1e3 / np.diff(spk_ts)  # instantaneous firing rates (Hz)
+    is_burst = same_trial & (inst_fr >= burst_hz)
+
+    # Run-length encoding of the bursting intervals
+    edges = np.diff(np.concatenate([[0], is_burst.view(np.int8), [0]]))
+    onset_ind = np.flatnonzero(edges == 1)  # first interval = first spike
+    offset_ind = np.flatnonzero(edges == -1)  # last interval + 1 = last spike
+
+    onset = spk_ts[onset_ind]
+    offset = spk_ts[offset_ind]
+    nb_spk = offset_ind - onset_ind + 1
+    trial = np.searchsorted(spk_ts_list.offsets, onset_ind, side="right") - 1
+    nb_burst_spk = np.bincount(trial, weights=nb_spk, minlength=nb_trials)
+
+    bursts = {
+        "onset": onset,
+        "offset": offset,
+        "onset_ind": onset_ind,
+        "offset_ind": offset_ind,
+        "nb_spk": nb_spk,
+        "trial": trial,
+        "nb_bursts": np.bincount(trial, minlength=nb_trials),
+        "nb_burst_spk": nb_burst_spk.astype(np.int64),
+        "duration": np.bincount(trial, weights=offset - onset, minlength=nb_trials),
+    }
+    return bursts
+
+
 def get_peth(
     evt_ts_list: list,
     spk_ts_list: list,
@@ -69,9 +136,6 @@ def get_peth(
     take values from analysis ..analysis.parameters
     """
 
-    import copy
-    import math
-
     from ..core.parameters import peth_parm
 
     parameter = peth_parm.copy()
@@ -86,29 +150,48 @@ def get_peth(
         nb_bins = parameter["nb_bins"]
 
     time_bin = np.arange(0, nb_bins, bin_size) - pre_evt_buffer
-    peth = np.zeros((len(evt_ts_list), nb_bins))  # nb of trials x nb of time bins
-
-    for trial_ind, (evt_ts, spk_ts) in enumerate(zip(evt_ts_list, spk_ts_list)):
-        spk_ts_new = copy.deepcopy(spk_ts)
-
-        if not isinstance(evt_ts, np.float64):
-            # evt_ts = np.asarray(list(map(float, evt_ts))) + pre_evt_buffer
-            # spk_ts_new -= evt_ts[0]
-
-            evt_ts = np.asarray(list(map(float, evt_ts)))
-            spk_ts_new -= evt_ts[0]
-            spk_ts_new += pre_evt_buffer
-
+    nb_trials = len(evt_ts_list)
+
+    # Flatten all trials into one array and keep the trial index of each spike
+    if isinstance(spk_ts_list, RaggedArray):
+        spk_ts_list = spk_ts_list[:nb_trials]
+        nb_spk = spk_ts_list.lengths
+        spk_ts = spk_ts_list.values
+    else:
+        spk_ts_list = list(spk_ts_list)[:nb_trials]
+        nb_spk = np.array([len(spk_ts) for spk_ts in spk_ts_list], dtype=np.intp)
+        if nb_spk.sum():
+            spk_ts = np.concatenate([np.asarray(spk_ts) for spk_ts in spk_ts_list])
         else:
-            spk_ts_new -= evt_ts
-            spk_ts_new += pre_evt_buffer
+            spk_ts = np.array([], dtype=np.float64)
+    trial_ind = np.repeat(np.arange(len(spk_ts_list)), nb_spk)
+
+    # Event onset per trial (the first event if multiple events per trial)
+    evt_onset = np.array(
+        [
+            float(evt_ts) if np.ndim(evt_ts) == 0 else float(evt_ts[0])
+            for evt_ts in evt_ts_list[: len(spk_ts_list)]
+        ],
+        dtype=np.float64,
+    )
+
+    # Spike times relative to the start of the pre-event buffer
+    spk_ts = (spk_ts - evt_onset[trial_ind]) + pre_evt_buffer
+    bin_ind = np.ceil(spk_ts / bin_size).astype(np.intp)
+    if (bin_ind < 0).any():
+        raise Exception("Index out of bound")
+    if (bin_ind >= nb_bins).any():
+        raise IndexError(
+            "index {} is out of bounds for axis 1 with size {}".format(
+                bin_ind.max(), nb_bins
+            )
+        )
 
-        for spk in spk_ts_new:
-            ind = math.ceil(spk / bin_size)
-            # print("spk = {}, bin index = {}".format(spk, ind))  # for debugging
-            if ind < 0:
-                raise Exception("Index out of bound")
-            peth[trial_ind, ind] += 1
+    # nb of trials x nb of time bins
+    peth = np.bincount(
+        trial_ind * nb_bins + bin_ind, minlength=nb_trials * nb_bins
+    ).reshape(nb_trials, nb_bins)
+    peth = peth.astype(np.float64)
 
     # Truncate the array leaving out only the portion of our interest
     if duration:
@@ -119,6 +202,392 @@ def get_peth(
     return peth, time_bin, parameter
 
 
+def get_spk_count(peth: np.ndarray, win_size: int) -> np.ndarray:
+    """
+    Get the number of spikes in a window sliding by one time bin
+
+    Parameters
+    ----------
+    peth : np.ndarray
+        spike counts (trials x time bins)
+    win_size : int
+        number of time bins in the window
+
+    Returns
+    -------
+    spk_count : np.ndarray
+        spike counts (trials x windows), windows start at each of the first (nb of bins - win_size) bins
+    """
+    peth = np.asarray(peth)
+    nb_windows = max(peth.shape[1] - win_size, 0)
+    # Cumulative sums of each trial, starting from zero
+    cum_count = np.zeros((peth.shape[0], peth.shape[1] + 1), dtype=peth.dtype)
+    np.cumsum(peth, axis=1, out=cum_count[:, 1:])
+    return cum_count[:, win_size : win_size + nb_windows] - cum_count[:, :nb_windows]
+
+
+def rebin_peth(peth: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Sum consecutive time bins of the peth into coarser bins
+
+    Parameters
+    ----------
+    peth : np.ndarray
+        spike counts (... x time bins), e.g., trials x time bins
+    factor : int
+        number of time bins merged into one (the last bin is shorter if the number of bins is not a multiple)
+
+    Returns
+    -------
+    peth : np.ndarray
+        spike counts (... x ceil(nb of bins / factor))
+    """
+    import math
+
+    peth = np.asarray(peth)
+    nb_bins = math.ceil(peth.shape[-1] / factor)
+    # Pad with empty bins to a multiple of factor
+    pad_width = [(0, 0)] * (peth.ndim - 1) + [(0, nb_bins * factor - peth.shape[-1])]
+    peth = np.pad(peth, pad_width)
+    return peth.reshape(peth.shape[:-1] + (nb_bins, factor)).sum(axis=-1)
+
+
+def get_fr(
+    peth: np.ndarray,
+    time_bin: np.ndarray,
+    duration: float,
+    bin_size: Optional[float] = None,
+    gaussian_std: Optional[float] = None,
+    smoothing: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get firing rates from the peth within the pre-event buffer and the duration
+
+    Only the time bins in the range and the margin of the gaussian filter are smoothed,
+    so the firing rates are the same as those smoothed over the whole peth.
+
+    Parameters
+    ----------
+    peth : np.ndarray
+        spike counts (... x time bins), e.g., trials x time bins or shuffles x trials x time bins
+    time_bin : np.ndarray
+        start of each time bin of the peth (in ms)
+    duration : float
+        end of the range (in ms)
+    bin_size : float, default=None
+        time bin size (in ms)
+    gaussian_std : float, default=None
+        gaussian smoothing parameter (in time bins)
+    smoothing : bool, default=True
+        performs gaussian smoothing on the firing rates
+
+    Returns
+    -------
+    fr : np.ndarray
+        firing rates in Hz (... x time bins in the range)
+    time_bin : np.ndarray
+        time bins in the range
+
+    Notes
+    -----
+    If bin_size, gaussian_std not specified, take values from ..core.parameters
+    """
+    from scipy.ndimage import gaussian_filter1d
+
+    from ..core.parameters import gauss_std, peth_parm
+
+    if not gaussian_std:
+        gaussian_std = gauss_std
+    if bin_size is None:
+        bin_size = peth_parm["bin_size"]
+
+    ind = np.flatnonzero(
+        ((0 - peth_parm["buffer"]) <= time_bin) & (time_bin <= duration)
+    )
+    start, stop = (ind[0], ind[-1] + 1) if ind.shape[0] else (0, 0)
+
+    # Time bins within the range and the filter radius (as in gaussian_filter1d)
+    margin = int(4.0 * gaussian_std + 0.5) if smoothing and stop else 0
+    window_start = max(start - margin, 0)
+    window_stop = min(stop + margin, peth.shape[-1])
+
+    fr = peth[..., window_start:window_stop] / (bin_size / 1e3)  # in Hz
+    if smoothing and stop:  # Gaussian smoothing
+        fr = gaussian_filter1d(fr, gaussian_std, axis=-1)
+    fr = np.ascontiguousarray(fr[..., start - window_start : stop - window_start])
+    return fr, time_bin[start:stop]
+
+
+def get_warped_spk_ts(
+    spk_ts: RaggedArray,
+    timestamp: np.ndarray,
+    median_durations: np.ndarray,
+    durations: Optional[np.ndarray] = None,
+    extrapolate: bool = False,
+) -> RaggedArray:
+    """
+    Piecewise linear time warping of spikes onto the median template
+
+    Spikes between timestamp[:, i] and timestamp[:, i + 1] are linearly mapped onto the i-th segment of the template,
+    so that the segment lasts median_durations[i] (a spike on a boundary belongs to the later segment).
+    Spikes before the first boundary (e.g., pre-motor spikes) are not changed.
+
+    Parameters
+    ----------
+    spk_ts : RaggedArray
+        Spike timestamps per trial (e.g., motif or note)
+    timestamp : np.ndarray
+        Segment boundaries of each trial (trials x boundaries), e.g., onset & offset of each note
+    median_durations : np.ndarray
+        Duration of each segment of the template (boundaries - 1)
+    durations : np.ndarray, optional
+        Duration of each segment per trial (trials x segments), difference between boundaries by default
+    extrapolate : bool
+        Also warp spikes after the last boundary using the last segment
+
+    Returns
+    -------
+    spk_ts_warp : RaggedArray
+    """
+    timestamp = np.asarray(timestamp, dtype=np.float64)
+    if durations is None:
+        durations = np.diff(timestamp, axis=1)
+    median_durations = np.asarray(median_durations, dtype=np.float64).reshape(-1)
+    nb_segments = median_durations.shape[0]
+
+    # Warping parameters per trial & segment
+    ratio = median_durations / np.asarray(durations).reshape(-1, nb_segments)
+    diff = timestamp[:, :nb_segments] - timestamp[:, :1]
+    origin = np.zeros(nb_segments)
+    origin[1:] = np.cumsum(median_durations)[:-1]
+
+    # Find the segment of each spike
+    spks = spk_ts.values
+    row_ind = spk_ts.row_ind
+    segment = np.zeros(spks.shape[0], dtype=np.int64)
+    for i in range(1, timestamp.shape[1]):
+        segment += timestamp[row_ind, i] <= spks
+    warp = spks >= timestamp[row_ind, 0]
+    if not extrapolate:
+        warp &= spks <= timestamp[row_ind, -1]
+    segment = np.minimum(segment, nb_segments - 1)[warp]
+    row_ind = row_ind[warp]
+    onset = timestamp[row_ind, 0]
+
+    spk_ts_warp = spks.astype(np.float64)  # copy
+    spk_ts_warp[warp] = (
+        (ratio[row_ind, segment] * ((spks[warp] - onset) - diff[row_ind, segment]))
+        + origin[segment]
+    ) + onset
+    return RaggedArray(spk_ts_warp, spk_ts.offsets.copy())
+
+
+def get_spk_corr(
+    ref_spk_ts: np.ndarray,
+    target_spk_ts: np.ndarray,
+    lag=None,
+    time_bin=None,
+) -> np.ndarray:
+    """
+    Get spike correlogram (counts per time bin) between two spike trains
+
+    Parameters
+    ----------
+    ref_spk_ts : np.ndarray
+        Reference spike timestamps (in ms)
+    target_spk_ts : np.ndarray
+        Target spike timestamps (in ms)
+    lag : int, default=None
+        Maximum time lag (in ms)
+    time_bin : np.ndarray, default=None
+        Correlogram time bins (from -lag to lag)
+
+    Returns
+    -------
+    corr : np.ndarray
+        Number of spike pairs per time bin
+
+    Notes
+    -----
+    If lag, time_bin not specified, take values from ..core.parameters.
+    Only the target spikes within +-lag of each reference spike are visited,
+    by searching the sorted target spikes.
+    Spike pairs with zero time difference are not counted.
+    A positive lag is assigned to the first bin >= ceil(lag),
+    a negative lag to the last bin <= -ceil(abs(lag)).
+    """
+    from ..core.parameters import spk_corr_parm
+
+    if lag is None:
+        lag = spk_corr_parm["lag"]
+    if time_bin is None:
+        time_bin = spk_corr_parm["time_bin"]
+
+    ref_spk_ts = np.asarray(ref_spk_ts, dtype=np.float64)
+    target_spk_ts = np.asarray(target_spk_ts, dtype=np.float64)
+
+    return _get_grouped_spk_corr(
+        ref_spk_ts,
+        np.zeros(ref_spk_ts.shape[0], dtype=np.intp),
+        target_spk_ts,
+        np.zeros(target_spk_ts.shape[0], dtype=np.intp),
+        1,
+        lag,
+        time_bin,
+    )[0]
+
+
+def _get_grouped_spk_corr(
+    ref_spk_ts, ref_group, target_spk_ts, target_group, nb_groups, lag, time_bin
+) -> np.ndarray:
+    """
+    Spike correlograms of several independent groups of spikes in one pass
+
+    Spikes are only paired with spikes from the same group (e.g., the same file of one jitter iteration).
+    Returns an array of (nb_groups x time bins) counts.
+    """
+    corr = np.zeros((nb_groups, len(time_bin)))
+    if not ref_spk_ts.size or not target_spk_ts.size:
+        return corr
+
+    # Shift each group to its own time range so that all groups can be searched at once
+    # (only used to find the windows; time differences are computed from the original timestamps)
+    # (widened so that rounding in the search does not drop pairs at +-lag)
+    margin = lag + 1
+    t_min = min(ref_spk_ts.min(), target_spk_ts.min())
+    t_max = max(ref_spk_ts.max(), target_spk_ts.max())
+    group_gap = (t_max - t_min) + 2 * margin + 1
+    ref_key = (ref_spk_ts - t_min) + ref_group * group_gap
+    target_key = (target_spk_ts - t_min) + target_group * group_gap
+
+    sort_ind = np.argsort(target_key, kind="stable")
+    target_key = target_key[sort_ind]
+    target_spk_ts = target_spk_ts[sort_ind]
+
+    # Window of target spikes around each reference spike
+    start_ind = np.searchsorted(target_key, ref_key - margin, side="left")
+    stop_ind = np.searchsorted(target_key, ref_key + margin, side="right")
+    nb_pairs = stop_ind - start_ind
+
+    # Enumerate all pairs within the window
+    ref_ind = np.repeat(np.arange(ref_spk_ts.shape[0]), nb_pairs)
+    pair_offset = np.arange(nb_pairs.sum()) - np.repeat(
+        np.cumsum(nb_pairs) - nb_pairs, nb_pairs
+    )
+    target_ind = start_ind[ref_ind] + pair_offset
+
+    # Time difference between two spikes
+    diff = target_spk_ts[target_ind] - ref_spk_ts[ref_ind]
+    mask = (diff != 0) & (diff <= lag) & (diff >= -lag)
+    diff = diff[mask]
+    group = ref_group[ref_ind[mask]]
+
+    # Assign time differences to bins
+    bin_ind = np.empty(diff.shape[0], dtype=np.intp)
+    neg, pos = diff < 0, diff > 0
+    bin_ind[neg] = (
+        np.searchsorted(time_bin, -np.ceil(np.abs(diff[neg])), side="right") - 1
+    )
+    bin_ind[pos] = np.searchsorted(time_bin, np.ceil(diff[pos]), side="left")
+
+    corr += np.bincount(group * len(time_bin) + bin_ind, minlength=corr.size).reshape(
+        corr.shape
+    )
+    return corr
+
+
+def get_jittered_spk_corr(
+    spk_ts_list,
+    shuffle_limit=None,
+    shuffle_iter=None,
+    lag=None,
+    time_bin=None,
+    rng=None,
+    max_spk=1_000_000,
+) -> np.ndarray:
+    """
+    Get autocorrelograms of time-jittered spikes for all shuffling iterations at once
+
+    Parameters
+    ----------
+    spk_ts_list : list
+        Spike timestamps (in ms) per file; correlograms are summed across files
+    shuffle_limit : int, default=None
+        Jitter drawn from a uniform distribution between -shuffle_limit and shuffle_limit (in ms)
+    shuffle_iter : int, default=None
+        Number of shuffling iterations
+    lag : int, default=None
+        Maximum time lag (in ms)
+    time_bin : np.ndarray, default=None
+        Correlogram time bins (from -lag to lag)
+    rng : np.random.Generator or int, default=None
+        Random number generator (or seed); if not specified, corr_shuffle['seed'] is used
+    max_spk : int
+        Maximum number of jittered spikes processed in one batch (limits memory use)
+
+    Returns
+    -------
+    correlogram_jitter : np.ndarray
+        Correlograms of (shuffle_iter x time bins)
+
+    Notes
+    -----
+    If not specified, parameters are taken from ..core.parameters.
+    Jitters of all iterations are drawn as one (iterations x spikes) matrix,
+    and spikes of each (iteration, file) are only paired with each other.
+    """
+    from ..core.parameters import corr_shuffle, spk_corr_parm
+
+    if shuffle_limit is None:
+        shuffle_limit = corr_shuffle["shuffle_limit"]
+    if shuffle_iter is None:
+        shuffle_iter = corr_shuffle["shuffle_iter"]
+    if lag is None:
+        lag = spk_corr_parm["lag"]
+    if time_bin is None:
+        time_bin = spk_corr_parm["time_bin"]
+    if rng is None:
+        rng = corr_shuffle["seed"]
+    rng = np.random.default_rng(rng)
+
+    correlogram_jitter = np.zeros((shuffle_iter, len(time_bin)))
+    spk_ts_list = [np.asarray(spk_ts, dtype=np.float64) for spk_ts in spk_ts_list]
+    if not spk_ts_list:
+        return correlogram_jitter
+
+    spk_ts = np.concatenate(spk_ts_list)
+    file_ind = np.repeat(
+        np.arange(len(spk_ts_list)), [len(spk_ts) for spk_ts in spk_ts_list]
+    )
+    nb_spk = spk_ts.shape[0]
+    if not nb_spk:
+        return correlogram_jitter
+
+    # Iterations processed per batch
+    chunk_size = max(1, max_spk // nb_spk)
+    for iter_start in range(0, shuffle_iter, chunk_size):
+        nb_iter = min(chunk_size, shuffle_iter - iter_start)
+        jitter = rng.uniform(-shuffle_limit, shuffle_limit, (nb_iter, nb_spk))
+        spk_jittered = (spk_ts + jitter).ravel()
+        group = (
+            np.arange(nb_iter)[:, np.newaxis] * len(spk_ts_list) + file_ind
+        ).ravel()
+        corr = _get_grouped_spk_corr(
+            spk_jittered,
+            group,
+            spk_jittered,
+            group,
+            nb_iter * len(spk_ts_list),
+            lag,
+            time_bin,
+        )
+        correlogram_jitter[iter_start : iter_start + nb_iter] = corr.reshape(
+            nb_iter, len(spk_ts_list), -1
+        ).sum(axis=1)
+
+    return correlogram_jitter
+
+
 def get_pcc(fr_array: np.ndarray) -> dict:
     """
     Get pairwise cross-correlation
@@ -134,18 +603,23 @@ def get_pcc(fr_array: np.ndarray) -> dict:
     """
 
     pcc_dict = {}
-    pcc_arr = np.array([])
-
-    for ind1, fr1 in enumerate(fr_array):
-        for ind2, fr2 in enumerate(fr_array):
-            if ind2 > ind1:
-                if np.linalg.norm((fr1 - fr1.mean()), ord=1) * np.linalg.norm(
-                    (fr2 - fr2.mean()), ord=1
-                ):
-                    if not np.isnan(np.corrcoef(fr1, fr2)[0, 1]):
-                        pcc_arr = np.append(
-                            pcc_arr, np.corrcoef(fr1, fr2)[0, 1]
-                        )  # get correlation coefficient
+    fr_array = np.asarray(fr_array, dtype=np.float64)
+
+    # Exclude trials with no variation in firing rates (correlation not defined)
+    # NaN rows are kept here and removed with the NaN coefficients below
+    valid = (
+        np.linalg.norm(fr_array - fr_array.mean(axis=1, keepdims=True), ord=1, axis=1)
+        != 0
+    )
+    fr_array = fr_array[valid]
+
+    if fr_array.shape[0] > 1:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr_mat = np.corrcoef(fr_array)  # correlation between all pairs of trials
+        pcc_arr = corr_mat[np.triu_indices(fr_array.shape[0], k=1)]
+        pcc_arr = pcc_arr[~np.isnan(pcc_arr)]
+    else:
+        pcc_arr = np.array([])
 
     pcc_dict["array"] = pcc_arr
     pcc_dict["mean"] = round(pcc_arr.mean(), 3)
@@ -200,15 +674,25 @@ def pcc_shuffle_test(ClassObject, PethInfo, plot_hist=False, alpha=0.05):
     import matplotlib.pyplot as plt
     import scipy.stats as stats
 
-    from ..core.parameters import peth_shuffle
+    from ..core.parameters import nb_note_crit, peth_shuffle
 
-    pcc_shuffle = defaultdict(partial(np.ndarray, 0))
+    # Peths of all shuffles (shuffles x trials x time bins)
+    peth_list = []
     for i in range(peth_shuffle["shuffle_iter"]):
         ClassObject.jitter_spk_ts(peth_shuffle["shuffle_limit"])
         pi_shuffle = ClassObject.get_note_peth(shuffle=True)  # peth object
-        pi_shuffle.get_fr()  # get firing rates
-        pi_shuffle.get_pcc()  # get pcc
-        for context, pcc in pi_shuffle.pcc.items():
+        peth_list.append(pi_shuffle.peth["All"])
+
+    # Get firing rates of all shuffles at once
+    fr, _ = get_fr(np.stack(peth_list), pi_shuffle.time_bin, pi_shuffle.median_duration)
+    contexts = np.array(list(pi_shuffle.contexts))
+
+    pcc_shuffle = defaultdict(partial(np.ndarray, 0))
+    for context in pi_shuffle.peth:
+        if context == "All" or np.sum(contexts == context) < nb_note_crit:
+            continue
+        for shuffle_fr in fr[:, contexts == context, :]:
+            pcc = get_pcc(shuffle_fr)  # get pcc
             pcc_shuffle[context] = np.append(pcc_shuffle[context], pcc["mean"])
 
     # One-sample t-test (one-sided)
@@ -251,6 +735,40 @@ def pcc_shuffle_test(ClassObject, PethInfo, plot_hist=False, alpha=0.05):
     return p_sig
 
 
+def _get_rendition_entropy(
+    data, sample_rate, start_ind, stop_ind, normalize=True, mode="spectral"
+):
+    """
+    Calculate the entropy of audio segments (renditions of a note)
+
+    Parameters
+    ----------
+    data : np.ndarray or path
+        Audio signal, or .npy file of the signal to memory-map (in worker processes)
+    sample_rate : int
+    start_ind : np.ndarray
+        First sample of each segment
+    stop_ind : np.ndarray
+        Last sample of each segment (exclusive)
+    normalize : bool
+    mode : {'spectral', 'spectro_temporal'}
+
+    Returns
+    -------
+    se : np.ndarray or dict
+        entropy of each segment (see functions.get_spectral_entropy)
+    """
+    from ..core.functions import get_spectral_entropy
+    from ..utils.spect import spectrogram_batch
+
+    if not isinstance(data, np.ndarray):
+        data = np.load(data, mmap_mode="r")
+
+    segments = [data[start:stop] for start, stop in zip(start_ind, stop_ind)]
+    spects, _, _ = spectrogram_batch(segments, sample_rate, freq_range=[300, 8000])
+    return get_spectral_entropy(spects, normalize=normalize, mode=mode)
+
+
 class ClusterInfo:
     def __init__(
         self,
@@ -279,10 +797,13 @@ class ClusterInfo:
             e.g., ('096-g70r40-Predeafening-D07(20191106)-S03-Ch17-Cluster01')
         update : bool
             If not exists, create a .npz cache file in the same folder so that it doesn't read from the raw data every time the class is called.
+            The cache is also updated automatically when the input files or parameters change.
         time_unit : str
             'ms' by default
         """
+        from ..core.cache import cached
         from ..core.load import load_song
+        from ..core.parameters import bout_crit
 
         self.path = path
         if channel_nb:  # if a neuron was recorded
@@ -304,17 +825,16 @@ class ClusterInfo:
         self._print_name()
 
         # Load events
-        file_name = self.path / "ClusterInfo_{}_Cluster{}.npy".format(
+        file_name = self.path / "ClusterInfo_{}_Cluster{}.npz".format(
             self.channel_nb, self.unit_nb
         )
-        if (
-            update or not file_name.exists()
-        ):  # if .npy doesn't exist or want to update the file
-            song_info = load_song(self.path)
-            # Save cluster_info as a numpy object
-            np.save(file_name, song_info)
-        else:
-            song_info = np.load(file_name, allow_pickle=True).item()
+        song_info = cached(
+            file_name,
+            lambda: load_song(self.path),
+            files=self._song_files(),
+            parameters={"bout_crit": bout_crit},
+            update=update,
+        )
 
         # Set the dictionary values to class attributes
         for key in song_info:
@@ -336,6 +856,79 @@ class ClusterInfo:
 
         return list_files(self.path, ext)
 
+    def _view(self, cls):
+        """New instance of a child class that shares the attributes (data) of the cluster"""
+        view = cls.__new__(cls)
+        view.__dict__.update(self.__dict__)
+        view._print_name()
+        return view
+
+    def motif(self, motif: str, update=False):
+        """
+        Get motif info (MotifInfo) of the cluster without loading the song & spike data again
+
+        Parameters
+        ----------
+        motif : str
+            Song motif (e.g., 'abcd')
+        update : bool
+            Update the cache of the motif info
+
+        Returns
+        -------
+        MotifInfo
+        """
+        mi = self._view(MotifInfo)
+        mi._init_motif(motif, update=update)
+        return mi
+
+    def bouts(self, song_note: str, update=False):
+        """
+        Get bout info (BoutInfo) of the cluster without loading the song & spike data again
+
+        Parameters
+        ----------
+        song_note : str
+            Song syllables (e.g., 'abcd')
+        update : bool
+            Update the cache of the bout info
+
+        Returns
+        -------
+        BoutInfo
+        """
+        bi = self._view(BoutInfo)
+        bi._init_bouts(song_note, update=update)
+        return bi
+
+    def baseline(self, update=False):
+        """
+        Get baseline info (BaselineInfo) of the cluster without loading the song & spike data again
+
+        Parameters
+        ----------
+        update : bool
+            Update the cache of the baseline info
+
+        Returns
+        -------
+        BaselineInfo
+        """
+        bi = self._view(BaselineInfo)
+        bi._init_baseline(update=update)
+        return bi
+
+    def _song_files(self) -> list:
+        """Audio and annotation (.not.mat) files that song info is loaded from"""
+        from ..core.load import list_song_files
+
+        audio_files = list_song_files(self.path)
+        return audio_files + [file.with_suffix(".wav.not.mat") for file in audio_files]
+
+    def _spk_files(self) -> list:
+        """Spike files (output of the spike sorting) of the channel"""
+        return list(self.path.glob("*" + self.channel_nb + "(merged).txt"))
+
     def _load_spk(self, time_unit, delimiter="\t") -> None:
         """
         Load spike information
@@ -352,22 +945,24 @@ class ClusterInfo:
             sets spk_wf, spk_ts, nb_spk as attributes
         """
 
-        spk_txt_file = list(self.path.glob("*" + self.channel_nb + "(merged).txt"))
+        from ..core.load import load_spk_txt
+
+        spk_txt_file = self._spk_files()
         if not spk_txt_file:
             print("spk text file doesn't exist !")
             return
 
-        spk_txt_file = spk_txt_file[0]
-        spk_info = np.loadtxt(
-            spk_txt_file, delimiter=delimiter, skiprows=1
-        )  # skip header
+        # Read from the memory-mapped binary copy of the file
+        spk_info = load_spk_txt(spk_txt_file[0], delimiter=delimiter)
+        spk_ts = spk_info["spk_ts"]  # analysis time stamps
+        spk_wf = spk_info["spk_wf"]  # analysis waveform
 
         # Select only the unit (there could be multiple isolated units in the same file)
         if self.unit_nb:  # if the unit number is specified
-            spk_info = spk_info[spk_info[:, 1] == self.unit_nb, :]
+            ind = np.flatnonzero(spk_info["unit"] == self.unit_nb)
+            # copies the spikes of the unit out of the memory-mapped files
+            spk_ts, spk_wf = spk_ts[ind], spk_wf[ind]
 
-        spk_ts = spk_info[:, 2]  # analysis time stamps
-        spk_wf = spk_info[:, 3:]  # analysis waveform
         nb_spk = spk_wf.shape[0]  # total number of spikes
 
         self.spk_wf = spk_wf  # individual waveforms
@@ -375,18 +970,40 @@ class ClusterInfo:
 
         # Units are in second by default, but convert to  millisecond with the argument
         if time_unit == "ms":
-            spk_ts *= 1e3
-
-        # Output analysis timestamps per file in a list
-        spk_list = []
-        for file_start, file_end in zip(self.file_start, self.file_end):
-            spk_list.append(
-                spk_ts[np.where((spk_ts >= file_start) & (spk_ts <= file_end))]
-            )
+            spk_ts = spk_ts * 1e3
+        else:
+            spk_ts = np.array(spk_ts)  # copy from the memory-mapped file
 
-        self.spk_ts = spk_list  # analysis timestamps in ms
+        # Output analysis timestamps (in ms) per file in a ragged array
+        self.spk_ts = SpikeIndex(spk_ts).windows(self.file_start, self.file_end)
         # print("spk_ts, spk_wf, nb_spk attributes added")
 
+    def _get_spk_windows(self, file_ind, start, end) -> RaggedArray:
+        """
+        Get spikes within time windows
+
+        Parameters
+        ----------
+        file_ind : array-like
+            Index of the file each window belongs to
+        start : array-like
+            Start of each window (in ms)
+        end : array-like
+            End of each window (in ms)
+
+        Returns
+        -------
+        spk_ts : RaggedArray
+            Spikes of the file within [start, end] per window
+        """
+        file_ind = np.asarray(file_ind, dtype=np.int64)
+        spk_index = SpikeIndex(self.spk_ts.values)
+        # Only spikes from the same file
+        return spk_index.windows(
+            np.maximum(start, np.asarray(self.file_start)[file_ind]),
+            np.minimum(end, np.asarray(self.file_end)[file_ind]),
+        )
+
     def analyze_waveform(self, align_wf=True, interpolate=True, interp_factor=None):
         """
         Perform waveform analysis
@@ -471,6 +1088,20 @@ class ClusterInfo:
 
         # print("avg_wf, spk_height (uv), spk_width (us), wf_ts (ms) added")
 
+    def get_spk_features(self) -> dict:
+        """
+        Get waveform features (peak, trough, width, half width, energy) of individual spikes
+
+        Returns
+        -------
+        spk_features : dict
+            arrays of one value per spike (see functions.get_spk_features)
+        """
+        from ..core.functions import get_spk_features
+        from ..core.parameters import sample_rate
+
+        return get_spk_features(self.spk_wf, sample_rate[self.format])
+
     def get_conditional_spk(self) -> dict:
         """Get spike timestamps from different contexts"""
         conditional_spk = {}
@@ -489,8 +1120,6 @@ class ClusterInfo:
 
     def get_correlogram(self, ref_spk_list, target_spk_list, normalize=False) -> dict:
         """Get auto- or cross-correlogram"""
-        import math
-
         from ..core.parameters import spk_corr_parm
 
         correlogram = {}
@@ -503,26 +1132,12 @@ class ClusterInfo:
             ):
 
                 if context == social_context:
-                    for ref_spk in ref_spks:
-                        for target_spk in target_spks:
-                            diff = (
-                                target_spk - ref_spk
-                            )  # time difference between two spikes
-                            if (diff) and (
-                                diff <= spk_corr_parm["lag"]
-                                and diff >= -spk_corr_parm["lag"]
-                            ):
-                                if diff < 0:
-                                    ind = np.where(
-                                        spk_corr_parm["time_bin"]
-                                        <= -math.ceil(abs(diff))
-                                    )[0][-1]
-                                elif diff > 0:
-                                    ind = np.where(
-                                        spk_corr_parm["time_bin"] >= math.ceil(diff)
-                                    )[0][0]
-                                # print("diff = {}, bin index = {}".format(diff, spk_corr_parm['time_bin'][ind]))  # for debugging
-                                corr_temp[ind] += 1
+                    corr_temp += get_spk_corr(
+                        ref_spks,
+                        target_spks,
+                        lag=spk_corr_parm["lag"],
+                        time_bin=spk_corr_parm["time_bin"],
+                    )
 
                     # Make sure the array is symmetrical
                     first_half = np.fliplr(
@@ -539,9 +1154,9 @@ class ClusterInfo:
                     ]
                     assert np.sum(first_half - second_half) == 0
 
-                    # Normalize correlogram by the total sum (convert to probability density )
-                    if normalize:
-                        corr_temp /= np.sum(correlogram)
+            # Normalize correlogram by the total sum (convert to probability density )
+            if normalize and corr_temp.sum():
+                corr_temp /= np.sum(corr_temp)
 
             correlogram[social_context] = corr_temp
         correlogram["parameter"] = spk_corr_parm  # store parameters in the dictionary
@@ -575,28 +1190,36 @@ class ClusterInfo:
             spk_ts_jittered_list.append(spk_ts + jitter)
         self.spk_ts_jittered = spk_ts_jittered_list
 
-    def get_jittered_corr(self) -> dict:
-        """Get spike correlogram from time-jittered spikes"""
-        from collections import defaultdict
+    def get_jittered_corr(self, rng=None) -> dict:
+        """
+        Get spike correlogram from time-jittered spikes
 
-        from ..core.parameters import corr_shuffle
+        Parameters
+        ----------
+        rng : np.random.Generator or int, default=None
+            Random number generator (or seed) for the jitter; corr_shuffle['seed'] by default
 
-        correlogram_jitter = defaultdict(list)
+        Returns
+        -------
+        correlogram_jitter : dict
+            Correlograms of (shuffle_iter x time bins) per social context
+        """
+        from ..core.parameters import corr_shuffle
 
-        for iter in range(corr_shuffle["shuffle_iter"]):
-            self.jitter_spk_ts(corr_shuffle["shuffle_limit"])
-            corr_temp = self.get_correlogram(self.spk_ts_jittered, self.spk_ts_jittered)
-            # Combine correlogram from two contexts
-            for key, value in corr_temp.items():
-                if key != "parameter":
-                    try:
-                        correlogram_jitter[key].append(value)
-                    except:
-                        correlogram_jitter[key] = value
+        if rng is None:
+            rng = corr_shuffle["seed"]
+        rng = np.random.default_rng(rng)
 
-        # Convert to array
-        for key, value in correlogram_jitter.items():
-            correlogram_jitter[key] = np.array(value)
+        correlogram_jitter = {}
+        for social_context in sorted(set(self.contexts)):
+            correlogram_jitter[social_context] = get_jittered_spk_corr(
+                [
+                    spk_ts
+                    for spk_ts, context in zip(self.spk_ts, self.contexts)
+                    if context == social_context
+                ],
+                rng=rng,
+            )
 
         return correlogram_jitter
 
@@ -611,33 +1234,25 @@ class ClusterInfo:
         """
 
         isi_dict = {}
-        list_zip = zip(self.onsets, self.offsets, self.spk_ts)
+        spk_ts = self.spk_ts
+        if not isinstance(spk_ts, RaggedArray):
+            spk_ts = RaggedArray.from_list(spk_ts)
 
         if not add_premotor_spk:
             # Include spikes from the pre-motif buffer for calculation
             # Pre-motor spikes are included in spk_list by default
-            spk_list = []
-            for onset, offset, spks in list_zip:
-                onset = np.asarray(list(map(float, onset)))
-                offset = np.asarray(list(map(float, offset)))
-                spk_list.append(
-                    spks[np.where((spks >= onset[0]) & (spks <= offset[-1]))]
-                )
+            # First onset & last offset of each trial (ignoring bout demarcations)
+            start = np.array([np.nanmin(onsets) for onsets in self.onsets])
+            end = np.array([np.nanmax(offsets) for offsets in self.offsets])
+            row_ind = spk_ts.row_ind
+            spk_ts = spk_ts.compress(
+                (spk_ts.values >= start[row_ind]) & (spk_ts.values <= end[row_ind])
+            )
 
-        for context1 in set(self.contexts):
-            if not add_premotor_spk:
-                spk_list_context = [
-                    spk_ts
-                    for spk_ts, context2 in zip(spk_list, self.contexts)
-                    if context2 == context1
-                ]
-            else:
-                spk_list_context = [
-                    spk_ts
-                    for spk_ts, context2 in zip(self.spk_ts, self.contexts)
-                    if context2 == context1
-                ]
-            isi_dict[context1] = get_isi(spk_list_context)
+        isi = spk_ts.diff()  # intervals of all trials in one pass
+        contexts = np.asarray(list(self.contexts))
+        for context in set(self.contexts):
+            isi_dict[context] = ISI(isi[contexts == context].values)
 
         return isi_dict
 
@@ -750,9 +1365,9 @@ class ClusterInfo:
         from ..utils.functions import find_str
 
         syllables = "".join(self.syllables)
-        onsets = np.hstack(self.onsets)
-        offsets = np.hstack(self.offsets)
-        durations = np.hstack(self.durations)
+        onsets = self.onsets.values
+        offsets = self.offsets.values
+        durations = self.durations.values
         contexts = ""
 
         for i in range(len(self.contexts)):  # concatenate contexts
@@ -762,9 +1377,9 @@ class ClusterInfo:
         if not ind.any():  # skil if the note does not exist
             return
 
-        note_onsets = np.asarray(list(map(float, onsets[ind])))
-        note_offsets = np.asarray(list(map(float, offsets[ind])))
-        note_durations = np.asarray(list(map(float, durations[ind])))
+        note_onsets = onsets[ind]
+        note_offsets = offsets[ind]
+        note_durations = durations[ind]
         note_contexts = "".join(np.asarray(list(contexts))[ind])
 
         # Get the note that immeidately follows
@@ -773,17 +1388,9 @@ class ClusterInfo:
             next_notes += syllables[i + 1]
 
         # Get spike info
-        spk_ts = np.hstack(self.spk_ts)
-        note_spk_ts_list = []
-        for onset, offset in zip(note_onsets, note_offsets):
-            note_spk_ts_list.append(
-                spk_ts[
-                    np.where(
-                        (spk_ts >= onset - pre_buffer)
-                        & (spk_ts <= offset + post_buffer)
-                    )
-                ]
-            )
+        note_spk_ts = SpikeIndex(self.spk_ts.values).windows(
+            note_onsets - pre_buffer, note_offsets + post_buffer
+        )
 
         # Organize data into a dictionary
         note_info = {
@@ -794,7 +1401,7 @@ class ClusterInfo:
             "durations": note_durations,
             "contexts": note_contexts,
             "median_dur": np.median(note_durations, axis=0),
-            "spk_ts": note_spk_ts_list,
+            "spk_ts": note_spk_ts,
             "path": self.path,  # directory where the data exists
             "pre_buffer": pre_buffer,
             "post_buffer": post_buffer,
@@ -862,103 +1469,129 @@ class NoteInfo:
             if set False, new median duration will be calculated using the selected notes
         """
 
-        zipped_list = list(
-            zip(
-                self.contexts,
-                self.next_notes,
-                self.onsets,
-                self.offsets,
-                self.durations,
-                self.spk_ts,
-                self.spk_ts_warp,
-            )
-        )
-        zipped_list = list(
-            filter(lambda x: x[0] == target_context, zipped_list)
-        )  # filter context
-        unzipped_object = zip(*zipped_list)
-        (
-            self.contexts,
-            self.next_notes,
-            self.onsets,
-            self.offsets,
-            self.durations,
-            self.spk_ts,
-            self.spk_ts_warp,
-        ) = list(unzipped_object)
-        self.contexts = "".join(self.contexts)
-        self.next_notes = "".join(self.next_notes)
-        self.onsets = np.array(self.onsets)
-        self.offsets = np.array(self.offsets)
-        self.durations = np.array(self.durations)
-        self.spk_ts = np.array(self.spk_ts)
-        self.spk_ts_warp = np.array(self.spk_ts_warp)
+        ind = np.array(list(self.contexts)) == target_context
+
+        self.contexts = "".join(np.array(list(self.contexts))[ind])
+        self.next_notes = "".join(np.array(list(self.next_notes))[ind])
+        self.onsets = self.onsets[ind]
+        self.offsets = self.offsets[ind]
+        self.durations = self.durations[ind]
+        self.spk_ts = self.spk_ts[ind]
+        self.spk_ts_warp = self.spk_ts_warp[ind]
 
         if not keep_median_duration:
-            self.median_dur = np.median(self.median_dur, axis=0)
+            self.median_dur = np.median(self.durations, axis=0)
+            self.spk_ts_warp = self._piecewise_linear_warping()
 
-    def get_entropy(self, normalize=True, mode="spectral"):
+    def get_entropy(
+        self,
+        normalize=True,
+        mode="spectral",
+        audio=None,
+        chunk_size=100,
+        nb_workers=1,
+    ):
         """
         Calculate syllable entropy from all renditions and get the average
         Two versions : spectro-temporal entropy & spectral entropy
+
+        Parameters
+        ----------
+        normalize : bool
+            Get normalized spectro-temporal entropy
+        mode : {'spectral', 'spectro_temporal'}
+        audio : AudioData
+            Audio of the recording (loaded from self.path by default), can be shared between notes
+        chunk_size : int
+            Number of renditions whose spectrograms are computed at a time
+        nb_workers : int
+            Number of worker processes (1 to run in this process, None for the number of CPUs)
+
+        Returns
+        -------
+        entropy_mean : dict
+            mean entropy per context
+        entropy_var : dict
+            mean spectro-temporal entropy variance per context (spectro_temporal mode only)
+
+            sets entropy (and entropy_var) with the values of each rendition per context as attributes
         """
-        from ..core.functions import get_spectral_entropy, get_spectrogram
+        from concurrent.futures import ProcessPoolExecutor
+        from functools import partial
+
         from ..core.parameters import nb_note_crit
         from ..utils.functions import find_str
 
+        if audio is None:
+            audio = AudioData(self.path)
+
+        # Audio samples of each rendition
+        start_ind = audio.time_axis.index(self.onsets, side="left")
+        stop_ind = audio.time_axis.index(self.offsets, side="right")
+
+        chunks = []  # (context, rendition indices)
+        for context in ["U", "D"]:
+            ind = np.array(find_str(self.contexts, context))
+            if ind.shape[0] >= nb_note_crit:
+                chunks += [
+                    (context, ind[i : i + chunk_size])
+                    for i in range(0, ind.shape[0], chunk_size)
+                ]
+
+        # Worker processes memory-map the audio file
+        data = audio.data if nb_workers == 1 else audio.data_file
+        get_se = partial(
+            _get_rendition_entropy,
+            data,
+            audio.sample_rate,
+            normalize=normalize,
+            mode=mode,
+        )
+        start_ind = [start_ind[ind] for _, ind in chunks]
+        stop_ind = [stop_ind[ind] for _, ind in chunks]
+        if nb_workers == 1:
+            results = list(map(get_se, start_ind, stop_ind))
+        else:
+            with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+                results = list(executor.map(get_se, start_ind, stop_ind))
+
         entropy_mean = {}
         entropy_var = {}
-        audio = AudioData(self.path)
+        self.entropy = {}
+        self.entropy_var = {}
 
         for context in ["U", "D"]:
+            se = [
+                result
+                for (chunk_context, _), result in zip(chunks, results)
+                if chunk_context == context
+            ]
+            if not se:
+                continue
+            if mode == "spectro_temporal":
+                # spectral entropy averaged over time bins per rendition
+                self.entropy[context] = np.concatenate([item["mean"] for item in se])
+                # spectral entropy variance per rendition
+                self.entropy_var[context] = np.concatenate([item["var"] for item in se])
+                entropy_var[context] = round(self.entropy_var[context].mean(), 5)
+            else:
+                self.entropy[context] = np.concatenate(se)
+            entropy_mean[context] = round(self.entropy[context].mean(), 3)
 
-            se_mean_arr = np.array([], dtype=np.float32)
-            se_var_arr = np.array([], dtype=np.float32)
-            ind = np.array(find_str(self.contexts, context))
-
-            if ind.shape[0] >= nb_note_crit:
-                for (start, end) in zip(self.onsets[ind], self.offsets[ind]):
-                    timestamp, data = audio.extract([start, end])  # audio object
-                    _, spect, _ = get_spectrogram(timestamp, data, audio.sample_rate)
-                    se = get_spectral_entropy(spect, normalize=normalize, mode=mode)
-                    if isinstance(se, dict):
-                        se_mean_arr = np.append(
-                            se_mean_arr, se["mean"]
-                        )  # spectral entropy averaged over time bins per rendition
-                        se_var_arr = np.append(
-                            se_var_arr, se["var"]
-                        )  # spectral entropy variance per rendition
-                    else:
-                        se_mean_arr = np.append(
-                            se_mean_arr, se
-                        )  # spectral entropy time-resolved
-                entropy_mean[context] = round(se_mean_arr.mean(), 3)
-                entropy_var[context] = round(se_var_arr.mean(), 5)
         if mode == "spectro_temporal":
             return entropy_mean, entropy_var
         else:  # spectral entropy (does not have entropy variance)
             return entropy_mean
 
     def _piecewise_linear_warping(self):
-        """Perform piecewise linear warping per note"""
-        import copy
-
-        note_spk_ts_warp_list = []
-
-        for onset, duration, spk_ts in zip(self.onsets, self.durations, self.spk_ts):
-            spk_ts_new = copy.deepcopy(spk_ts)
-            ratio = self.median_dur / duration
-            origin = 0
-
-            spk_ts_temp, ind = spk_ts[spk_ts >= onset], np.where(spk_ts >= onset)
-
-            spk_ts_temp = ((ratio * ((spk_ts_temp - onset))) + origin) + onset
-            np.put(
-                spk_ts_new, ind, spk_ts_temp
-            )  # replace original spk timestamps with warped timestamps
-            note_spk_ts_warp_list.append(spk_ts_new)
-
-        return note_spk_ts_warp_list
+        """Perform piecewise linear warping per note (spikes after the note offset are also warped)"""
+        return get_warped_spk_ts(
+            self.spk_ts,
+            np.column_stack([self.onsets, self.offsets]),
+            [self.median_dur],
+            durations=self.durations,
+            extrapolate=True,
+        )
 
     def get_note_peth(
         self,
@@ -1104,25 +1737,32 @@ class MotifInfo(ClusterInfo):
         self, path, channel_nb, unit_nb, motif, format="rhd", *name, update=False
     ):
         super().__init__(path, channel_nb, unit_nb, format, *name, update=False)
+        self._init_motif(motif, update=update)
+
+    def _init_motif(self, motif, update=False):
+        """Load motif info of the cluster"""
+        from ..core.cache import cached
+        from ..core.parameters import bout_crit, peth_parm
 
         self.motif = motif
-        if name:
-            self.name = name[0]
-        else:
-            self.name = str(self.path)
+        self.name = str(self.name)
 
         # Load motif info
-        file_name = self.path / "MotifInfo_{}_Cluster{}.npy".format(
+        file_name = self.path / "MotifInfo_{}_Cluster{}.npz".format(
             self.channel_nb, self.unit_nb
         )
-        if (
-            update or not file_name.exists()
-        ):  # if .npy doesn't exist or want to update the file
-            motif_info = self._load_motif()
-            # Save info dict as a numpy object
-            np.save(file_name, motif_info)
-        else:
-            motif_info = np.load(file_name, allow_pickle=True).item()
+        motif_info = cached(
+            file_name,
+            self._load_motif,
+            files=self._song_files() + self._spk_files(),
+            parameters={
+                "unit_nb": self.unit_nb,
+                "motif": motif,
+                "bout_crit": bout_crit,
+                "peth_parm": peth_parm,
+            },
+            update=update,
+        )
 
         # Set the dictionary values to class attributes
         for key in motif_info:
@@ -1145,7 +1785,9 @@ class MotifInfo(ClusterInfo):
 
         # Store values here
         file_list = []
-        spk_list = []
+        file_ind_list = []
+        motif_onset_list = []
+        motif_offset_list = []
         onset_list = []
         offset_list = []
         syllable_list = []
@@ -1153,18 +1795,16 @@ class MotifInfo(ClusterInfo):
         context_list = []
 
         list_zip = zip(
+            range(len(self.files)),
             self.files,
-            self.spk_ts,
             self.onsets,
             self.offsets,
             self.syllables,
             self.contexts,
         )
 
-        for file, spks, onsets, offsets, syllables, context in list_zip:
+        for file_ind, file, onsets, offsets, syllables, context in list_zip:
             print("Loading... " + file)
-            onsets = onsets.tolist()
-            offsets = offsets.tolist()
 
             # Find motifs
             motif_ind = find_str(syllables, self.motif)
@@ -1177,13 +1817,6 @@ class MotifInfo(ClusterInfo):
 
                 motif_onset = float(onsets[start_ind])
                 motif_offset = float(offsets[stop_ind])
-                # Includes pre-motor spikes
-                motif_spk = spks[
-                    np.where(
-                        (spks >= motif_onset - peth_parm["buffer"])
-                        & (spks <= motif_offset)
-                    )
-                ]
                 onsets_in_motif = onsets[
                     start_ind : stop_ind + 1
                 ]  # list of motif onset timestamps
@@ -1192,20 +1825,29 @@ class MotifInfo(ClusterInfo):
                 ]  # list of motif offset timestamps
 
                 file_list.append(file)
-                spk_list.append(motif_spk)
+                file_ind_list.append(file_ind)
+                motif_onset_list.append(motif_onset)
+                motif_offset_list.append(motif_offset)
                 duration_list.append(motif_offset - motif_onset)
                 onset_list.append(onsets_in_motif)
                 offset_list.append(offsets_in_motif)
                 syllable_list.append(syllables[start_ind : stop_ind + 1])
                 context_list.append(context)
 
+        # Get spikes per motif (includes pre-motor spikes)
+        spk_ts = self._get_spk_windows(
+            file_ind_list,
+            np.array(motif_onset_list) - peth_parm["buffer"],
+            np.array(motif_offset_list),
+        )
+
         # Organize event-related info into a single dictionary object
         motif_info = {
             "files": file_list,
-            "spk_ts": spk_list,
-            "onsets": onset_list,
-            "offsets": offset_list,
-            "durations": duration_list,  # this is motif durations
+            "spk_ts": spk_ts,
+            "onsets": RaggedArray.from_list(onset_list),
+            "offsets": RaggedArray.from_list(offset_list),
+            "durations": np.array(duration_list),  # this is motif durations
             "syllables": syllable_list,
             "contexts": context_list,
             "parameter": peth_parm,
@@ -1223,9 +1865,7 @@ class MotifInfo(ClusterInfo):
         motif_info["median_durations"] = median_duration_list
 
         # Get PLW (piecewise linear warping)
-        spk_ts_warp_list = self.piecewise_linear_warping()
-        # self.spk_ts_warp = spk_ts_warp_list
-        motif_info["spk_ts_warp"] = spk_ts_warp_list
+        motif_info["spk_ts_warp"] = self.piecewise_linear_warping()
 
         return motif_info
 
@@ -1245,109 +1885,53 @@ class MotifInfo(ClusterInfo):
             IF set False, new median duration will be calculated using the selected notes.
         """
 
-        zipped_list = list(
-            zip(
-                self.contexts,
-                self.files,
-                self.onsets,
-                self.offsets,
-                self.durations,
-                self.spk_ts,
-                self.spk_ts_warp,
-                self.note_durations,
-            )
-        )
+        ind = np.array(list(self.contexts)) == target_context
 
-        zipped_list = list(
-            filter(lambda x: x[0] == target_context, zipped_list)
-        )  # filter context
-        unzipped_object = zip(*zipped_list)
-        (
-            self.contexts,
-            self.files,
-            self.onsets,
-            self.offsets,
-            self.durations,
-            self.spk_ts,
-            self.spk_ts_warp,
-            self.note_durations,
-        ) = list(unzipped_object)
+        self.contexts = [
+            context for context in self.contexts if context == target_context
+        ]
+        self.files = [file for file, keep in zip(self.files, ind) if keep]
+        self.onsets = self.onsets[ind]
+        self.offsets = self.offsets[ind]
+        self.durations = self.durations[ind]
+        self.spk_ts = self.spk_ts[ind]
+        self.spk_ts_warp = self.spk_ts_warp[ind]
+        self.note_durations = self.note_durations[ind]
 
         if not keep_median_duration:
             _, self.median_durations = self.get_note_duration()
+            self.spk_ts_warp = self.piecewise_linear_warping()
 
     def get_note_duration(self):
         """
         Calculate note & gap duration per motif
         """
-
-        note_durations = np.empty((len(self), len(self.motif) * 2 - 1))
-
-        list_zip = zip(self.onsets, self.offsets)
-
-        for motif_ind, (onset, offset) in enumerate(list_zip):
-
-            # Convert from string to array of floats
-            onset = np.asarray(list(map(float, onset)))
-            offset = np.asarray(list(map(float, offset)))
-
-            # Calculate note & interval duration
-            timestamp = [[onset, offset] for onset, offset in zip(onset, offset)]
-            timestamp = sum(timestamp, [])
-
-            for i in range(len(timestamp) - 1):
-                note_durations[motif_ind, i] = timestamp[i + 1] - timestamp[i]
+        note_durations = np.diff(self._get_note_timestamp(), axis=1)
 
         # Get median duration
         median_durations = np.median(note_durations, axis=0)
 
         return note_durations, median_durations
 
+    def _get_note_timestamp(self) -> np.ndarray:
+        """Onset & offset of each note per motif (motifs x 2 * notes)"""
+        nb_notes = len(self.motif)
+        timestamp = np.empty((len(self), nb_notes * 2))
+        timestamp[:, 0::2] = self.onsets.values.reshape(-1, nb_notes)
+        timestamp[:, 1::2] = self.offsets.values.reshape(-1, nb_notes)
+        return timestamp
+
     def piecewise_linear_warping(self):
         """
         Performs piecewise linear warping on raw analysis timestamps
         Based on each median note and gap durations
         """
-        import copy
-
-        from ..utils.functions import extract_ind
-
-        spk_ts_warped_list = []
-        list_zip = zip(self.note_durations, self.onsets, self.offsets, self.spk_ts)
-
-        for motif_ind, (durations, onset, offset, spk_ts) in enumerate(
-            list_zip
-        ):  # per motif
-
-            onset = np.asarray(list(map(float, onset)))
-            offset = np.asarray(list(map(float, offset)))
-            # Make a deep copy of spk_ts so as to make it modification won't affect the original
-            spk_ts_new = copy.deepcopy(spk_ts)
-
-            # Calculate note & interval duration
-            timestamp = [[onset, offset] for onset, offset in zip(onset, offset)]
-            timestamp = sum(timestamp, [])
-
-            for i in range(0, len(self.median_durations)):
-                ratio = self.median_durations[i] / durations[i]
-                diff = timestamp[i] - timestamp[0]
-                if i == 0:
-                    origin = 0
-                else:
-                    origin = sum(self.median_durations[:i])
-
-                # Add spikes from motif
-                ind, spk_ts_temp = extract_ind(spk_ts, [timestamp[i], timestamp[i + 1]])
-                spk_ts_temp = (
-                    (ratio * ((spk_ts_temp - timestamp[0]) - diff)) + origin
-                ) + timestamp[0]
-                # spk_ts_new = np.append(spk_ts_new, spk_ts_temp)
-                np.put(
-                    spk_ts_new, ind, spk_ts_temp
-                )  # replace original spk timestamps with warped timestamps
-
-            spk_ts_warped_list.append(spk_ts_new)
-        return spk_ts_warped_list
+        return get_warped_spk_ts(
+            self.spk_ts,
+            self._get_note_timestamp(),
+            self.median_durations,
+            durations=self.note_durations,
+        )
 
     def get_mean_fr(self, add_pre_motor=False):
         """
@@ -1369,8 +1953,6 @@ class MotifInfo(ClusterInfo):
         # Make sure spikes from the pre-motif buffer is not included in calculation
         for onset, offset, spks in list_zip:
 
-            onset = np.asarray(list(map(float, onset)))
-            offset = np.asarray(list(map(float, offset)))
             if add_pre_motor:
                 motif_spk_list.append(
                     spks[
@@ -1525,25 +2107,54 @@ class PethInfo:
             peth_dict[context] = self.peth[ind, :]
         self.peth = peth_dict
 
-    def get_fr(self, gaussian_std=None, smoothing=True):
+        # time_bin is truncated by get_fr, keep the time bins of the peth
+        self._peth_time_bin = self.time_bin
+        # firing rates per (gaussian_std, smoothing, bin_size)
+        self._fr_cache = {}
+
+    def rebin(self, bin_size):
+        """
+        Get peths with coarser time bins for all contexts
+
+        Parameters
+        ----------
+        bin_size : int
+            new time bin size (in ms), a multiple of the peth bin size
+
+        Returns
+        -------
+        peth : dict
+            peth per context (trials x new time bins)
+        time_bin : np.ndarray
+            start of each new time bin
+        """
+        factor = bin_size / self.parameters["bin_size"]
+        if factor < 1 or factor != int(factor):
+            raise Exception("bin_size should be a multiple of the peth bin size")
+
+        peth = rebin_peth(self.peth["All"], int(factor))
+        peth_dict = {"All": peth}
+        contexts = np.array(list(self.contexts))
+        for context in set(self.contexts):
+            peth_dict[context] = peth[contexts == context, :]
+        time_bin = self._peth_time_bin[0] + np.arange(peth.shape[1]) * bin_size
+        return peth_dict, time_bin
+
+    def get_fr(self, gaussian_std=None, smoothing=True, bin_size=None):
         """
         Get trials-by-trial firing rates by default
 
+        Firing rates are computed once per (gaussian_std, smoothing, bin_size) and reused afterwards
+
         Parameters
         ----------
         gaussian_std : int
-            gaussian smoothing parameter. If not specified, read from analysis.parameters
+            gaussian smoothing parameter (in time bins). If not specified, read from analysis.parameters
         smoothing : bool
             performs gaussian smoothing on the firing rates
+        bin_size : int
+            time bin size (in ms), the peth bin size by default (see rebin)
         """
-
-        # if duration:
-        #     ind = (((0 - peth_parm['buffer']) <= time_bin) & (time_bin <= duration))
-        #     peth = peth[:, ind]
-        #     time_bin = time_bin[ind]
-
-        from scipy.ndimage import gaussian_filter1d
-
         from ..core.parameters import gauss_std, nb_note_crit, peth_parm
 
         if (
@@ -1551,32 +2162,43 @@ class PethInfo:
         ):  # if not specified, get the value fromm analysis.parameters
             gaussian_std = gauss_std
 
-        # Get trial-by-trial firing rates
-        fr_dict = {}
-        for k, v in self.peth.items():  # loop through different conditions in peth dict
-            if v.shape[0] >= nb_note_crit:
-                fr = v / (peth_parm["bin_size"] / 1e3)  # in Hz
+        if bin_size is None or bin_size == self.parameters["bin_size"]:
+            peth, time_bin = self.peth["All"], self._peth_time_bin
+            bin_size = peth_parm["bin_size"]
+        else:
+            peth_dict, time_bin = self.rebin(bin_size)
+            peth = peth_dict["All"]
+
+        key = (gaussian_std, smoothing, bin_size)
+        if key not in self._fr_cache:
+            # Smooth all trials at once and split them into contexts
+            fr, time_bin = get_fr(
+                peth,
+                time_bin,
+                self.median_duration,
+                bin_size=bin_size,
+                gaussian_std=gaussian_std,
+                smoothing=smoothing,
+            )
+            contexts = np.array(list(self.contexts))
 
-                if smoothing:  # Gaussian smoothing
-                    fr = gaussian_filter1d(fr, gaussian_std)
+            # Get trial-by-trial firing rates
+            fr_dict = {}
+            for k in self.peth:  # loop through different conditions in peth dict
+                context_fr = fr if k == "All" else fr[contexts == k, :]
+                if context_fr.shape[0] >= nb_note_crit:
+                    fr_dict[k] = context_fr
 
-                # Truncate values outside the range
-                ind = ((0 - peth_parm["buffer"]) <= self.time_bin) & (
-                    self.time_bin <= self.median_duration
-                )
-                fr = fr[:, ind]
-                fr_dict[k] = fr
-        self.fr = fr_dict
-        self.time_bin = self.time_bin[ind]
-
-        # Get mean firing rates
-        mean_fr_dict = {}
-        for context, fr in self.fr.items():
-            fr = np.mean(fr, axis=0)
-            mean_fr_dict[context] = fr
-        if smoothing:
-            mean_fr_dict["gauss_std"] = gauss_std
-        self.mean_fr = mean_fr_dict
+            # Get mean firing rates
+            mean_fr_dict = {}
+            for context, context_fr in fr_dict.items():
+                mean_fr_dict[context] = np.mean(context_fr, axis=0)
+            if smoothing:
+                mean_fr_dict["gauss_std"] = gaussian_std
+
+            self._fr_cache[key] = fr_dict, mean_fr_dict, time_bin
+
+        self.fr, self.mean_fr, self.time_bin = self._fr_cache[key]
 
     def get_pcc(self):
         """Get pairwise cross-correlation"""
@@ -1618,36 +2240,15 @@ class PethInfo:
         sparseness : dict
         """
 
-        import math
-
-        from ..core.parameters import gauss_std, nb_note_crit
-
         mean_fr = dict()
         sparseness = dict()
 
         if bin_size != None and bin_size != self.parameters["bin_size"]:
-            for context, peth in self.peth.items():
+            peth_dict, _ = self.rebin(bin_size)
+            for context, peth in peth_dict.items():
                 if context == "All":
                     continue
-                new_peth = np.empty([peth.shape[0], 0])
-                nb_bins = math.ceil(peth.shape[1] / bin_size)
-                bin_ind = 0
-                start_ind = 0
-                end_ind = 0 + bin_size
-
-                while bin_ind < nb_bins:
-                    if end_ind > peth.shape[1]:
-                        end_ind = peth.shape[1]
-                    # print(start_ind, end_ind)
-                    peth_bin = (
-                        peth[:, start_ind:end_ind].sum(axis=1).reshape(peth.shape[0], 1)
-                    )
-                    new_peth = np.append(new_peth, peth_bin, axis=1)
-                    start_ind += bin_size
-                    end_ind += bin_size
-                    bin_ind += 1
-
-                fr = new_peth / (bin_size / 1e3)  # in Hz
+                fr = peth / (bin_size / 1e3)  # in Hz
                 mean_fr[context] = np.mean(fr, axis=0)
 
         else:
@@ -1664,44 +2265,64 @@ class PethInfo:
 
         return sparseness
 
-    def get_spk_count(self):
+    def get_spk_count(self, win_size=None, bin_size=None):
         """
         Calculate the number of spikes within a specified time window
+
+        Parameters
+        ----------
+        win_size : int or list
+            Size of the moving window (in time bins), parameters.spk_count_parm by default
+            With a list of sizes, spk_count, fano_factor and spk_count_cv are dictionaries per window size
+        bin_size : int
+            time bin size (in ms), the peth bin size by default (see rebin)
         """
-        from ..core.parameters import peth_parm, spk_count_parm
+        from ..core.parameters import spk_count_parm
+
+        if win_size is None:
+            win_size = spk_count_parm["win_size"]
+
+        if bin_size is None or bin_size == self.parameters["bin_size"]:
+            peth_dict, time_bin = self.peth, self._peth_time_bin
+        else:
+            peth_dict, time_bin = self.rebin(bin_size)
+        # Windows starting up to the median duration (time_bin of the peth, not of get_fr)
+        nb_bins = np.count_nonzero(time_bin <= self.median_duration)
 
-        win_size = spk_count_parm["win_size"]
         spk_count_dict = {}
         fano_factor_dict = {}
         spk_count_cv_dict = {}
 
-        for k, v in self.peth.items():  # loop through different conditions in peth dict
-            spk_arr = np.empty((v.shape[0], 0), int)  # (renditions x time bins)
-            if k != "All":  # skip all trials
-                win_inc = 0
-                for i in range(v.shape[1] - win_size):
-                    count = v[:, i : win_size + win_inc].sum(axis=1)
-                    # print(f"from {i} to {win_size + win_inc}, count = {count}")
-                    spk_arr = np.append(spk_arr, np.array([count]).transpose(), axis=1)
-                    win_inc += 1
-                # Truncate values outside the range
-                ind = ((0 - peth_parm["buffer"]) <= self.time_bin) & (
-                    self.time_bin <= self.median_duration
-                )
-                spk_arr = spk_arr[:, : ind.shape[0]]
+        for win in np.atleast_1d(win_size).tolist():
+            spk_count_dict[win] = {}
+            fano_factor_dict[win] = {}
+            spk_count_cv_dict[win] = {}
+
+            for k, v in peth_dict.items():  # loop through conditions in peth dict
+                if k == "All":  # skip all trials
+                    continue
+                # renditions x time windows
+                spk_arr = get_spk_count(v, win)
+                spk_arr = spk_arr[:, :nb_bins]
 
                 spk_count = spk_arr.sum(axis=0)
-                fano_factor = spk_arr.var(axis=0) / spk_arr.mean(
-                    axis=0
-                )  # per time window (across renditions) (renditions x time window)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    fano_factor = spk_arr.var(axis=0) / spk_arr.mean(
+                        axis=0
+                    )  # per time window (across renditions) (renditions x time window)
                 spk_count_cv = spk_count.std(axis=0) / spk_count.mean(
                     axis=0
                 )  # cv across time (single value)
 
                 # store values in a dictionary
-                spk_count_dict[k] = spk_count
-                fano_factor_dict[k] = fano_factor
-                spk_count_cv_dict[k] = round(spk_count_cv, 3)
+                spk_count_dict[win][k] = spk_count
+                fano_factor_dict[win][k] = fano_factor
+                spk_count_cv_dict[win][k] = round(spk_count_cv, 3)
+
+        if np.ndim(win_size) == 0:
+            spk_count_dict = spk_count_dict[win_size]
+            fano_factor_dict = fano_factor_dict[win_size]
+            spk_count_cv_dict = spk_count_cv_dict[win_size]
 
         self.spk_count = spk_count_dict
         self.fano_factor = fano_factor_dict
@@ -1721,26 +2342,31 @@ class BoutInfo(ClusterInfo):
         self, path, channel_nb, unit_nb, song_note, format="rhd", *name, update=False
     ):
         super().__init__(path, channel_nb, unit_nb, format, *name, update=False)
+        self._init_bouts(song_note, update=update)
 
-        self.song_note = song_note
+    def _init_bouts(self, song_note, update=False):
+        """Load bout info of the cluster"""
+        from ..core.cache import cached
+        from ..core.parameters import bout_crit
 
-        if name:
-            self.name = name[0]
-        else:
-            self.name = str(self.path)
+        self.song_note = song_note
+        self.name = str(self.name)
 
         # Load bout info
-        file_name = self.path / "BoutInfo_{}_Cluster{}.npy".format(
+        file_name = self.path / "BoutInfo_{}_Cluster{}.npz".format(
             self.channel_nb, self.unit_nb
         )
-        if (
-            update or not file_name.exists()
-        ):  # if .npy doesn't exist or want to update the file
-            bout_info = self._load_bouts()
-            # Save info dict as a numpy object
-            np.save(file_name, bout_info)
-        else:
-            bout_info = np.load(file_name, allow_pickle=True).item()
+        bout_info = cached(
+            file_name,
+            self._load_bouts,
+            files=self._song_files() + self._spk_files(),
+            parameters={
+                "unit_nb": self.unit_nb,
+                "song_note": song_note,
+                "bout_crit": bout_crit,
+            },
+            update=update,
+        )
 
         # Set the dictionary values to class attributes
         for key in bout_info:
@@ -1758,7 +2384,9 @@ class BoutInfo(ClusterInfo):
         from ..utils.functions import find_str
 
         file_list = []
-        spk_list = []
+        file_ind_list = []
+        bout_onset_list = []
+        bout_offset_list = []
         onset_list = []
         offset_list = []
         syllable_list = []
@@ -1766,15 +2394,15 @@ class BoutInfo(ClusterInfo):
         context_list = []
 
         list_zip = zip(
+            range(len(self.files)),
             self.files,
-            self.spk_ts,
             self.onsets,
             self.offsets,
             self.syllables,
             self.contexts,
         )
 
-        for file, spks, onsets, offsets, syllables, context in list_zip:
+        for file_ind, file, onsets, offsets, syllables, context in list_zip:
 
             bout_ind = find_str(syllables, "*")
 
@@ -1788,7 +2416,6 @@ class BoutInfo(ClusterInfo):
                 bout_onset = float(onsets[start_ind])
                 bout_offset = float(offsets[stop_ind])
 
-                bout_spk = spks[np.where((spks >= bout_onset) & (spks <= bout_offset))]
                 onsets_in_bout = onsets[
                     start_ind : stop_ind + 1
                 ]  # list of bout onset timestamps
@@ -1797,7 +2424,9 @@ class BoutInfo(ClusterInfo):
                 ]  # list of bout offset timestamps
 
                 file_list.append(file)
-                spk_list.append(bout_spk)
+                file_ind_list.append(file_ind)
+                bout_onset_list.append(bout_onset)
+                bout_offset_list.append(bout_offset)
                 duration_list.append(bout_offset - bout_onset)
                 onset_list.append(onsets_in_bout)
                 offset_list.append(offsets_in_bout)
@@ -1807,10 +2436,12 @@ class BoutInfo(ClusterInfo):
         # Organize event-related info into a single dictionary object
         bout_info = {
             "files": file_list,
-            "spk_ts": spk_list,
-            "onsets": onset_list,
-            "offsets": offset_list,
-            "durations": duration_list,  # this is bout durations
+            "spk_ts": self._get_spk_windows(
+                file_ind_list, bout_onset_list, bout_offset_list
+            ),
+            "onsets": RaggedArray.from_list(onset_list),
+            "offsets": RaggedArray.from_list(offset_list),
+            "durations": np.array(duration_list),  # this is bout durations
             "syllables": syllable_list,
             "contexts": context_list,
         }
@@ -1891,8 +2522,7 @@ class BoutInfo(ClusterInfo):
             ) in enumerate(list_zip):
 
                 # Convert from string to array of floats
-                onsets = np.asarray(list(map(float, onsets)))
-                offsets = np.asarray(list(map(float, offsets)))
+                onsets = onsets.copy()
                 spks = spks - onsets[0]
 
                 # bout start and end
@@ -2028,112 +2658,122 @@ class BoutInfo(ClusterInfo):
 class BaselineInfo(ClusterInfo):
     def __init__(self, path, channel_nb, unit_nb, format="rhd", *name, update=False):
         super().__init__(path, channel_nb, unit_nb, format, *name, update=False)
+        self._init_baseline(update=update)
 
-        from ..core.parameters import baseline
-        from ..utils.functions import find_str
+    def _init_baseline(self, update=False):
+        """Load baseline info of the cluster"""
+        from ..core.cache import cached
+        from ..core.parameters import baseline, bout_crit
 
-        if name:
-            self.name = name[0]
-        else:
-            self.name = str(self.path)
+        self.name = str(self.name)
 
         # Load baseline info
-        file_name = self.path / "BaselineInfo_{}_Cluster{}.npy".format(
+        file_name = self.path / "BaselineInfo_{}_Cluster{}.npz".format(
             self.channel_nb, self.unit_nb
         )
-        if (
-            update or not file_name.exists()
-        ):  # if .npy doesn't exist or want to update the file
+        baseline_info = cached(
+            file_name,
+            self._load_baseline,
+            files=self._song_files() + self._spk_files(),
+            parameters={
+                "unit_nb": self.unit_nb,
+                "bout_crit": bout_crit,
+                "baseline": baseline,
+            },
+            update=update,
+        )
 
-            # Store values in here
-            file_list = []
-            spk_list = []
-            nb_spk_list = []
-            duration_list = []
-            context_list = []
-            baseline_info = {}
+        # Set the dictionary values to class attributes
+        for key in baseline_info:
+            setattr(self, key, baseline_info[key])
 
-            list_zip = zip(
-                self.files,
-                self.spk_ts,
-                self.file_start,
-                self.onsets,
-                self.offsets,
-                self.syllables,
-                self.contexts,
-            )
+    def _load_baseline(self):
+        """Load baseline info"""
+        from ..core.parameters import baseline
+        from ..utils.functions import find_str
+
+        # Store values in here
+        file_list = []
+        file_ind_list = []
+        baseline_onset_list = []
+        baseline_offset_list = []
+        duration_list = []
+        context_list = []
+        baseline_info = {}
 
-            for file, spks, file_start, onsets, offsets, syllables, context in list_zip:
+        list_zip = zip(
+            range(len(self.files)),
+            self.files,
+            self.file_start,
+            self.onsets,
+            self.offsets,
+            self.syllables,
+            self.contexts,
+        )
 
-                bout_ind_list = find_str(syllables, "*")
-                bout_ind_list.insert(0, -1)  # start from the first index
+        for file_ind, file, file_start, onsets, offsets, syllables, context in list_zip:
 
-                for bout_ind in bout_ind_list:
-                    # print(bout_ind)
-                    if (
-                        bout_ind == len(syllables) - 1
-                    ):  # skip if * indicates the end syllable
-                        continue
+            bout_ind_list = find_str(syllables, "*")
+            bout_ind_list.insert(0, -1)  # start from the first index
 
-                    baseline_onset = (
-                        float(onsets[bout_ind + 1])
-                        - baseline["time_buffer"]
-                        - baseline["time_win"]
-                    )
+            for bout_ind in bout_ind_list:
+                # print(bout_ind)
+                if (
+                    bout_ind == len(syllables) - 1
+                ):  # skip if * indicates the end syllable
+                    continue
 
-                    if bout_ind > 0 and baseline_onset < float(
-                        offsets[bout_ind - 1]
-                    ):  # skip if the baseline starts before the offset of the previous syllable
-                        continue
+                baseline_onset = (
+                    float(onsets[bout_ind + 1])
+                    - baseline["time_buffer"]
+                    - baseline["time_win"]
+                )
 
-                    if baseline_onset < file_start:
-                        baseline_onset = file_start
+                if bout_ind > 0 and baseline_onset < float(
+                    offsets[bout_ind - 1]
+                ):  # skip if the baseline starts before the offset of the previous syllable
+                    continue
 
-                    baseline_offset = (
-                        float(onsets[bout_ind + 1]) - baseline["time_buffer"]
-                    )
+                if baseline_onset < file_start:
+                    baseline_onset = file_start
 
-                    if (
-                        baseline_offset - baseline_onset < 0
-                    ):  # skip if there's not enough baseline period at the start of a file
-                        continue
+                baseline_offset = float(onsets[bout_ind + 1]) - baseline["time_buffer"]
 
-                    if baseline_onset > baseline_offset:
-                        print(
-                            "start time ={} to end time = {}".format(
-                                baseline_onset, baseline_offset
-                            )
+                if (
+                    baseline_offset - baseline_onset < 0
+                ):  # skip if there's not enough baseline period at the start of a file
+                    continue
+
+                if baseline_onset > baseline_offset:
+                    print(
+                        "start time ={} to end time = {}".format(
+                            baseline_onset, baseline_offset
                         )
+                    )
 
-                    baseline_spk = spks[
-                        np.where((spks >= baseline_onset) & (spks <= baseline_offset))
-                    ]
+                file_list.append(file)
+                file_ind_list.append(file_ind)
+                baseline_onset_list.append(baseline_onset)
+                baseline_offset_list.append(baseline_offset)
+                duration_list.append(
+                    (baseline_offset - baseline_onset)
+                )  # convert to seconds for calculating in Hz
+                context_list.append(context)
 
-                    file_list.append(file)
-                    spk_list.append(baseline_spk)
-                    nb_spk_list.append(len(baseline_spk))
-                    duration_list.append(
-                        (baseline_offset - baseline_onset)
-                    )  # convert to seconds for calculating in Hz
-                    context_list.append(context)
-
-            baseline_info = {
-                "files": file_list,
-                "spk_ts": spk_list,
-                "nb_spk": nb_spk_list,
-                "durations": duration_list,
-                "contexts": context_list,
-                "parameter": baseline,
-            }
-            # Save baseline_info as a numpy object
-            np.save(file_name, baseline_info)
+        spk_ts = self._get_spk_windows(
+            file_ind_list, baseline_onset_list, baseline_offset_list
+        )
 
-        else:
-            baseline_info = np.load(file_name, allow_pickle=True).item()
+        baseline_info = {
+            "files": file_list,
+            "spk_ts": spk_ts,
+            "nb_spk": spk_ts.lengths.tolist(),
+            "durations": duration_list,
+            "contexts": context_list,
+            "parameter": baseline,
+        }
 
-        # Set the dictionary values to class attributes
-        for key in baseline_info:
-            setattr(self, key, baseline_info[key])
+        return baseline_info
 
     def _print_name(self):
         print("")
@@ -2160,18 +2800,9 @@ class BaselineInfo(ClusterInfo):
 
         return correlogram  # return class object for further analysis
 
-    def get_jittered_corr(self) -> np.ndarray:
-        """Get spike correlogram from time-jittered spikes"""
-        from ..core.parameters import corr_shuffle
-
-        correlogram_jitter = []
-
-        for iter in range(corr_shuffle["shuffle_iter"]):
-            self.jitter_spk_ts(corr_shuffle["shuffle_limit"])
-            corr_temp = self.get_correlogram(self.spk_ts_jittered, self.spk_ts_jittered)
-            correlogram_jitter.append(corr_temp)
-
-        return np.array(correlogram_jitter)
+    def get_jittered_corr(self, rng=None) -> np.ndarray:
+        """Get spike correlogram from time-jittered spikes (shuffle_iter x time bins)"""
+        return get_jittered_spk_corr(self.spk_ts, rng=rng)
 
     def get_isi(self):
         """Get inter-spike interval"""
@@ -2197,26 +2828,57 @@ class AudioData:
     """
 
     def __init__(self, path, format=".wav", update=False):
+        from ..core.cache import cached
         from ..core.load import load_audio
+        from ..utils.functions import list_files
 
         self.path = path
         self.format = format
 
-        file_name = self.path / "AudioData.npy"
-        if (
-            update or not file_name.exists()
-        ):  # if .npy doesn't exist or want to update the file
+        file_name = self.path / "AudioData.npz"
+        self.data_file = self.path / "AudioData.data.npy"
+
+        def _load_audio():
+            import os
+            import tempfile
+
             audio_info = load_audio(self.path, self.format)
-        else:
-            audio_info = np.load(file_name, allow_pickle=True).item()
+            # Replace the file instead of rewriting it,
+            # so that the file memory-mapped by other objects or processes stays complete
+            with tempfile.NamedTemporaryFile(
+                dir=self.path, suffix=".npy", delete=False
+            ) as f:
+                try:
+                    np.save(f, audio_info.pop("data"))
+                except BaseException:
+                    os.unlink(f.name)
+                    raise
+            os.replace(f.name, self.data_file)
+            return audio_info
+
+        audio_info = cached(
+            file_name,
+            _load_audio,
+            files=list_files(self.path, self.format),
+            parameters={"format": self.format},
+            update=update or not self.data_file.exists(),
+        )
 
         # Set the dictionary values to class attributes
         for key in audio_info:
             setattr(self, key, audio_info[key])
 
+        # The signal is memory-mapped (read from the disk when needed, shared between objects)
+        self.data = np.load(self.data_file, mmap_mode="r")
+
     def __repr__(self):  # print attributes
         return str([key for key in self.__dict__.keys()])
 
+    @property
+    def timestamp(self):
+        """Timestamps of the audio samples (in ms)"""
+        return self.time_axis.to_array()
+
     @property
     def open_folder(self):
 
@@ -2231,13 +2893,15 @@ class AudioData:
         Parameters
         ----------
         time_range : list
-        """
-
-        start = time_range[0]
-        end = time_range[-1]
 
-        ind = np.where((self.timestamp >= start) & (self.timestamp <= end))
-        return self.timestamp[ind], self.data[ind]
+        Returns
+        -------
+        timestamp : np.ndarray
+        data : np.ndarray
+            view on the data
+        """
+        ind = self.time_axis.slice(time_range[0], time_range[-1])
+        return self.time_axis[ind], self.data[ind]
 
     def spectrogram(self, timestamp, data, freq_range=[300, 8000]):
         """Calculate spectrogram"""
@@ -2272,19 +2936,26 @@ class AudioData:
 
 class NeuralData:
     def __init__(self, path, channel_nb, format="rhd", update=False):
+        from ..core.cache import cached
+        from ..core.parameters import sample_rate
 
         self.path = path
         self.channel_nb = str(channel_nb).zfill(2)
         self.format = format  # format of the file (e.g., rhd), this info should be in the database
 
-        file_name = self.path / f"NeuralData_Ch{self.channel_nb}.npy"
-        if (
-            update or not file_name.exists()
-        ):  # if .npy doesn't exist or want to update the file
-            data_info = self.load_neural_data()
-            # Save event_info as a numpy object
+        if self.format == "cbin":
+            input_files = list(self.path.glob(f"*Ch{self.channel_nb}(merged).mat"))
         else:
-            data_info = np.load(file_name, allow_pickle=True).item()
+            input_files = list(self.path.glob(f"*.{self.format}"))
+
+        file_name = self.path / f"NeuralData_Ch{self.channel_nb}.npz"
+        data_info = cached(
+            file_name,
+            self.load_neural_data,
+            files=input_files,
+            parameters={"format": self.format, "sample_rate": sample_rate},
+            update=update,
+        )
 
         # Set the dictionary values to class attributes
         for key in data_info:
@@ -2293,12 +2964,17 @@ class NeuralData:
     def __repr__(self):  # print attributes
         return str([key for key in self.__dict__.keys()])
 
+    @property
+    def timestamp(self):
+        """Timestamps of the samples (in ms)"""
+        return self.time_axis.to_array()
+
     def load_neural_data(self):
         """
         Load and concatenate all neural data files (e.g., .rhd) in the input dir (path)
         """
 
-        from ..core.load import read_rhd
+        from ..core.load import open_rhd
         from ..core.parameters import sample_rate
 
         print("")
@@ -2306,10 +2982,6 @@ class NeuralData:
         # List .rhd files
         files = list(self.path.glob(f"*.{self.format}"))
 
-        # Initialize
-        timestamp_concat = np.array([], dtype=np.float64)
-        amplifier_data_concat = np.array([], dtype=np.float64)
-
         # Store values in these lists
         file_list = []
 
@@ -2320,49 +2992,42 @@ class NeuralData:
             import scipy.io
 
             mat_file = list(self.path.glob(f"*Ch{self.channel_nb}(merged).mat"))[0]
-            timestamp_concat = scipy.io.loadmat(mat_file)["t_amplifier"][0].astype(
-                np.float64
+            mat = scipy.io.loadmat(mat_file)
+            # Gaps between the merged files are detected from the timestamps
+            time_axis = TimeAxis.from_timestamp(
+                mat["t_amplifier"][0].astype(np.float64),
+                sample_rate[self.format],
             )
-            amplifier_data_concat = scipy.io.loadmat(mat_file)["amplifier_data"][
-                0
-            ].astype(np.float64)
+            amplifier_data_concat = mat["amplifier_data"][0].astype(np.float64)
 
         else:
+            # Memory-map the files first to preallocate the concatenated data
+            intan_list = [open_rhd(file) for file in files]
+            time_axis = TimeAxis.concatenate(
+                [len(intan) for intan in intan_list], sample_rate[self.format]
+            )
+            amplifier_data_concat = np.full(len(time_axis), np.nan)
+
             # Loop through Intan .rhd files
-            for file in files:
+            for file, intan, file_ind in zip(files, intan_list, time_axis.offsets):
 
                 # Load data file
                 print("Loading... " + file.stem)
                 file_list.append(file.name)
-                intan = read_rhd(file)  # note that the timestamp is in second
-                # Concatenate timestamps
-                intan["t_amplifier"] -= intan["t_amplifier"][0]  # start from t = 0
-                if timestamp_concat.size == 0:
-                    timestamp_concat = np.append(timestamp_concat, intan["t_amplifier"])
-                else:
-                    intan["t_amplifier"] += timestamp_concat[-1] + (
-                        1 / sample_rate[self.format]
-                    )
-                    timestamp_concat = np.append(timestamp_concat, intan["t_amplifier"])
-
-                # Concatenate neural data
-                for ind, ch in enumerate(intan["amplifier_channels"]):
-                    if int(self.channel_nb) == int(ch["native_channel_name"][-2:]):
-                        amplifier_data_concat = np.append(
-                            amplifier_data_concat, intan["amplifier_data"][ind, :]
-                        )
 
-            timestamp_concat *= 1e3  # convert to microsecond
+                # Only decode the channel needed (NaN if it was not recorded in the file)
+                ind = intan.find_channel(self.channel_nb)
+                if ind is not None:
+                    data = intan.amplifier_data(ind)
+                    amplifier_data_concat[file_ind : file_ind + len(intan)] = data
 
         # Organize data into a dictionary
         data_info = {
             "files": file_list,
-            "timestamp": timestamp_concat,
+            "time_axis": time_axis,
             "data": amplifier_data_concat,
             "sample_rate": sample_rate[self.format],
         }
-        file_name = self.path / f"NeuralData_Ch{self.channel_nb}.npy"
-        np.save(file_name, data_info)
 
         return data_info
 
@@ -2381,11 +3046,8 @@ class NeuralData:
         data : arr
         """
 
-        start = time_range[0]
-        end = time_range[-1]
-
-        ind = np.where((self.timestamp >= start) & (self.timestamp <= end))
-        return self.timestamp[ind], self.data[ind]
+        ind = self.time_axis.slice(time_range[0], time_range[-1])
+        return self.time_axis[ind], self.data[ind]
 
     @property
     def open_folder(self):
@@ -2539,108 +3201,45 @@ class Correlogram:
 
 
 class BurstingInfo:
-    def __init__(self, ClassInfo, *input_context):
-
-        from ..core.parameters import burst_hz
+    def __init__(self, ClassInfo, *input_context, burst_hz=None):
 
         # ClassInfo can be BaselineInfo, MotifInfo etc
+        spk_list = ClassInfo.spk_ts
+        duration_list = ClassInfo.durations
+        if not isinstance(spk_list, RaggedArray):
+            spk_list = RaggedArray.from_list(spk_list)
+
         if input_context:  # select data based on social context
-            spk_list = [
-                spk_ts
-                for spk_ts, context in zip(ClassInfo.spk_ts, ClassInfo.contexts)
-                if context == input_context[0]
-            ]
+            ind = np.array(
+                [context == input_context[0] for context in ClassInfo.contexts],
+                dtype=bool,
+            )
+            spk_list = spk_list[ind]
             duration_list = [
-                duration
-                for duration, context in zip(ClassInfo.durations, ClassInfo.contexts)
-                if context == input_context[0]
+                duration for duration, selected in zip(duration_list, ind) if selected
             ]
             self.context = input_context
-        else:
-            spk_list = ClassInfo.spk_ts
-            duration_list = ClassInfo.durations
 
         # Bursting analysis
-        burst_spk_list = []
-        burst_duration_arr = []
-
-        nb_bursts = []
-        nb_burst_spk_list = []
-
-        for ind, spks in enumerate(spk_list):
-
-            # spk = bi.spk_ts[8]
-            isi = np.diff(spks)  # inter-spike interval
-            inst_fr = 1e3 / np.diff(spks)  # instantaneous firing rates (Hz)
-            bursts = np.where(inst_fr >= burst_hz)[0]  # burst index
-
-            # Skip if no bursting detected
-            if not bursts.size:
-                continue
-
-            # Get the number of bursts
-            temp = np.diff(bursts)[
-                np.where(np.diff(bursts) == 1)
-            ].size  # check if the spikes occur in bursting
-            nb_bursts = np.append(nb_bursts, bursts.size - temp)
-
-            # Get burst onset
-            temp = np.where(np.diff(bursts) == 1)[0]
-            spk_ind = temp + 1
-            # Remove consecutive spikes in a burst and just get burst onset
-
-            burst_onset_ind = bursts
-
-            for i, ind in enumerate(temp):
-                burst_spk_ind = spk_ind[spk_ind.size - 1 - i]
-                burst_onset_ind = np.delete(burst_onset_ind, burst_spk_ind)
-
-            # Get burst offset index
-            burst_offset_ind = np.array([], dtype=np.int)
-
-            for i in range(bursts.size - 1):
-                if bursts[i + 1] - bursts[i] > 1:  # if not successive spikes
-                    burst_offset_ind = np.append(burst_offset_ind, bursts[i] + 1)
-
-            # Need to add the subsequent spike time stamp since it is not included (burst is the difference between successive spike time stamps)
-            burst_offset_ind = np.append(burst_offset_ind, bursts[bursts.size - 1] + 1)
-            burst_onset = spks[burst_onset_ind]
-            burst_offset = spks[burst_offset_ind]
-            burst_spk_list.append(spks[burst_onset_ind[0] : burst_offset_ind[0] + 1])
-            burst_duration_arr = np.append(
-                burst_duration_arr, burst_offset - burst_onset
+        bursts = get_bursts(spk_list, burst_hz)
+        nb_burst_spk_list = bursts["nb_spk"]
+        burst_duration_arr = bursts["offset"] - bursts["onset"]
+
+        if nb_burst_spk_list.size:
+            # Spikes of the first burst of each trial with bursts
+            first = np.flatnonzero(np.diff(bursts["trial"], prepend=-1))
+            self.spk_list = RaggedArray.from_ranges(
+                spk_list.values,
+                bursts["onset_ind"][first],
+                bursts["offset_ind"][first] + 1,
             )
-
-            # Get the number of burst spikes
-            nb_burst_spks = 1  # note that it should always be greater than 1
-
-            if nb_bursts.size:
-                if bursts.size == 1:
-                    nb_burst_spks = 2
-                    nb_burst_spk_list.append(nb_burst_spks)
-
-                elif bursts.size > 1:
-                    for ind in range(bursts.size - 1):
-                        if bursts[ind + 1] - bursts[ind] == 1:
-                            nb_burst_spks += 1
-                        else:
-                            nb_burst_spks += 1
-                            nb_burst_spk_list.append(nb_burst_spks)
-                            nb_burst_spks = 1
-
-                        if ind == bursts.size - 2:
-                            nb_burst_spks += 1
-                            nb_burst_spk_list.append(nb_burst_spks)
-            # print(nb_burst_spk_list)
-        if sum(nb_burst_spk_list):
-            self.spk_list = burst_spk_list
-            self.nb_burst_spk = sum(nb_burst_spk_list)
+            self.nb_burst_spk = int(nb_burst_spk_list.sum())
             self.fraction = (
-                round(sum(nb_burst_spk_list) / sum([len(spks) for spks in spk_list]), 3)
+                round(self.nb_burst_spk / spk_list.values.shape[0], 3)
             ) * 100
             self.duration = round((burst_duration_arr).sum(), 3)  # total duration
-            self.freq = round(nb_bursts.sum() / (sum(duration_list) / 1e3), 3)
-            self.mean_nb_spk = round(np.array(nb_burst_spk_list).mean(), 3)
+            self.freq = round(nb_burst_spk_list.size / (sum(duration_list) / 1e3), 3)
+            self.mean_nb_spk = round(nb_burst_spk_list.mean(), 3)
             self.mean_duration = round(burst_duration_arr.mean(), 3)  # mean duration
         else:  # no burst spike detected
             self.spk_list = []
@@ -2649,11 +3248,79 @@ class BurstingInfo:
             ) = (
                 self.duration
             ) = self.freq = self.mean_nb_spk = self.mean_duration = np.nan
+        self.bursts = bursts  # onset, offset, number of spikes of each burst
 
     def __repr__(self):  # print attributes
         return str([key for key in self.__dict__.keys()])
 
 
+class ISIHistogram:
+    """
+    Histogram of inter-spike intervals on log-scaled bins
+
+    Intervals can be added incrementally (e.g., file by file),
+    and histograms from different files, sessions or contexts can be merged,
+    so that the intervals do not need to be kept in memory.
+    """
+
+    def __init__(self, bins=None):
+        """
+        Parameters
+        ----------
+        bins : np.ndarray
+            Bin edges in log10(ms), parameters.isi_bin by default
+        """
+        if bins is None:
+            from ..core.parameters import isi_bin as bins
+
+        self.bins = np.asarray(bins, dtype=np.float64)
+        self.hist = np.zeros(self.bins.shape[0] - 1, dtype=np.int64)
+        # Number of intervals (including those out of the bins)
+        self.nb_isi = np.int64(0)
+        self.nb_within_ref = np.int64(0)  # number of intervals < 1 ms
+
+    def __repr__(self):
+        return "ISIHistogram(nb_isi={})".format(self.nb_isi)
+
+    def add(self, isi):
+        """
+        Add intervals
+
+        Parameters
+        ----------
+        isi : np.ndarray
+            Inter-spike interval array (in ms)
+        """
+        isi = np.asarray(isi, dtype=np.float64).reshape(-1)
+        with np.errstate(divide="ignore"):
+            self.hist += np.histogram(np.log10(isi), bins=self.bins)[0]
+        self.nb_isi += isi.shape[0]
+        self.nb_within_ref += np.count_nonzero(isi < 1)
+        return self
+
+    def add_spikes(self, spk_ts_list):
+        """
+        Add intervals between successive spikes of each trial
+
+        Parameters
+        ----------
+        spk_ts_list : list or RaggedArray
+            spike timestamps per trial (in ms)
+        """
+        if not isinstance(spk_ts_list, RaggedArray):
+            spk_ts_list = RaggedArray.from_list(spk_ts_list)
+        return self.add(spk_ts_list.diff().values)
+
+    def merge(self, other):
+        """Add the intervals of another histogram with the same bins"""
+        if not np.array_equal(self.bins, other.bins):
+            raise Exception("Histograms with different bins cannot be merged")
+        self.hist += other.hist
+        self.nb_isi += other.nb_isi
+        self.nb_within_ref += other.nb_within_ref
+        return self
+
+
 class ISI:
     """
     Class object for inter-spike interval analysis
@@ -2664,21 +3331,23 @@ class ISI:
         Parameters
         ----------
 
-        isi : np.ndarray
-            Inter-spike interval array
+        isi : np.ndarray or ISIHistogram
+            Inter-spike interval array, or their histogram
+            (data is None when created from a histogram)
         """
-        from ..core.parameters import isi_bin, isi_scale, isi_win
+        if isinstance(isi, ISIHistogram):
+            isi_hist, self.data = isi, None
+        else:
+            isi_hist, self.data = ISIHistogram().add(isi), isi
 
-        self.data = isi
-        self.hist, self.time_bin = np.histogram(np.log10(isi), bins=isi_bin)
-        self.time_bin = self.time_bin[:-1]
+        self.hist = isi_hist.hist.copy()
         # Peak latency of the ISI distribution
-        self.time_bin = 10**self.time_bin
+        self.time_bin = 10 ** isi_hist.bins[:-1]
         self.peak_latency = self.time_bin[
             np.min(np.where(self.hist == np.min(self.hist.max())))
         ]  # in ms
         # Proportion of within-refractory period spikes
-        self.within_ref_prop = (np.sum(self.data < 1) / self.data.shape[0]) * 100
+        self.within_ref_prop = (isi_hist.nb_within_ref / isi_hist.nb_isi) * 100
         # CV of ISI
         self.cv = round(self.hist.std(axis=0) / self.hist.mean(axis=0), 3)
 
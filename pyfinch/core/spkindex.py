@@ -0,0 +1,69 @@
+"""
+Time range queries on spike timestamps
+"""
+
+import numpy as np
+
+from .ragged import RaggedArray
+
+
+class SpikeIndex:
+    """
+    Sorted spike timestamps for finding spikes within time windows
+
+    Windows are closed intervals [start, end] (same as (spk_ts >= start) & (spk_ts <= end)).
+    Each query is a binary search (np.searchsorted) instead of a scan of all spikes,
+    and start, end can be arrays to query many windows at once.
+    """
+
+    def __init__(self, spk_ts):
+        """
+        Parameters
+        ----------
+        spk_ts : array-like
+            Spike timestamps (sorted if they are not)
+        """
+        spk_ts = np.asarray(spk_ts, dtype=np.float64).reshape(-1)
+        if np.any(spk_ts[1:] < spk_ts[:-1]):
+            spk_ts = np.sort(spk_ts, kind="stable")
+        self.spk_ts = spk_ts
+
+    def __len__(self):
+        return self.spk_ts.shape[0]
+
+    def __repr__(self):
+        return "SpikeIndex(nb_spk={})".format(len(self))
+
+    def window_ind(self, start, end):
+        """
+        Index range of the spikes within [start, end]
+
+        Parameters
+        ----------
+        start : float or array-like
+        end : float or array-like
+
+        Returns
+        -------
+        start_ind : int or np.ndarray
+            Index of the first spike in the window
+        stop_ind : int or np.ndarray
+            Index after the last spike in the window
+        """
+        start_ind = np.searchsorted(self.spk_ts, start, side="left")
+        stop_ind = np.searchsorted(self.spk_ts, end, side="right")
+        return start_ind, np.maximum(start_ind, stop_ind)
+
+    def window(self, start: float, end: float) -> np.ndarray:
+        """Spikes within [start, end] (view on the sorted timestamps)"""
+        start_ind, stop_ind = self.window_ind(start, end)
+        return self.spk_ts[start_ind:stop_ind]
+
+    def windows(self, start, end) -> RaggedArray:
+        """Spikes within each window [start[i], end[i]]"""
+        return RaggedArray.from_ranges(self.spk_ts, *self.window_ind(start, end))
+
+    def count(self, start, end):
+        """Number of spikes within [start, end] (int or np.ndarray for many windows)"""
+        start_ind, stop_ind = self.window_ind(start, end)
+        return stop_ind - start_ind
@@ -0,0 +1,166 @@
+"""
+Time axis of uniformly sampled signals (e.g., audio, neural data) made of one or more files
+"""
+
+import numpy as np
+
+
+class TimeAxis:
+    """
+    Timestamps (in ms) of a signal concatenated from segments (e.g., files) sampled at the same rate
+
+    The timestamp of the j-th sample of segment k is start[k] + j / sample_rate (in ms).
+    Timestamps are computed when needed instead of being stored,
+    and a time range is converted into a slice of the signal without scanning the timestamps.
+    Segments are sorted in time and may be separated by gaps.
+    """
+
+    def __init__(self, start, size, sample_rate):
+        """
+        Parameters
+        ----------
+        start : array-like
+            Timestamp of the first sample of each segment (in ms)
+        size : array-like
+            Number of samples in each segment
+        sample_rate : float
+            Sampling rate (Hz)
+        """
+        self.start = np.asarray(start, dtype=np.float64).reshape(-1)
+        self.size = np.asarray(size, dtype=np.int64).reshape(-1)
+        self.sample_rate = sample_rate
+        if self.start.shape != self.size.shape:
+            raise Exception("start and size should have the same length")
+        self.offsets = np.zeros(self.size.shape[0] + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum(self.size)
+
+    @classmethod
+    def concatenate(cls, size, sample_rate, gap=0.0, start=0.0):
+        """
+        Create a TimeAxis from segments placed one after another
+
+        Parameters
+        ----------
+        size : array-like
+            Number of samples in each segment
+        sample_rate : float
+            Sampling rate (Hz)
+        gap : float
+            Time between the end of a segment and the start of the next (in ms)
+        start : float
+            Timestamp of the first sample (in ms)
+        """
+        starts = []
+        end = None
+        for nb_samples in size:
+            start = start if end is None else end + gap
+            end = (nb_samples / sample_rate) * 1e3 + start
+            starts.append(start)
+        return cls(starts, size, sample_rate)
+
+    @classmethod
+    def from_timestamp(cls, timestamp, sample_rate):
+        """
+        Create a TimeAxis from an array of timestamps (in ms)
+
+        A new segment starts wherever the interval between samples differs from 1 / sample_rate
+        by more than half a sample (e.g., gaps between files)
+        """
+        timestamp = np.asarray(timestamp, dtype=np.float64).reshape(-1)
+        if not timestamp.shape[0]:
+            return cls([], [], sample_rate)
+        interval = 1e3 / sample_rate
+        breaks = np.flatnonzero(np.abs(np.diff(timestamp) - interval) > interval / 2)
+        first_ind = np.concatenate([[0], breaks + 1])
+        size = np.diff(np.append(first_ind, timestamp.shape[0]))
+        return cls(timestamp[first_ind], size, sample_rate)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __repr__(self):
+        return "TimeAxis(start={}, size={}, sample_rate={})".format(
+            self.start.tolist(), self.size.tolist(), self.sample_rate
+        )
+
+    @property
+    def end(self) -> np.ndarray:
+        """End of each segment (timestamp of its last sample + 1 / sample_rate, in ms)"""
+        return (self.size / self.sample_rate) * 1e3 + self.start
+
+    def _segment(self, ind):
+        """Segment that each sample index belongs to"""
+        return np.searchsorted(self.offsets, ind, side="right") - 1
+
+    def __getitem__(self, index):
+        """Timestamps of the samples (int, slice or indices)"""
+        if isinstance(index, slice):
+            index = np.arange(*index.indices(len(self)))
+        ind = np.asarray(index)
+        if np.any((ind < -len(self)) | (ind >= len(self))):
+            raise IndexError("TimeAxis index out of range")
+        ind = np.where(ind < 0, ind + len(self), ind)
+        segment = self._segment(ind)
+        timestamp = (
+            self.start[segment]
+            + (ind - self.offsets[segment]) * (1 / self.sample_rate) * 1e3
+        )
+        return timestamp if timestamp.ndim else timestamp.item()
+
+    def to_array(self) -> np.ndarray:
+        """Timestamps of all samples"""
+        return self[:]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.to_array().astype(dtype) if dtype else self.to_array()
+
+    def index(self, time, side="left"):
+        """
+        Find the sample index of a time (same result as np.searchsorted on the timestamps)
+
+        Parameters
+        ----------
+        time : float or array-like
+            Time (in ms)
+        side : {'left', 'right'}
+            'left' returns the first sample at or after time, 'right' the first sample after time
+
+        Returns
+        -------
+        ind : int or np.ndarray
+        """
+        time = np.asarray(time, dtype=np.float64)
+        if not self.size.shape[0]:
+            return np.zeros(time.shape, dtype=np.int64) if time.ndim else 0
+
+        segment = np.maximum(np.searchsorted(self.start, time, side="right") - 1, 0)
+        start, size = self.start[segment], self.size[segment]
+        position = (time - start) * self.sample_rate / 1e3
+        if side == "left":
+            ind = np.ceil(position)
+        else:
+            ind = np.floor(position) + 1
+        ind = np.clip(np.nan_to_num(ind), 0, size).astype(np.int64)
+
+        # Correct rounding errors so that the result matches the computed timestamps
+        def after(j):  # whether sample j is on the requested side of time
+            timestamp = start + j * (1 / self.sample_rate) * 1e3
+            return timestamp >= time if side == "left" else timestamp > time
+
+        ind = np.where((ind > 0) & after(ind - 1), ind - 1, ind)
+        ind = np.where((ind < size) & ~after(ind), ind + 1, ind)
+        ind = ind + self.offsets[segment]
+        return ind if ind.ndim else int(ind)
+
+    def slice(self, start, end) -> slice:
+        """
+        Convert a time range into a slice of the signal
+
+        Parameters
+        ----------
+        start : float
+            Start of the range (in ms)
+        end : float
+            End of the range (in ms, inclusive)
+        """
+        return slice(self.index(start, side="left"), self.index(end, side="right"))
@@ -0,0 +1,182 @@
+"""
+Run per-cluster analyses over a process pool and store the results in the project database
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+
+def analyze_cluster(row: dict, update=False) -> dict:
+    """
+    Load one cluster and compute its metrics (waveform, correlogram, peth & pcc)
+
+    Parameters
+    ----------
+    row : dict
+        Row of the cluster table
+    update : bool
+        Update the cache files of the cluster
+
+    Returns
+    -------
+    metrics : dict
+        Column name and value to store in the cluster table (including 'id')
+    """
+    from ..core.spike import ClusterInfo, Correlogram, MotifInfo
+    from ..db.load import DBInfo
+
+    # Load cluster info from db
+    cluster_db = DBInfo(row)
+    name, path = cluster_db.load_cluster_db()
+    unit_nb = int(cluster_db.unit[-2:])
+    channel_nb = int(cluster_db.channel[-2:])
+    format = cluster_db.format
+
+    metrics = {"id": cluster_db.id}
+
+    ci = ClusterInfo(path, channel_nb, unit_nb, format, name, update=update)
+    metrics["nbSpk"] = ci.nb_spk
+
+    # Waveform
+    ci.analyze_waveform()
+    metrics["spkHeight"] = ci.spk_height  # in microvolts
+    metrics["spkWidth"] = ci.spk_width  # in microseconds
+    metrics["spkHalfWidth"] = ci.half_width
+
+    # Autocorrelogram & bursting category
+    correlogram = ci.get_correlogram(ci.spk_ts, ci.spk_ts)
+    correlogram_jitter = ci.get_jittered_corr()
+    for context, context_name in zip(["U", "D"], ["Undir", "Dir"]):
+        if context not in correlogram_jitter:
+            continue
+        corr = Correlogram(correlogram[context])
+        metrics["burstIndex" + context_name] = corr.burst_index
+        metrics["corrPeakLatency" + context_name] = corr.peak_latency
+        metrics["burstingCategory" + context_name] = corr.category(
+            correlogram_jitter[context]
+        )
+
+    # Peth & pcc during song motif
+    motif = getattr(cluster_db, "motif", None)
+    if motif:
+        mi = MotifInfo(path, channel_nb, unit_nb, motif, format, name, update=update)
+        if len(mi):
+            pi = mi.get_peth()
+            pi.get_fr()
+            pi.get_pcc()
+            for context, context_name in zip(["U", "D"], ["Undir", "Dir"]):
+                if context in pi.pcc:
+                    metrics["pcc" + context_name] = pi.pcc[context]["mean"]
+
+    return metrics
+
+
+def _to_sql_value(value):
+    """Convert numpy scalars (and 0-d arrays) to python types (NaN to NULL)"""
+    if isinstance(value, (np.generic, np.ndarray)) and np.ndim(value) == 0:
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def write_metrics(db, metrics_list: list, table="cluster"):
+    """
+    Store metrics rows in the table within a single transaction
+
+    Parameters
+    ----------
+    db : Database
+    metrics_list : list
+        Metrics dictionaries (with 'id') returned by the analysis
+    table : str
+        Name of the table
+    """
+    col_names = db.col_names(table)
+    for metrics in metrics_list:
+        for col_name, value in metrics.items():
+            if col_name == "id":
+                continue
+            value = _to_sql_value(value)
+            if col_name not in col_names:
+                db.create_col(
+                    table, col_name, "TEXT" if isinstance(value, str) else "REAL"
+                )
+                col_names.append(col_name)
+            db.update(table, col_name, "id", metrics["id"], value, commit=False)
+    db.conn.commit()
+
+
+def run_batch(
+    query: str,
+    analysis=analyze_cluster,
+    table="cluster",
+    nb_workers=None,
+    batch_size=20,
+    update=False,
+    db=None,
+) -> list:
+    """
+    Run the analysis for every cluster returned by the query in parallel
+
+    Parameters
+    ----------
+    query : str
+        SQL query statement (e.g., "SELECT * FROM cluster WHERE analysisOK")
+    analysis : callable
+        Function of (row, update) that returns a metrics dict with 'id'.
+        Must be defined at module level so that it can be sent to worker processes.
+    table : str
+        Table to write the results to
+    nb_workers : int
+        Number of worker processes (number of CPUs by default, 1 to run in this process)
+    batch_size : int
+        Number of clusters written to the database per transaction
+    update : bool
+        Update the cache files of each cluster
+    db : Database
+        Project database (loaded from config.ini by default)
+
+    Returns
+    -------
+    failed : list
+        ids of the clusters whose analysis raised an error
+    """
+    from ..db.load import ProjectLoader
+
+    if db is None:
+        db = ProjectLoader().load_db()
+    db.execute(query)
+    rows = [dict(row) for row in db.cur.fetchall()]  # sqlite3.Row can't be pickled
+
+    metrics_list = []
+    failed = []
+
+    def _collect(row_id, get_metrics):
+        try:
+            metrics_list.append(get_metrics())
+        except Exception as e:
+            print(f"Cluster {row_id} failed : {e!r}")
+            failed.append(row_id)
+            return
+        if len(metrics_list) >= batch_size:
+            write_metrics(db, metrics_list, table)
+            metrics_list.clear()
+
+    if nb_workers == 1:
+        for row in rows:
+            _collect(row["id"], lambda: analysis(row, update))
+    else:
+        with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+            futures = {
+                executor.submit(analysis, row, update): row["id"] for row in rows
+            }
+            for future in as_completed(futures):
+                _collect(futures[future], future.result)
+
+    if metrics_list:
+        write_metrics(db, metrics_list, table)
+
+    print(f"{len(rows) - len(failed)} / {len(rows)} clusters analyzed")
+    return failed
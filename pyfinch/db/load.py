@@ -86,9 +86,19 @@ class Database:
         return [x[1] for x in columns]
 
     def update(
-        self, table, col_name, condition_col=None, condition_value=None, value=None
+        self,
+        table,
+        col_name,
+        condition_col=None,
+        condition_value=None,
+        value=None,
+        commit=True,
     ):
-        """Update values to table"""
+        """
+        Update values to table
+
+        Set commit to False to group several updates in one transaction (call conn.commit() afterwards)
+        """
         if condition_col is not None:
             self.cur.execute(
                 "UPDATE {} SET {} = ? WHERE {} = ?".format(
@@ -103,7 +113,8 @@ class Database:
                 ),
                 (value, condition_value),
             )
-        self.conn.commit()
+        if commit:
+            self.conn.commit()
 
     def to_csv(self, table, add_date=True, open_folder=True):
         """
@@ -109,6 +109,7 @@ def extract_ind(timestamp: np.ndarray, range: list):
     Parameters
     ----------
     timestamp : np.ndarray
+        sorted timestamps
     range : list
         [start end]
 
@@ -120,10 +121,9 @@ def extract_ind(timestamp: np.ndarray, range: list):
         array within the range
     """
 
-    start = range[0]
-    end = range[1]
-
-    ind = np.where((timestamp >= start) & (timestamp <= end))
+    start_ind = np.searchsorted(timestamp, range[0], side="left")
+    stop_ind = np.searchsorted(timestamp, range[1], side="right")
+    ind = np.arange(start_ind, max(start_ind, stop_ind))
     new_array = timestamp[ind]
     return ind, new_array
 
@@ -5,9 +5,10 @@
 import math
 
 import numpy as np
+from scipy.signal import lfilter
 
 
-def notch_filter(input, fSample, fNotch, Bandwidth):
+def notch_filter(input, fSample, fNotch, Bandwidth, zi=None, return_state=False):
     """Implements a notch filter (e.g., for 50 or 60 Hz) on vector 'input'.
 
     fSample = sample rate of data (input Hz or Samples/sec)
@@ -17,16 +18,25 @@ def notch_filter(input, fSample, fNotch, Bandwidth):
     poor time-domain properties with an extended ringing response to
     transient disturbances.
 
+    'input' can also be a (channels x samples) array, in which case all
+    channels are filtered at once along the last axis.
+
+    To filter a continuous data stream split across files, pass
+    return_state=True to get the filter state (zf) at the end of one file
+    and feed it back as zi for the next file.
+
     Example:  If neural data was sampled at 30 kSamples/sec
     and you wish to implement a 60 Hz notch filter:
 
     out = notch_filter(input, 30000, 60, 10);
+    out, zf = notch_filter(input1, 30000, 60, 10, return_state=True);
+    out2 = notch_filter(input2, 30000, 60, 10, zi=zf);
     """
 
     tstep = 1.0 / fSample
     Fc = fNotch * tstep
 
-    L = len(input)
+    input = np.asarray(input, dtype=np.float64)
 
     # Calculate IIR filter parameters
     d = math.exp(-2.0 * math.pi * (Bandwidth / 2.0) * tstep)
@@ -39,20 +49,31 @@ def notch_filter(input, fSample, fNotch, Bandwidth):
     b1 = -2.0 * math.cos(2.0 * math.pi * Fc)
     b2 = 1.0
 
-    out = np.zeros(len(input))
-    out[0] = input[0]
-    out[1] = input[1]
-    # (If filtering a continuous data stream, change out[0:1] to the
-    #  previous final two values of out.)
-
-    # Run filter
-    for i in range(2, L):
-        out[i] = (
-            a * b2 * input[i - 2]
-            + a * b1 * input[i - 1]
-            + a * b0 * input[i]
-            - a2 * out[i - 2]
-            - a1 * out[i - 1]
-        ) / a0
+    num = np.array([a * b0, a * b1, a * b2]) / a0
+    den = np.array([a0, a1, a2]) / a0
+
+    if zi is None:
+        # The first two output samples are copied from the input and the
+        # recursion starts from the third sample (as in the original loop).
+        # Express that as the initial state of a transposed direct-form II filter.
+        out = np.empty_like(input)
+        out[..., :2] = input[..., :2]
+        zf = _initial_state(num, den, input[..., :2], out[..., :2])
+        if input.shape[-1] > 2:
+            out[..., 2:], zf = lfilter(num, den, input[..., 2:], axis=-1, zi=zf)
+    else:
+        out, zf = lfilter(num, den, input, axis=-1, zi=zi)
 
+    if return_state:
+        return out, zf
     return out
+
+
+def _initial_state(num, den, x, y):
+    """Filter state of the transposed direct-form II structure given the last two inputs (x) and outputs (y)"""
+    x1, x2 = x[..., -1], x[..., -2]
+    y1, y2 = y[..., -1], y[..., -2]
+    zi = np.empty(x.shape[:-1] + (2,))
+    zi[..., 0] = num[1] * x1 + num[2] * x2 - den[1] * y1 - den[2] * y2
+    zi[..., 1] = num[2] * x1 - den[2] * y1
+    return zi
@@ -13,8 +13,8 @@ import numpy as np
 from .intanutil.data_to_result import data_to_result
 from .intanutil.get_bytes_per_data_block import get_bytes_per_data_block
 from .intanutil.notch_filter import notch_filter
+from .intanutil.read_data_blocks import read_data_blocks
 from .intanutil.read_header import read_header
-from .intanutil.read_one_data_block import read_one_data_block
 
 
 def read_rhd(filename):
@@ -79,75 +79,11 @@ def read_rhd(filename):
     #         header['sample_rate'] / 1000))
 
     if data_present:
-        # Pre-allocate memory for data.
-        # print('')
-        # print('Allocating memory for data...')
-
-        data = {}
-        if (header["version"]["major"] == 1 and header["version"]["minor"] >= 2) or (
-            header["version"]["major"] > 1
-        ):
-            data["t_amplifier"] = np.zeros(num_amplifier_samples, dtype=np.int)
-        else:
-            data["t_amplifier"] = np.zeros(num_amplifier_samples, dtype=np.uint)
-
-        data["amplifier_data"] = np.zeros(
-            [header["num_amplifier_channels"], num_amplifier_samples], dtype=np.uint
-        )
-        data["aux_input_data"] = np.zeros(
-            [header["num_aux_input_channels"], num_aux_input_samples], dtype=np.uint
-        )
-        data["supply_voltage_data"] = np.zeros(
-            [header["num_supply_voltage_channels"], num_supply_voltage_samples],
-            dtype=np.uint,
-        )
-        data["temp_sensor_data"] = np.zeros(
-            [header["num_temp_sensor_channels"], num_supply_voltage_samples],
-            dtype=np.uint,
-        )
-        data["board_adc_data"] = np.zeros(
-            [header["num_board_adc_channels"], num_board_adc_samples], dtype=np.uint
-        )
-        data["board_dig_in_data"] = np.zeros(
-            [header["num_board_dig_in_channels"], num_board_dig_in_samples],
-            dtype=np.uint,
-        )
-        data["board_dig_in_raw"] = np.zeros(num_board_dig_in_samples, dtype=np.uint)
-        data["board_dig_out_data"] = np.zeros(
-            [header["num_board_dig_out_channels"], num_board_dig_out_samples],
-            dtype=np.uint,
-        )
-        data["board_dig_out_raw"] = np.zeros(num_board_dig_out_samples, dtype=np.uint)
-
         # Read sampled data from file.
         # print('Reading data from file...')
 
-        # Initialize indices used in looping
-        indices = {}
-        indices["amplifier"] = 0
-        indices["aux_input"] = 0
-        indices["supply_voltage"] = 0
-        indices["board_adc"] = 0
-        indices["board_dig_in"] = 0
-        indices["board_dig_out"] = 0
-
-        print_increment = 10
-        percent_done = print_increment
-        for i in range(num_data_blocks):
-            read_one_data_block(data, header, indices, fid)
-
-            # Increment indices
-            indices["amplifier"] += 60
-            indices["aux_input"] += 15
-            indices["supply_voltage"] += 1
-            indices["board_adc"] += 60
-            indices["board_dig_in"] += 60
-            indices["board_dig_out"] += 60
-
-            fraction_done = 100 * (1.0 * i / num_data_blocks)
-            if fraction_done >= percent_done:
-                # print('{}% done...'.format(percent_done))
-                percent_done = percent_done + print_increment
+        # All data blocks share the same layout, so decode them in a single call
+        data = read_data_blocks(header, num_data_blocks, fid)
 
         # Make sure we have read exactly the right amount of data.
         bytes_remaining = filesize - fid.tell()
@@ -231,20 +167,13 @@ def read_rhd(filename):
         if header["notch_filter_frequency"] > 0:
             # print('Applying notch filter...')
 
-            print_increment = 10
-            percent_done = print_increment
-            for i in range(header["num_amplifier_channels"]):
-                data["amplifier_data"][i, :] = notch_filter(
-                    data["amplifier_data"][i, :],
-                    header["sample_rate"],
-                    header["notch_filter_frequency"],
-                    10,
-                )
-
-                fraction_done = 100 * (i / header["num_amplifier_channels"])
-                if fraction_done >= percent_done:
-                    # print('{}% done...'.format(percent_done))
-                    percent_done += print_increment
+            # Filter all amplifier channels at once
+            data["amplifier_data"] = notch_filter(
+                data["amplifier_data"],
+                header["sample_rate"],
+                header["notch_filter_frequency"],
+                10,
+            )
     else:
         data = []
 
@@ -0,0 +1,187 @@
+"""
+Memory-mapped access to Intan files (.rhd)
+
+Channels are decoded lazily from the data blocks on disk,
+so reading one channel does not load the whole recording into memory.
+"""
+
+import os
+
+import numpy as np
+
+from .intanutil.get_bytes_per_data_block import get_bytes_per_data_block
+from .intanutil.notch_filter import notch_filter
+from .intanutil.read_data_blocks import get_data_block_dtype
+from .intanutil.read_header import read_header
+
+
+class RhdMemmap:
+    """
+    Memory-mapped view of an Intan Technologies RHD2000 data file
+
+    Data blocks are mapped as a structured array,
+    so each channel is a strided (blocks x samples) view on the file.
+    Only the channel and sample range that are requested are decoded and scaled.
+    """
+
+    def __init__(self, filename):
+        """
+        Parameters
+        ----------
+        filename : path
+            Name of the .rhd file
+        """
+        self.filename = filename
+
+        with open(filename, "rb") as fid:
+            self.header = read_header(fid)
+            data_offset = fid.tell()
+
+        bytes_per_block = get_bytes_per_data_block(self.header)
+        bytes_remaining = os.path.getsize(filename) - data_offset
+        if bytes_remaining % bytes_per_block != 0:
+            raise Exception(
+                "Something is wrong with file size : should have a whole number of data blocks"
+            )
+        self.nb_blocks = bytes_remaining // bytes_per_block
+
+        block_dtype = get_data_block_dtype(self.header)
+        if self.nb_blocks:
+            self.blocks = np.memmap(
+                filename,
+                dtype=block_dtype,
+                mode="r",
+                offset=data_offset,
+                shape=(self.nb_blocks,),
+            )
+        else:
+            self.blocks = np.zeros(0, dtype=block_dtype)
+
+    def __repr__(self):  # print attributes
+        return str([key for key in self.__dict__.keys()])
+
+    def __len__(self):
+        """Number of amplifier samples"""
+        return 60 * self.nb_blocks
+
+    @property
+    def sample_rate(self) -> float:
+        return self.header["sample_rate"]
+
+    @property
+    def amplifier_channels(self) -> list:
+        return self.header["amplifier_channels"]
+
+    def find_channel(self, channel_nb: int):
+        """
+        Return the index of the amplifier channel whose native name ends with channel_nb
+        (e.g., 17 for 'A-017'), None if the channel was not recorded
+        """
+        for ind, ch in enumerate(self.amplifier_channels):
+            if int(channel_nb) == int(ch["native_channel_name"][-2:]):
+                return ind
+        return None
+
+    def _sample_range(self, start, stop):
+        start = 0 if start is None else start
+        stop = len(self) if stop is None else min(stop, len(self))
+        return start, stop
+
+    def _block_range(self, start, stop, samples_per_block):
+        """Blocks that contain samples [start, stop)"""
+        first_block = start // samples_per_block
+        last_block = -(-stop // samples_per_block)  # ceil
+        return first_block, last_block
+
+    def raw_amplifier(self, channel_ind: int) -> np.ndarray:
+        """Strided (blocks x 60) view on the raw uint16 samples of one amplifier channel"""
+        return self.blocks["amplifier"][:, channel_ind, :]
+
+    def raw_board_adc(self, channel_ind: int) -> np.ndarray:
+        """Strided (blocks x 60) view on the raw uint16 samples of one board ADC channel"""
+        return self.blocks["board_adc"][:, channel_ind, :]
+
+    def _decode(self, raw, start, stop):
+        """Copy samples [start, stop) out of a (blocks x samples) raw view"""
+        samples_per_block = raw.shape[1]
+        first_block, last_block = self._block_range(start, stop, samples_per_block)
+        data = np.asarray(raw[first_block:last_block]).reshape(-1)
+        offset = first_block * samples_per_block
+        return data[start - offset : stop - offset]
+
+    def t_amplifier(self, start=None, stop=None) -> np.ndarray:
+        """
+        Amplifier timestamps (in seconds) of samples [start, stop)
+
+        Parameters
+        ----------
+        start : int, optional
+            First sample index (0 by default)
+        stop : int, optional
+            Sample index to stop at (end of the file by default)
+        """
+        start, stop = self._sample_range(start, stop)
+        timestamp = self._decode(self.blocks["timestamp"], start, stop)
+        return timestamp / self.sample_rate
+
+    def amplifier_data(self, channel_ind: int, start=None, stop=None) -> np.ndarray:
+        """
+        Amplifier data (in microvolts) of one channel for samples [start, stop)
+
+        Parameters
+        ----------
+        channel_ind : int
+            Index of the channel in header['amplifier_channels']
+        start : int, optional
+            First sample index (0 by default)
+        stop : int, optional
+            Sample index to stop at (end of the file by default)
+
+        Notes
+        -----
+        If the software notch filter was selected during the recording, the same filter is applied here.
+        The filter is recursive, so samples from the start of the file up to stop are decoded in that case.
+        """
+        start, stop = self._sample_range(start, stop)
+        notch_freq = self.header["notch_filter_frequency"]
+        decode_start = 0 if notch_freq > 0 else start
+
+        data = self._decode(self.raw_amplifier(channel_ind), decode_start, stop)
+        data = np.multiply(0.195, (data.astype(np.int32) - 32768))  # units = microvolts
+
+        if notch_freq > 0:
+            data = notch_filter(data, self.sample_rate, notch_freq, 10)
+        return data[start - decode_start :]
+
+    def board_adc_data(self, channel_ind: int, start=None, stop=None) -> np.ndarray:
+        """
+        Board ADC data (in volts) of one channel for samples [start, stop)
+
+        Parameters
+        ----------
+        channel_ind : int
+            Index of the channel in header['board_adc_channels']
+        start : int, optional
+            First sample index (0 by default)
+        stop : int, optional
+            Sample index to stop at (end of the file by default)
+        """
+        start, stop = self._sample_range(start, stop)
+        data = self._decode(self.raw_board_adc(channel_ind), start, stop)
+        if self.header["eval_board_mode"] == 1:
+            return np.multiply(152.59e-6, (data.astype(np.int32) - 32768))
+        return np.multiply(50.354e-6, data.astype(np.uint))
+
+    def time_slice(self, start: float, end: float) -> slice:
+        """
+        Convert a time range (in seconds from the start of the file) into a sample slice
+
+        Parameters
+        ----------
+        start : float
+        end : float
+            Inclusive end of the range
+        """
+        start_ind = max(int(np.ceil(start * self.sample_rate)), 0)
+        stop_ind = min(int(np.floor(end * self.sample_rate)) + 1, len(self))
+        return slice(start_ind, max(stop_ind, start_ind))
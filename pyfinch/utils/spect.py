@@ -7,9 +7,13 @@ https://github.com/timsainb/python_spectrograms_and_inversion
 by David Nicholson https://github.com/NickleDave/vak
 """
 
+from functools import lru_cache
 
+
+@lru_cache(maxsize=None)
 def butter_bandpass(lowcut, highcut, fs, order=5):
-    from scipy.signal import butter, lfilter
+    """Butterworth band-pass filter coefficients (cached per sampling rate, band and order)"""
+    from scipy.signal import butter
 
     nyq = 0.5 * fs
     low = lowcut / nyq
@@ -19,7 +23,7 @@ def butter_bandpass(lowcut, highcut, fs, order=5):
 
 
 def butter_bandpass_filter(data, lowcut, highcut, fs, order=5):
-    from scipy.signal import butter, lfilter
+    from scipy.signal import lfilter
 
     b, a = butter_bandpass(lowcut, highcut, fs, order=order)
     y = lfilter(b, a, data)
@@ -65,22 +69,117 @@ def spectrogram(
         vector of centers of frequency bins from spectrogram
 
     """
-    import numpy as np
-    from matplotlib.mlab import specgram
+    spects, freqbins, timebins = spectrogram_batch(
+        [dat],
+        samp_freq,
+        fft_size=fft_size,
+        step_size=step_size,
+        thresh=thresh,
+        transform_type=transform_type,
+        freq_range=freq_range,
+    )
+    return spects[0], freqbins, timebins[0]
+
+
+def spectrogram_batch(
+    segments,
+    samp_freq,
+    fft_size=512,
+    step_size=64,
+    thresh=None,
+    transform_type=None,
+    freq_range=None,
+    chunk_size=2**10,
+):
+    """creates spectrograms of many audio segments at once
 
-    noverlap = fft_size - step_size
+    Returns the same values as matplotlib.mlab.specgram (power spectral density, hanning window).
+    Windows of all segments are taken from one strided view of the filtered signals
+    and transformed together, chunk_size windows at a time.
 
-    if freq_range:
-        dat = butter_bandpass_filter(dat, freq_range[0], freq_range[1], samp_freq)
+    Parameters
+    ----------
+    segments : list
+        audio signals (numpy.ndarray) of any length
+    samp_freq : int
+        sampling frequency in Hz
+    fft_size : int
+        size of window for Fast Fourier transform, number of time bins.
+    step_size : int
+        step size for Fast Fourier transform
+    thresh: int
+        threshold minimum power for log spectrogram
+    transform_type : str
+        one of {'log_spect', 'log_spect_plus_one'}, see spectrogram
+    freq_range : tuple
+        of two elements, lower and higher frequencies.
+    chunk_size : int
+        number of windows transformed at a time (limits memory use)
 
-    # below only take [:3] from return of specgram because we don't need the image
-    spect, freqbins, timebins = specgram(dat, fft_size, samp_freq, noverlap=noverlap)[
-        :3
-    ]
+    Return
+    ------
+    spects : list
+        spectrogram of each segment (frequency x time)
+    freqbins : numpy.ndarray
+        vector of centers of frequency bins from spectrogram
+    timebins : list
+        centers of time bins of each spectrogram (in s)
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    # Filter each segment separately and zero-pad segments shorter than a window
+    signals = []
+    for dat in segments:
+        dat = np.asarray(dat, dtype=np.float64)
+        if freq_range:
+            dat = butter_bandpass_filter(dat, freq_range[0], freq_range[1], samp_freq)
+        if dat.shape[0] < fft_size:
+            dat = np.concatenate([dat, np.zeros(fft_size - dat.shape[0])])
+        signals.append(dat)
+
+    lengths = np.array([dat.shape[0] for dat in signals], dtype=np.int64)
+    nb_windows = (lengths - fft_size) // step_size + 1
+    offsets = np.zeros(lengths.shape[0] + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(nb_windows)
+    # Start of each window in the concatenated signals
+    window_start = np.repeat(
+        np.cumsum(lengths) - lengths - offsets[:-1] * step_size, nb_windows
+    )
+    window_start += np.arange(offsets[-1]) * step_size
+
+    freqbins = np.fft.rfftfreq(fft_size, 1 / samp_freq)
+    if freq_range:
+        f_inds = np.nonzero((freqbins >= freq_range[0]) & (freqbins < freq_range[1]))[0]
+    else:
+        f_inds = np.arange(freqbins.shape[0])
+
+    window = np.hanning(fft_size)
+    # Scale everything except the DC component (and the fft_size/2 component if fft_size is even)
+    scaled = slice(1, -1) if not fft_size % 2 else slice(1, None)
+    windows = sliding_window_view(
+        np.concatenate(signals) if signals else np.zeros(fft_size), fft_size
+    )
+
+    spect = np.empty((offsets[-1], f_inds.shape[0]))  # time x frequency
+    spect_max = np.empty(offsets[-1])
+    for start in range(0, offsets[-1], chunk_size):
+        chunk = slice(start, start + chunk_size)
+        result = np.fft.rfft(windows[window_start[chunk]] * window, axis=1)
+        result = result.real**2 + result.imag**2
+        result[:, scaled] *= 2.0
+        result /= samp_freq
+        result /= (window**2).sum()
+        spect_max[chunk] = result.max(axis=1)
+        spect[chunk] = result[:, f_inds]
 
     if transform_type:
         if transform_type == "log_spect":
-            spect /= spect.max()  # volume normalize to max 1
+            # volume normalize to max 1 (of each spectrogram, over all frequencies)
+            if signals:
+                spect /= np.repeat(
+                    np.maximum.reduceat(spect_max, offsets[:-1]), nb_windows
+                )[:, np.newaxis]
             spect = np.log10(spect)  # take log
             if thresh:
                 # I know this is weird, maintaining 'legacy' behavior
@@ -91,15 +190,13 @@ def spectrogram(
                 spect[spect < thresh] = thresh
     else:
         if thresh:
-            spect[
-                spect < thresh
-            ] = thresh  # set anything less than the threshold as the threshold
-
-    if freq_range:
-        f_inds = np.nonzero((freqbins >= freq_range[0]) & (freqbins < freq_range[1]))[
-            0
-        ]  # returns tuple
-        spect = spect[f_inds, :]
-        freqbins = freqbins[f_inds]
-
-    return spect, freqbins, timebins
+            spect[spect < thresh] = (
+                thresh  # set anything less than the threshold as the threshold
+            )
+
+    spects = [spect[offsets[ind] : offsets[ind + 1]].T for ind in range(len(signals))]
+    timebins = [
+        np.arange(fft_size / 2, length - fft_size / 2 + 1, step_size) / samp_freq
+        for length in lengths
+    ]
+    return spects, freqbins[f_inds], timebins
@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from pyfinch.db.batch import run_batch
+from pyfinch.db.load import Database
+
+
+def analyze_square(row, update=False):
+    if row["id"] == 3:
+        raise ValueError("bad cluster")
+    return {
+        "id": row["id"],
+        "square": np.float64(row["value"] ** 2),
+        "nbSpk": np.int64(row["value"]),
+        "category": "Bursting" if row["value"] > 2 else "NonBursting",
+        "pcc": np.nan,
+        # 0-d arrays, as returned by Correlogram.category
+        "burstingCategoryUndir": np.array("Bursting"),
+        "burstingCategoryDir": np.array(np.nan),
+    }
+
+
+class TestRunBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.tmp_dir.name) / "test.db")
+        self.db.execute("CREATE TABLE cluster (id INTEGER PRIMARY KEY, value REAL)")
+        self.db.cur.executemany(
+            "INSERT INTO cluster VALUES (?, ?)", [(i, float(i)) for i in range(1, 8)]
+        )
+        self.db.conn.commit()
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmp_dir.cleanup()
+
+    def _check(self, nb_workers):
+        failed = run_batch(
+            "SELECT * FROM cluster WHERE id > 1",
+            analysis=analyze_square,
+            nb_workers=nb_workers,
+            batch_size=2,
+            db=self.db,
+        )
+        self.assertEqual(failed, [3])
+
+        df = self.db.to_dataframe("SELECT * FROM cluster ORDER BY id")
+        analyzed = ~df["id"].isin([1, 3])
+        np.testing.assert_array_equal(
+            df["square"][analyzed], df["value"][analyzed] ** 2
+        )
+        self.assertTrue(df["square"][~analyzed].isna().all())
+        self.assertEqual(df["category"][6], "Bursting")
+        self.assertTrue(df["pcc"].isna().all())
+
+        self.db.execute(
+            "SELECT typeof(burstingCategoryUndir), typeof(burstingCategoryDir) "
+            "FROM cluster WHERE id = 2"
+        )
+        self.assertEqual(tuple(self.db.cur.fetchone()), ("text", "null"))
+        self.assertEqual(df["burstingCategoryUndir"][1], "Bursting")
+
+    def test_serial(self):
+        self._check(nb_workers=1)
+
+    def test_process_pool(self):
+        self._check(nb_workers=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
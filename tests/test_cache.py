@@ -0,0 +1,154 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import scipy.io
+from scipy.io import wavfile
+
+from pyfinch.core.cache import cached, get_cache_key, load_cache, save_cache
+from pyfinch.core.spike import ClusterInfo
+
+
+def write_song(data_dir, nb_files=2, sample_rate=30000, duration=1, delay=0):
+    """Write .wav files (duration in s) with their .not.mat annotations (delayed by delay in ms)"""
+    song_dir = data_dir / "Songs"
+    song_dir.mkdir()
+    for ind in range(nb_files):
+        wav_file = song_dir / f"b70r38_{ind}_Undir.wav"
+        wavfile.write(
+            wav_file, sample_rate, np.zeros(sample_rate * duration, dtype=np.int16)
+        )
+        scipy.io.savemat(
+            wav_file.with_suffix(".wav.not.mat"),
+            {
+                "onsets": np.array([[100.0], [250.0], [900.0]]) + delay,
+                "offsets": np.array([[200.0], [300.0], [950.0]]) + delay,
+                "syllables": "abc",
+            },
+        )
+    return sorted(song_dir.glob("*.wav"))
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        data = {
+            "files": ["a", "b"],
+            "file_start": [np.float32(0.5), 1.5],
+            "onsets": [np.array(["1.0", "*", "2.0"]), np.array([], dtype="<U32")],
+            "spk_ts": [np.arange(5.0), np.zeros(0)],
+            "note_durations": np.ones((3, 5)),
+            "contexts": "UD",
+            "parameter": {"buffer": 50, "time_bin": np.arange(10)},
+            "nb_spk": np.int64(3),
+            "path": Path("a") / "b",
+            "pair": (1, None),
+            "by_int": {1: "x"},
+        }
+        save_cache(self.path / "cache.npz", data, "key")
+        loaded = load_cache(self.path / "cache.npz", "key")
+
+        self.assertEqual(loaded.keys(), data.keys())
+        self.assertEqual(loaded["files"], data["files"])
+        self.assertIsInstance(loaded["file_start"][0], np.float32)
+        self.assertIsInstance(loaded["file_start"][1], float)
+        np.testing.assert_array_equal(loaded["onsets"][0], data["onsets"][0])
+        self.assertEqual(loaded["onsets"][1].dtype, np.dtype("<U32"))
+        np.testing.assert_array_equal(loaded["spk_ts"][0], data["spk_ts"][0])
+        np.testing.assert_array_equal(loaded["note_durations"], data["note_durations"])
+        np.testing.assert_array_equal(
+            loaded["parameter"]["time_bin"], data["parameter"]["time_bin"]
+        )
+        self.assertIsInstance(loaded["nb_spk"], np.int64)
+        self.assertEqual(loaded["path"], data["path"])
+        self.assertEqual(loaded["pair"], data["pair"])
+        self.assertEqual(loaded["by_int"], data["by_int"])
+
+        # No pickled objects in the file
+        with np.load(self.path / "cache.npz", allow_pickle=False) as npz:
+            self.assertTrue(all(npz[name].dtype != object for name in npz.files))
+
+        self.assertIsNone(load_cache(self.path / "cache.npz", "other key"))
+        self.assertIsNone(load_cache(self.path / "missing.npz", "key"))
+
+    def test_invalidation(self):
+        input_file = self.path / "input.txt"
+        input_file.write_text("1")
+        nb_calls = []
+
+        def compute():
+            nb_calls.append(1)
+            return {"value": np.arange(3)}
+
+        def load(parameters):
+            return cached(
+                self.path / "cache.npz",
+                compute,
+                files=[input_file],
+                parameters=parameters,
+            )
+
+        load({"bin_size": 1})
+        load({"bin_size": 1})
+        self.assertEqual(len(nb_calls), 1)
+
+        load({"bin_size": 2})  # parameter changed
+        self.assertEqual(len(nb_calls), 2)
+
+        stat = input_file.stat()
+        os.utime(input_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        load({"bin_size": 2})  # input file modified
+        self.assertEqual(len(nb_calls), 3)
+
+        cached(self.path / "cache.npz", compute, [input_file], {"bin_size": 2}, True)
+        self.assertEqual(len(nb_calls), 4)
+
+    def test_key(self):
+        self.assertEqual(
+            get_cache_key(parameters={"a": 1, "b": np.arange(3)}),
+            get_cache_key(parameters={"b": np.arange(3), "a": 1}),
+        )
+        self.assertNotEqual(
+            get_cache_key(parameters={"a": 1}), get_cache_key(parameters={"a": 2})
+        )
+
+
+class TestClusterInfoCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+        self.wav_files = write_song(self.path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cache(self):
+        ci = ClusterInfo(self.path, None, None)
+        cache_file = self.path / "ClusterInfo_Ch_ClusterNone.npz"
+        self.assertTrue(cache_file.exists())
+
+        ci_cached = ClusterInfo(self.path, None, None)
+        for key in ["files", "file_start", "file_end", "syllables", "contexts"]:
+            self.assertEqual(getattr(ci_cached, key), getattr(ci, key))
+        for onsets, onsets_cached in zip(ci.onsets, ci_cached.onsets):
+            np.testing.assert_array_equal(onsets, onsets_cached)
+
+        # A new song file invalidates the cache
+        self.wav_files[0].rename(self.wav_files[0].with_name("b70r38_9_Undir.wav"))
+        self.wav_files[0].with_suffix(".wav.not.mat").rename(
+            self.wav_files[0].with_name("b70r38_9_Undir.wav.not.mat")
+        )
+        ci_new = ClusterInfo(self.path, None, None)
+        self.assertIn("b70r38_9_Undir", ci_new.files)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+import math
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from pyfinch.utils.intan.intanutil.get_bytes_per_data_block import (
+    get_bytes_per_data_block,
+)
+from pyfinch.utils.intan.intanutil.notch_filter import notch_filter
+from pyfinch.utils.intan.intanutil.read_data_blocks import read_data_blocks
+from pyfinch.utils.intan.intanutil.read_header import read_header
+from pyfinch.utils.intan.intanutil.read_one_data_block import read_one_data_block
+from pyfinch.utils.intan.load_intan_rhd_format import read_rhd
+from pyfinch.utils.intan.rhd_memmap import RhdMemmap
+
+
+def _qstring(text):
+    encoded = text.encode("utf-16-le")
+    return struct.pack("<I", len(encoded)) + encoded
+
+
+def write_rhd(
+    file_name,
+    nb_blocks=20,
+    nb_amp=4,
+    nb_aux=3,
+    nb_adc=1,
+    nb_dig_in=2,
+    notch_mode=0,
+    seed=0,
+):
+    """Write a minimal RHD2000 (v1.3) file filled with random samples"""
+    rng = np.random.default_rng(seed)
+    header = struct.pack("<I", 0xC6912702)
+    header += struct.pack("<hh", 1, 3)
+    header += struct.pack("<f", 30000.0)
+    header += struct.pack("<hffffff", 1, 1.0, 0.1, 7500.0, 1.0, 0.1, 7500.0)
+    header += struct.pack("<h", notch_mode)
+    header += struct.pack("<ff", 1000.0, 1000.0)
+    header += _qstring("") + _qstring("") + _qstring("")
+    header += struct.pack("<h", 1)  # temp sensor channels
+    header += struct.pack("<h", 0)  # eval board mode
+
+    channels = (
+        [(0, f"A-{i:03d}") for i in range(nb_amp)]
+        + [(1, f"A-AUX{i + 1}") for i in range(nb_aux)]
+        + [(2, "A-VDD1")]
+        + [(3, f"ADC-{i:02d}") for i in range(nb_adc)]
+        + [(4, f"DIN-{i:02d}") for i in range(nb_dig_in)]
+    )
+    header += struct.pack("<h", 1)  # one signal group
+    header += _qstring("Port A") + _qstring("A")
+    header += struct.pack("<hhh", 1, len(channels), nb_amp)
+    for order, (signal_type, name) in enumerate(channels):
+        header += _qstring(name) + _qstring(name)
+        header += struct.pack("<hhhhhh", order, order, signal_type, 1, order, 0)
+        header += struct.pack("<hhhh", 0, 0, 0, 0)
+        header += struct.pack("<ff", 0.0, 0.0)
+
+    body = b""
+    for block in range(nb_blocks):
+        body += np.arange(block * 60, (block + 1) * 60, dtype="<i4").tobytes()
+        body += rng.integers(0, 2**16, nb_amp * 60, dtype="<u2").tobytes()
+        body += rng.integers(0, 2**16, nb_aux * 15, dtype="<u2").tobytes()
+        body += rng.integers(0, 2**16, 1, dtype="<u2").tobytes()  # supply voltage
+        body += rng.integers(0, 2**16, 1, dtype="<u2").tobytes()  # temp sensor
+        body += rng.integers(0, 2**16, nb_adc * 60, dtype="<u2").tobytes()
+        body += rng.integers(0, 2**16, 60, dtype="<u2").tobytes()  # digital in
+
+    with open(file_name, "wb") as f:
+        f.write(header + body)
+
+
+class TestReadDataBlocks(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_name = Path(self.tmp_dir.name) / "test.rhd"
+        write_rhd(self.file_name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_same_as_block_loop(self):
+        with open(self.file_name, "rb") as fid:
+            header = read_header(fid)
+            nb_blocks = (
+                self.file_name.stat().st_size - fid.tell()
+            ) // get_bytes_per_data_block(header)
+            data = read_data_blocks(header, nb_blocks, fid)
+
+        with open(self.file_name, "rb") as fid:
+            header = read_header(fid)
+            expected = {
+                "t_amplifier": np.zeros(60 * nb_blocks, dtype=np.int64),
+                "amplifier_data": np.zeros([4, 60 * nb_blocks], dtype=np.uint),
+                "aux_input_data": np.zeros([3, 15 * nb_blocks], dtype=np.uint),
+                "supply_voltage_data": np.zeros([1, nb_blocks], dtype=np.uint),
+                "temp_sensor_data": np.zeros([1, nb_blocks], dtype=np.uint),
+                "board_adc_data": np.zeros([1, 60 * nb_blocks], dtype=np.uint),
+                "board_dig_in_raw": np.zeros(60 * nb_blocks, dtype=np.uint),
+            }
+            indices = dict.fromkeys(
+                [
+                    "amplifier",
+                    "aux_input",
+                    "supply_voltage",
+                    "board_adc",
+                    "board_dig_in",
+                    "board_dig_out",
+                ],
+                0,
+            )
+            for _ in range(nb_blocks):
+                read_one_data_block(expected, header, indices, fid)
+                for key, step in zip(indices, [60, 15, 1, 60, 60, 60]):
+                    indices[key] += step
+
+        for key, value in expected.items():
+            self.assertEqual(data[key].dtype, value.dtype, key)
+            np.testing.assert_array_equal(data[key], value, err_msg=key)
+
+    def test_read_rhd(self):
+        result = read_rhd(self.file_name)
+        self.assertEqual(result["amplifier_data"].shape, (4, 60 * 20))
+        np.testing.assert_allclose(result["t_amplifier"], np.arange(60 * 20) / 30000.0)
+        self.assertTrue(set(np.unique(result["board_dig_in_data"])) <= {0, 1})
+
+
+class TestRhdMemmap(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_name = Path(self.tmp_dir.name) / "test.rhd"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _check(self, notch_mode):
+        write_rhd(self.file_name, notch_mode=notch_mode)
+        result = read_rhd(self.file_name)
+        rhd = RhdMemmap(self.file_name)
+
+        self.assertEqual(len(rhd), result["amplifier_data"].shape[1])
+        np.testing.assert_array_equal(rhd.t_amplifier(), result["t_amplifier"])
+        np.testing.assert_array_equal(
+            rhd.board_adc_data(0), result["board_adc_data"][0]
+        )
+        for ind in range(len(rhd.amplifier_channels)):
+            np.testing.assert_array_equal(
+                rhd.amplifier_data(ind), result["amplifier_data"][ind]
+            )
+            np.testing.assert_array_equal(
+                rhd.amplifier_data(ind, 75, 301), result["amplifier_data"][ind, 75:301]
+            )
+        self.assertEqual(rhd.find_channel(2), 2)
+        self.assertIsNone(rhd.find_channel(31))
+
+    def test_channels(self):
+        self._check(notch_mode=0)
+
+    def test_channels_notch(self):
+        self._check(notch_mode=2)
+
+    def test_time_slice(self):
+        write_rhd(self.file_name)
+        rhd = RhdMemmap(self.file_name)
+        ts = rhd.t_amplifier()
+        time_slice = rhd.time_slice(0.001, 0.002)
+        np.testing.assert_array_equal(ts[time_slice], ts[(ts >= 0.001) & (ts <= 0.002)])
+
+
+def notch_filter_loop(input, fSample, fNotch, Bandwidth):
+    """Original per-sample implementation of the notch filter"""
+    tstep = 1.0 / fSample
+    Fc = fNotch * tstep
+    d = math.exp(-2.0 * math.pi * (Bandwidth / 2.0) * tstep)
+    b = (1.0 + d * d) * math.cos(2.0 * math.pi * Fc)
+    a1, a2 = -b, d * d
+    a = (1.0 + d * d) / 2.0
+    b0, b1, b2 = 1.0, -2.0 * math.cos(2.0 * math.pi * Fc), 1.0
+
+    out = np.zeros(len(input))
+    out[0] = input[0]
+    out[1] = input[1]
+    for i in range(2, len(input)):
+        out[i] = (
+            a * b2 * input[i - 2]
+            + a * b1 * input[i - 1]
+            + a * b0 * input[i]
+            - a2 * out[i - 2]
+            - a1 * out[i - 1]
+        )
+    return out
+
+
+class TestNotchFilter(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        t = np.arange(3000) / 30000
+        self.data = 50 * np.sin(2 * np.pi * 60 * t) + rng.normal(0, 10, (4, t.size))
+
+    def test_same_as_loop(self):
+        out = notch_filter(self.data, 30000, 60, 10)
+        for ch, filtered in zip(self.data, out):
+            np.testing.assert_allclose(
+                filtered, notch_filter_loop(ch, 30000, 60, 10), rtol=1e-9, atol=1e-9
+            )
+        np.testing.assert_array_equal(notch_filter(self.data[0], 30000, 60, 10), out[0])
+
+    def test_streaming_state(self):
+        out = notch_filter(self.data, 30000, 60, 10)
+        first, zf = notch_filter(self.data[:, :1000], 30000, 60, 10, return_state=True)
+        second = notch_filter(self.data[:, 1000:], 30000, 60, 10, zi=zf)
+        np.testing.assert_allclose(np.hstack((first, second)), out, atol=1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
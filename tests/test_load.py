@@ -0,0 +1,124 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from scipy.io import wavfile
+
+from pyfinch.core.load import (
+    load_audio,
+    load_song,
+    load_spk_txt,
+    read_spk_txt,
+    read_wav_header,
+)
+from tests.test_cache import write_song
+
+
+class TestLoadAudio(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_wav_header(self):
+        wav_file = self.path / "stereo.wav"
+        wavfile.write(wav_file, 32000, np.zeros((100, 2), dtype=np.int16))
+        self.assertEqual(read_wav_header(wav_file), (32000, 100, 2))
+
+        wav_file = self.path / "float.wav"
+        wavfile.write(wav_file, 44100, np.zeros(55, dtype=np.float32))
+        self.assertEqual(read_wav_header(wav_file), (44100, 55, 1))
+
+    def test_load_audio(self):
+        data = [np.arange(10, dtype=np.int16), np.arange(5, dtype=np.int16) * -1]
+        for ind, file_data in enumerate(data):
+            wavfile.write(self.path / f"{ind}.wav", 1000, file_data)
+
+        audio_info = load_audio(self.path)
+        self.assertEqual(audio_info["sample_rate"], 1000)
+        order = [int(Path(file).stem) for file in audio_info["files"]]
+        np.testing.assert_array_equal(
+            audio_info["data"], np.concatenate([data[ind] for ind in order])
+        )
+
+        wavfile.write(self.path / "2.wav", 2000, data[0])
+        with self.assertRaises(Exception):
+            load_audio(self.path)
+
+    def test_load_song(self):
+        write_song(self.path, nb_files=2, sample_rate=30000)
+        song_info = load_song(self.path)
+
+        np.testing.assert_allclose(song_info["file_start"], [0, 1000 + 1 / 30000])
+        np.testing.assert_allclose(song_info["file_end"], [1000, 2000 + 1 / 30000])
+        np.testing.assert_allclose(
+            song_info["onsets"][1], song_info["onsets"][0] + song_info["file_start"][1]
+        )
+
+
+def write_spk_txt(spk_txt_file, nb_spk=250, nb_samples=32, seed=0):
+    """Write an Offline Sorter .txt export (channel, unit, timestamp, waveform)"""
+    rng = np.random.default_rng(seed)
+    spk_info = np.column_stack(
+        [
+            np.ones(nb_spk),
+            rng.integers(0, 3, nb_spk),
+            np.sort(rng.uniform(0, 100, nb_spk)),
+            rng.normal(0, 0.1, (nb_spk, nb_samples)),
+        ]
+    )
+    header = "\t".join(["Channel", "Unit", "Timestamp"] + [""] * nb_samples)
+    np.savetxt(spk_txt_file, spk_info, delimiter="\t", header=header, comments="")
+    return spk_info
+
+
+class TestLoadSpk(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.spk_txt_file = Path(self.tmp_dir.name) / "b70r38_Ch17(merged).txt"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_same_as_loadtxt(self):
+        spk_info = write_spk_txt(self.spk_txt_file)
+        expected = np.loadtxt(self.spk_txt_file, delimiter="\t", skiprows=1)
+
+        loaded = load_spk_txt(self.spk_txt_file)
+        self.assertIsInstance(loaded["spk_wf"], np.memmap)
+        np.testing.assert_array_equal(loaded["unit"], spk_info[:, 1])
+        np.testing.assert_array_equal(loaded["spk_ts"], expected[:, 2])
+        np.testing.assert_array_equal(loaded["spk_wf"], expected[:, 3:])
+
+        spk_ts, spk_wf, nb_spk = read_spk_txt(self.spk_txt_file, 2, time_unit="ms")
+        unit = expected[:, 1] == 2
+        self.assertEqual(nb_spk, unit.sum())
+        np.testing.assert_array_equal(spk_ts, expected[unit, 2] * 1e3)
+        np.testing.assert_array_equal(spk_wf, expected[unit, 3:])
+
+    def test_update(self):
+        spk_info = write_spk_txt(self.spk_txt_file, nb_spk=10)
+        loaded = load_spk_txt(self.spk_txt_file)
+        self.assertEqual(loaded["spk_ts"].shape, (10,))
+
+        # A modified .txt file is converted again
+        write_spk_txt(self.spk_txt_file, nb_spk=20)
+        self.assertEqual(load_spk_txt(self.spk_txt_file)["spk_wf"].shape, (20, 32))
+        # Files are replaced, not rewritten, so earlier memory maps stay valid
+        np.testing.assert_array_equal(loaded["spk_wf"], spk_info[:, 3:])
+        self.assertEqual(
+            sorted(
+                path.name for path in self.spk_txt_file.with_suffix(".spk").iterdir()
+            ),
+            ["info.json", "timestamp.bin", "unit.bin", "waveform.bin"],
+        )
+
+        write_spk_txt(self.spk_txt_file, nb_spk=0)
+        self.assertEqual(load_spk_txt(self.spk_txt_file)["spk_ts"].shape, (0,))
+
+
+if __name__ == "__main__":
+    unittest.main()
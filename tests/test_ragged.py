@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from pyfinch.core.functions import demarcate_bout
+from pyfinch.core.ragged import RaggedArray
+
+
+class TestRaggedArray(unittest.TestCase):
+    def setUp(self):
+        self.arrays = [np.array([1.0, 2.0]), np.array([]), np.array([3.0, 4.0, 5.0])]
+        self.ragged = RaggedArray.from_list(self.arrays)
+
+    def _assert_same(self, ragged, arrays):
+        self.assertEqual(len(ragged), len(arrays))
+        for row, array in zip(ragged, arrays):
+            np.testing.assert_array_equal(row, array)
+
+    def test_rows(self):
+        self._assert_same(self.ragged, self.arrays)
+        np.testing.assert_array_equal(self.ragged.lengths, [2, 0, 3])
+        np.testing.assert_array_equal(self.ragged.row_ind, [0, 0, 2, 2, 2])
+        np.testing.assert_array_equal(self.ragged[-1], self.arrays[-1])
+        with self.assertRaises(IndexError):
+            self.ragged[3]
+
+    def test_views(self):
+        self.assertTrue(np.shares_memory(self.ragged[2], self.ragged.values))
+        self.assertTrue(np.shares_memory(self.ragged[1:].values, self.ragged.values))
+
+    def test_select(self):
+        self._assert_same(self.ragged[1:], self.arrays[1:])
+        self._assert_same(self.ragged[::-1], self.arrays[::-1])
+        self._assert_same(self.ragged[[2, 0]], [self.arrays[2], self.arrays[0]])
+        mask = np.array([True, False, True])
+        self._assert_same(self.ragged[mask], [self.arrays[0], self.arrays[2]])
+        self._assert_same(self.ragged[mask == 2], [])
+
+    def test_diff(self):
+        ragged = RaggedArray.from_list([[1.0], [], [3.0, 4.0, 6.0], [7.0, 9.0], []])
+        self._assert_same(ragged.diff(), [np.diff(array) for array in ragged.to_list()])
+        self._assert_same(
+            ragged.compress(ragged.values > 3.5), [[], [], [4.0, 6.0], [7.0, 9.0], []]
+        )
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = Path(tmp_dir) / "spk_ts"
+            self.ragged.save(file_name)
+            ragged = RaggedArray.load(file_name)
+            self.assertIsInstance(ragged.values, np.memmap)
+            self._assert_same(ragged, self.arrays)
+
+    def test_demarcate_bout(self):
+        onsets = np.array([10.0, 20.0, 900.0, 950.0])
+        intervals = np.array([5.0, 600.0, 5.0])
+        np.testing.assert_array_equal(
+            demarcate_bout(onsets, intervals), [10, 20, np.nan, 900, 950, np.nan]
+        )
+        self.assertEqual(demarcate_bout("abcd", intervals), "ab*cd*")
+
+
+if __name__ == "__main__":
+    unittest.main()
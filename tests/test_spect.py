@@ -0,0 +1,138 @@
+import unittest
+import warnings
+
+import numpy as np
+from matplotlib.mlab import specgram
+
+from pyfinch.core.functions import get_spectral_entropy
+from pyfinch.utils.spect import (
+    butter_bandpass,
+    butter_bandpass_filter,
+    spectrogram,
+    spectrogram_batch,
+)
+
+
+def spectrogram_mlab(dat, samp_freq, transform_type=None, thresh=None, freq_range=None):
+    """Original implementation of spectrogram with matplotlib.mlab.specgram"""
+    if freq_range:
+        dat = butter_bandpass_filter(dat, freq_range[0], freq_range[1], samp_freq)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # segments shorter than a window
+        spect, freqbins, timebins = specgram(dat, 512, samp_freq, noverlap=512 - 64)
+    if transform_type == "log_spect":
+        spect /= spect.max()
+        spect = np.log10(spect)
+        if thresh:
+            spect[spect < -thresh] = -thresh
+    if freq_range:
+        f_inds = np.nonzero((freqbins >= freq_range[0]) & (freqbins < freq_range[1]))
+        spect, freqbins = spect[f_inds[0]], freqbins[f_inds[0]]
+    return spect, freqbins, timebins
+
+
+class TestSpectrogram(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.segments = [
+            rng.normal(0, 1000, nb_samples).astype(np.int16)
+            for nb_samples in [100, 512, 513, 576, 3000, 20000]
+        ]
+
+    def test_same_as_mlab(self):
+        for kwargs in [
+            {},
+            {"freq_range": [300, 8000]},
+            {"freq_range": [300, 8000], "transform_type": "log_spect", "thresh": 5},
+        ]:
+            spects, freqbins, timebins = spectrogram_batch(
+                self.segments, 32000, chunk_size=37, **kwargs
+            )
+            self.assertEqual(len(spects), len(self.segments))
+            for ind, segment in enumerate(self.segments):
+                expected = spectrogram_mlab(segment, 32000, **kwargs)
+                np.testing.assert_allclose(spects[ind], expected[0], rtol=1e-10)
+                np.testing.assert_array_equal(freqbins, expected[1])
+                np.testing.assert_array_equal(timebins[ind], expected[2])
+
+                spect, _, _ = spectrogram(segment, 32000, **kwargs)
+                np.testing.assert_array_equal(spect, spects[ind])
+
+    def test_filter_cache(self):
+        self.assertIs(
+            butter_bandpass(300, 8000, 32000), butter_bandpass(300, 8000, 32000)
+        )
+        self.assertIsNot(
+            butter_bandpass(300, 8000, 32000), butter_bandpass(300, 8000, 40000)
+        )
+
+    def test_empty(self):
+        spects, freqbins, timebins = spectrogram_batch(
+            [], 32000, freq_range=[300, 8000]
+        )
+        self.assertEqual((spects, timebins), ([], []))
+        self.assertGreater(freqbins.shape[0], 0)
+
+
+def spectro_temporal_entropy_loop(psd_array):
+    """Original per-time bin implementation of the spectro-temporal entropy"""
+    se_array = np.array([], dtype=np.float32)
+    for i in range(psd_array.shape[1]):
+        psd_norm = psd_array[:, i] / psd_array[:, i].sum()
+        se = -(psd_norm * np.log2(psd_norm)).sum()
+        se /= np.log2(psd_norm.shape[0])
+        se_array = np.append(se_array, se)
+    return se_array
+
+
+class TestSpectralEntropy(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.spects = [rng.uniform(0, 1, (200, nb_bins)) for nb_bins in [1, 5, 30]]
+
+    def test_same_as_loop(self):
+        for spect in self.spects:
+            se = get_spectral_entropy(spect, mode="spectro_temporal")
+            expected = spectro_temporal_entropy_loop(spect)
+            np.testing.assert_allclose(se["array"], expected, rtol=1e-12)
+            self.assertAlmostEqual(se["mean"], expected.mean(), places=12)
+            self.assertAlmostEqual(se["var"], expected.var(), places=12)
+
+            psd_norm = spect.mean(axis=1) / spect.mean(axis=1).sum()
+            expected = -(psd_norm * np.log2(psd_norm)).sum() / np.log2(200)
+            se = get_spectral_entropy(spect, mode="spectral")
+            self.assertAlmostEqual(se, expected, places=12)
+
+    def test_batch(self):
+        for mode in ["spectral", "spectro_temporal"]:
+            se = get_spectral_entropy(self.spects, mode=mode)
+            for ind, spect in enumerate(self.spects):
+                expected = get_spectral_entropy(spect, mode=mode)
+                if mode == "spectral":
+                    self.assertAlmostEqual(se[ind], expected, places=12)
+                else:
+                    np.testing.assert_allclose(se["array"][ind], expected["array"])
+                    self.assertAlmostEqual(se["mean"][ind], expected["mean"], places=12)
+                    self.assertAlmostEqual(se["var"][ind], expected["var"], places=12)
+
+        # Spectrograms of the same size stacked in an array
+        se = get_spectral_entropy(np.stack([self.spects[2]] * 2), mode="spectral")
+        self.assertEqual(se.shape, (2,))
+        self.assertAlmostEqual(
+            se[1], get_spectral_entropy(self.spects[2], mode="spectral")
+        )
+
+        se = get_spectral_entropy([], mode="spectro_temporal")
+        self.assertEqual((len(se["array"]), se["mean"].shape[0]), (0, 0))
+
+    def test_zero_power(self):
+        spect = np.zeros((4, 3))
+        spect[0] = 1  # power in one frequency bin
+        spect[1:, 1] = 1  # uniform power
+        spect[:, 2] = 0  # no power
+        se = get_spectral_entropy(spect, mode="spectro_temporal")
+        np.testing.assert_array_equal(se["array"], [0, 1, np.nan])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,695 @@
+import copy
+import math
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from scipy.io import wavfile
+
+from pyfinch.core.functions import (
+    align_waveform,
+    get_spectral_entropy,
+    get_spk_features,
+)
+from pyfinch.core.parameters import spk_corr_parm
+from pyfinch.core.ragged import RaggedArray
+from pyfinch.core.spike import (
+    ISI,
+    AudioData,
+    BaselineInfo,
+    BoutInfo,
+    BurstingInfo,
+    ClusterInfo,
+    ISIHistogram,
+    MotifInfo,
+    PethInfo,
+    get_bursts,
+    get_fr,
+    get_isi,
+    get_jittered_spk_corr,
+    get_pcc,
+    get_peth,
+    get_spk_corr,
+    get_spk_count,
+    get_warped_spk_ts,
+    rebin_peth,
+)
+from pyfinch.utils.spect import spectrogram
+from tests.test_cache import write_song
+from tests.test_load import write_spk_txt
+
+
+def get_peth_loop(evt_ts_list, spk_ts_list, pre_evt_buffer, bin_size, nb_bins):
+    """Original per-spike implementation of the peth"""
+    peth = np.zeros((len(evt_ts_list), nb_bins))
+    for trial_ind, (evt_ts, spk_ts) in enumerate(zip(evt_ts_list, spk_ts_list)):
+        spk_ts_new = copy.deepcopy(spk_ts)
+        if not isinstance(evt_ts, np.float64):
+            evt_ts = np.asarray(list(map(float, evt_ts)))
+            spk_ts_new -= evt_ts[0]
+            spk_ts_new += pre_evt_buffer
+        else:
+            spk_ts_new -= evt_ts
+            spk_ts_new += pre_evt_buffer
+        for spk in spk_ts_new:
+            peth[trial_ind, math.ceil(spk / bin_size)] += 1
+    return peth
+
+
+def make_trials(nb_trials=30, seed=0):
+    """Random motif onsets (as lists of strings, as in MotifInfo) and spikes around them"""
+    rng = np.random.default_rng(seed)
+    onsets = np.sort(rng.uniform(0, 1e6, nb_trials))
+    evt_ts_list = [[str(onset), str(onset + 100)] for onset in onsets]
+    spk_ts_list = [
+        np.sort(rng.uniform(onset - 50, onset + 800, rng.integers(0, 60)))
+        for onset in onsets
+    ]
+    spk_ts_list[3] = np.array([])  # trial without spikes
+    return onsets, evt_ts_list, spk_ts_list
+
+
+class TestPeth(unittest.TestCase):
+    def test_same_as_loop(self):
+        onsets, evt_ts_list, spk_ts_list = make_trials()
+        for bin_size in [1, 5]:
+            peth, time_bin, _ = get_peth(evt_ts_list, spk_ts_list, bin_size=bin_size)
+            np.testing.assert_array_equal(
+                peth, get_peth_loop(evt_ts_list, spk_ts_list, 50, bin_size, 1500)
+            )
+
+        # Single onset (np.float64) per trial, as in NoteInfo
+        peth, _, _ = get_peth(onsets, spk_ts_list)
+        np.testing.assert_array_equal(
+            peth, get_peth_loop(onsets, spk_ts_list, 50, 1, 1500)
+        )
+
+    def test_duration(self):
+        _, evt_ts_list, spk_ts_list = make_trials()
+        peth, time_bin, _ = get_peth(evt_ts_list, spk_ts_list, duration=300)
+        expected = get_peth_loop(evt_ts_list, spk_ts_list, 50, 1, 1500)
+        np.testing.assert_array_equal(peth, expected[:, :350])
+        np.testing.assert_array_equal(time_bin, np.arange(-50, 300))
+
+    def test_out_of_bound(self):
+        with self.assertRaises(Exception):
+            get_peth([np.float64(100)], [np.array([10.0])])
+
+
+def get_spk_count_loop(peth, win_size):
+    """Original window-by-window implementation of the spike count"""
+    spk_arr = np.empty((peth.shape[0], 0), int)
+    for i in range(peth.shape[1] - win_size):
+        count = peth[:, i : win_size + i].sum(axis=1)
+        spk_arr = np.append(spk_arr, np.array([count]).transpose(), axis=1)
+    return spk_arr
+
+
+def make_peth_info():
+    _, evt_ts_list, spk_ts_list = make_trials()
+    peth, time_bin, parameters = get_peth(evt_ts_list, spk_ts_list)
+    return PethInfo(
+        {
+            "peth": peth,
+            "time_bin": time_bin,
+            "parameters": parameters,
+            "contexts": "UD" * 15,
+            "median_duration": 300,
+        }
+    )
+
+
+class TestSpkCount(unittest.TestCase):
+    def setUp(self):
+        self.pi = make_peth_info()
+
+    def test_same_as_loop(self):
+        peth = self.pi.peth["All"]
+        for win_size in [1, 30, peth.shape[1] - 1, peth.shape[1], peth.shape[1] + 5]:
+            np.testing.assert_array_equal(
+                get_spk_count(peth, win_size), get_spk_count_loop(peth, win_size)
+            )
+
+        self.pi.get_spk_count(win_size=30)
+        for context in "UD":
+            # Windows starting up to the median duration (-50 to 300 ms)
+            expected = get_spk_count_loop(self.pi.peth[context], 30)[:, :351]
+            np.testing.assert_array_equal(
+                self.pi.spk_count[context], expected.sum(axis=0)
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fano_factor = expected.var(axis=0) / expected.mean(axis=0)
+            np.testing.assert_array_equal(self.pi.fano_factor[context], fano_factor)
+        self.assertNotIn("All", self.pi.spk_count)
+
+    def test_multiple_windows(self):
+        self.pi.get_spk_count(win_size=[10, 30])
+        spk_count, spk_count_cv = self.pi.spk_count, self.pi.spk_count_cv
+        self.assertEqual(list(spk_count), [10, 30])
+        for win_size in [10, 30]:
+            self.pi.get_spk_count(win_size=win_size)
+            np.testing.assert_array_equal(
+                spk_count[win_size]["U"], self.pi.spk_count["U"]
+            )
+            self.assertEqual(spk_count_cv[win_size], self.pi.spk_count_cv)
+
+
+def rebin_loop(peth, bin_size):
+    """Original column-by-column rebinning in PethInfo.get_sparseness"""
+    new_peth = np.empty([peth.shape[0], 0])
+    for start_ind in range(0, peth.shape[1], bin_size):
+        peth_bin = peth[:, start_ind : start_ind + bin_size].sum(axis=1)
+        new_peth = np.append(new_peth, peth_bin.reshape(peth.shape[0], 1), axis=1)
+    return new_peth
+
+
+class TestRebin(unittest.TestCase):
+    def setUp(self):
+        self.pi = make_peth_info()
+
+    def test_same_as_loop(self):
+        peth = self.pi.peth["All"]
+        for bin_size in [1, 3, 7, 10, 1500, 2000]:
+            np.testing.assert_array_equal(
+                rebin_peth(peth, bin_size), rebin_loop(peth, bin_size)
+            )
+
+        peth_dict, time_bin = self.pi.rebin(7)
+        self.assertEqual(peth_dict.keys(), self.pi.peth.keys())
+        for context, peth in self.pi.peth.items():
+            np.testing.assert_array_equal(peth_dict[context], rebin_loop(peth, 7))
+        np.testing.assert_array_equal(time_bin, np.arange(-50, 1450, 7))
+
+        with self.assertRaises(Exception):
+            self.pi.rebin(2.5)
+
+    def test_metrics(self):
+        sparseness = self.pi.get_sparseness(bin_size=10)
+        for context in "UD":
+            fr = rebin_loop(self.pi.peth[context], 10).mean(axis=0) * 100
+            norm_fr = fr / fr.sum()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                expected = 1 + np.nansum(norm_fr * np.log10(norm_fr)) / np.log10(150)
+            self.assertEqual(sparseness[context], round(expected, 3))
+
+        self.pi.get_spk_count(win_size=3, bin_size=10)
+        expected = get_spk_count(rebin_peth(self.pi.peth["U"], 10), 3)[:, :36]
+        np.testing.assert_array_equal(self.pi.spk_count["U"], expected.sum(axis=0))
+
+        self.pi.get_fr(smoothing=False, bin_size=10)
+        np.testing.assert_array_equal(self.pi.time_bin, np.arange(-50, 310, 10))
+        np.testing.assert_array_equal(
+            self.pi.fr["U"], rebin_peth(self.pi.peth["U"], 10)[:, :36] * 100
+        )
+
+        # Spike counts at the peth bin size are not affected by the time bins of get_fr
+        self.pi.get_spk_count()
+        self.assertEqual(self.pi.spk_count["U"].shape, (351,))
+        np.testing.assert_array_equal(
+            self.pi.spk_count["U"],
+            get_spk_count(self.pi.peth["U"], 30)[:, :351].sum(axis=0),
+        )
+
+
+def get_corr_loop(ref_spks, target_spks):
+    """Original pair-by-pair implementation of the correlogram"""
+    corr = np.zeros(len(spk_corr_parm["time_bin"]))
+    for ref_spk in ref_spks:
+        for target_spk in target_spks:
+            diff = target_spk - ref_spk
+            if diff and -spk_corr_parm["lag"] <= diff <= spk_corr_parm["lag"]:
+                if diff < 0:
+                    ind = np.where(spk_corr_parm["time_bin"] <= -math.ceil(abs(diff)))[
+                        0
+                    ][-1]
+                else:
+                    ind = np.where(spk_corr_parm["time_bin"] >= math.ceil(diff))[0][0]
+                corr[ind] += 1
+    return corr
+
+
+def make_spk_trains(nb_files=6, seed=0):
+    rng = np.random.default_rng(seed)
+    spk_ts_list = []
+    for _ in range(nb_files):
+        spk_ts = rng.uniform(0, 3000, rng.integers(0, 150))
+        bursts = spk_ts[:10, None] + rng.uniform(0, 8, (min(spk_ts.size, 10), 3))
+        spk_ts = np.concatenate([spk_ts, bursts.ravel(), np.round(spk_ts[:20])])
+        spk_ts = np.concatenate([spk_ts, spk_ts[:5] + 100, spk_ts[5:8] - 100])
+        spk_ts_list.append(spk_ts)  # unsorted, with exact +-lag pairs
+    return spk_ts_list
+
+
+class TestCorrelogram(unittest.TestCase):
+    def test_same_as_loop(self):
+        spk_ts_list = make_spk_trains()
+        for ref_spks in spk_ts_list:
+            np.testing.assert_array_equal(
+                get_spk_corr(ref_spks, ref_spks), get_corr_loop(ref_spks, ref_spks)
+            )
+        np.testing.assert_array_equal(
+            get_spk_corr(spk_ts_list[0], spk_ts_list[1]),
+            get_corr_loop(spk_ts_list[0], spk_ts_list[1]),
+        )
+
+    def test_cluster_correlogram(self):
+        spk_ts_list = make_spk_trains()
+        ci = ClusterInfo.__new__(ClusterInfo)
+        ci.contexts = "UUDUDD"
+        correlogram = ci.get_correlogram(spk_ts_list, spk_ts_list)
+        for context in "UD":
+            expected = sum(
+                get_corr_loop(spk_ts, spk_ts)
+                for spk_ts, file_context in zip(spk_ts_list, ci.contexts)
+                if file_context == context
+            )
+            np.testing.assert_array_equal(correlogram[context], expected)
+
+
+class TestJitteredCorrelogram(unittest.TestCase):
+    def test_same_as_loop(self):
+        spk_ts_list = make_spk_trains(nb_files=4)
+        correlogram_jitter = get_jittered_spk_corr(
+            spk_ts_list, shuffle_limit=5, shuffle_iter=7, rng=1
+        )
+
+        # Same jitter matrix, one iteration at a time
+        spk_ts = np.concatenate(spk_ts_list)
+        jitter = np.random.default_rng(1).uniform(-5, 5, (7, spk_ts.size))
+        split_ind = np.cumsum([len(spk_ts) for spk_ts in spk_ts_list])[:-1]
+        for iter, corr in enumerate(correlogram_jitter):
+            expected = sum(
+                get_corr_loop(spk_ts, spk_ts)
+                for spk_ts in np.split(spk_ts + jitter[iter], split_ind)
+            )
+            np.testing.assert_array_equal(corr, expected)
+
+    def test_batch_size(self):
+        spk_ts_list = make_spk_trains(nb_files=4)
+        np.testing.assert_array_equal(
+            get_jittered_spk_corr(spk_ts_list, shuffle_iter=10, rng=3, max_spk=1),
+            get_jittered_spk_corr(spk_ts_list, shuffle_iter=10, rng=3),
+        )
+
+
+def get_pcc_loop(fr_array):
+    """Original pair-by-pair implementation of the pcc"""
+    pcc_arr = np.array([])
+    for ind1, fr1 in enumerate(fr_array):
+        for ind2, fr2 in enumerate(fr_array):
+            if ind2 > ind1:
+                if np.linalg.norm((fr1 - fr1.mean()), ord=1) * np.linalg.norm(
+                    (fr2 - fr2.mean()), ord=1
+                ):
+                    if not np.isnan(np.corrcoef(fr1, fr2)[0, 1]):
+                        pcc_arr = np.append(pcc_arr, np.corrcoef(fr1, fr2)[0, 1])
+    return pcc_arr
+
+
+class TestFiringRate(unittest.TestCase):
+    def setUp(self):
+        self.pi = make_peth_info()
+
+    def test_window(self):
+        from scipy.ndimage import gaussian_filter1d
+
+        peth = self.pi.peth["All"]
+        for time_bin, duration in [
+            (np.arange(-50, 1450), 300),
+            (np.arange(-200, 1300), 300),  # range starts after the first bin
+            (np.arange(-50, 1450), 1445),  # range ends near the last bin
+        ]:
+            ind = (-50 <= time_bin) & (time_bin <= duration)
+            for gaussian_std in [1, 3, 8]:
+                fr, fr_time_bin = get_fr(
+                    peth, time_bin, duration, gaussian_std=gaussian_std
+                )
+                expected = gaussian_filter1d(peth * 1e3, gaussian_std)[:, ind]
+                np.testing.assert_allclose(fr, expected, rtol=1e-12, atol=1e-12)
+                np.testing.assert_array_equal(fr_time_bin, time_bin[ind])
+
+            fr, _ = get_fr(peth, time_bin, duration, smoothing=False)
+            np.testing.assert_array_equal(fr, peth[:, ind] * 1e3)
+
+        # Stacked peths (e.g., shuffles x trials x time bins)
+        time_bin = np.arange(-50, 1450)
+        fr, _ = get_fr(np.stack([peth, peth[::-1]]), time_bin, 300)
+        np.testing.assert_array_equal(fr[1], get_fr(peth[::-1], time_bin, 300)[0])
+
+    def test_cache(self):
+        self.pi.get_fr()
+        fr = self.pi.fr
+        np.testing.assert_array_equal(self.pi.time_bin, np.arange(-50, 301))
+        self.assertEqual(fr.keys(), {"All", "U", "D"})
+        np.testing.assert_array_equal(fr["U"], fr["All"][::2])
+
+        self.pi.get_fr(smoothing=False)
+        self.assertIsNot(self.pi.fr, fr)
+        np.testing.assert_array_equal(self.pi.fr["U"], self.pi.peth["U"][:, :351] * 1e3)
+
+        self.pi.get_fr()
+        self.assertIs(self.pi.fr, fr)
+        self.assertEqual(len(self.pi._fr_cache), 2)
+
+
+class TestPcc(unittest.TestCase):
+    def test_same_as_loop(self):
+        rng = np.random.default_rng(0)
+        fr_array = rng.poisson(5, (40, 300)).astype(np.float64)
+        fr_array[[3, 17]] = 2.0  # no variation
+        fr_array[5, 10] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected = get_pcc_loop(fr_array)
+
+        pcc = get_pcc(fr_array)
+        self.assertEqual(pcc["array"].shape, (38 * 37 // 2 - 37,))
+        np.testing.assert_allclose(pcc["array"], expected, rtol=1e-12, atol=1e-12)
+        self.assertEqual(pcc["mean"], round(expected.mean(), 3))
+
+
+def warp_loop(timestamp_list, durations_list, median_durations, spk_ts_list):
+    """Original per-segment implementation of MotifInfo.piecewise_linear_warping"""
+    spk_ts_warped_list = []
+    for timestamp, durations, spk_ts in zip(
+        timestamp_list, durations_list, spk_ts_list
+    ):
+        spk_ts_new = copy.deepcopy(spk_ts)
+        for i in range(0, len(median_durations)):
+            ratio = median_durations[i] / durations[i]
+            diff = timestamp[i] - timestamp[0]
+            origin = 0 if i == 0 else sum(median_durations[:i])
+            ind = np.where((spk_ts >= timestamp[i]) & (spk_ts <= timestamp[i + 1]))
+            spk_ts_temp = (
+                (ratio * ((spk_ts[ind] - timestamp[0]) - diff)) + origin
+            ) + timestamp[0]
+            np.put(spk_ts_new, ind, spk_ts_temp)
+        spk_ts_warped_list.append(spk_ts_new)
+    return spk_ts_warped_list
+
+
+class TestWarping(unittest.TestCase):
+    def test_same_as_loop(self):
+        rng = np.random.default_rng(0)
+        nb_motifs, nb_notes = 25, 4
+        timestamp = np.cumsum(rng.uniform(20, 80, (nb_motifs, nb_notes * 2)), axis=1)
+        timestamp += np.arange(nb_motifs)[:, np.newaxis] * 1e4
+        durations = np.diff(timestamp, axis=1)
+        median_durations = np.median(durations, axis=0)
+        spk_ts_list = [
+            np.sort(
+                np.concatenate(
+                    [
+                        rng.uniform(row[0] - 50, row[-1], rng.integers(0, 40)),
+                        row[[0, 3, -1]],  # spikes on the boundaries
+                    ]
+                )
+            )
+            for row in timestamp
+        ]
+        spk_ts_list[2] = np.array([])
+
+        spk_ts_warp = get_warped_spk_ts(
+            RaggedArray.from_list(spk_ts_list), timestamp, median_durations
+        )
+        expected = warp_loop(timestamp, durations, median_durations, spk_ts_list)
+        self.assertEqual(len(spk_ts_warp), nb_motifs)
+        for warped, expected_warped in zip(spk_ts_warp, expected):
+            np.testing.assert_array_equal(warped, expected_warped)
+
+
+def align_waveform_loop(spk_wf):
+    """Original per-spike implementation of align_waveform"""
+    aligned_wf = np.full(spk_wf.shape, np.nan)
+    avg_wf = spk_wf.mean(axis=0)
+    max_first = np.argmin(avg_wf) < np.argmax(avg_wf)
+    template_max_ind = np.argmin(avg_wf) if max_first else np.argmax(avg_wf)
+    for ind, wf in enumerate(spk_wf):
+        new_wf = np.full(spk_wf.shape[1], np.nan)
+        max_ind = np.argmin(wf) if max_first else np.argmax(wf)
+        max_diff = max_ind - template_max_ind
+        if max_diff > 0:
+            new_wf[:-max_diff] = wf[max_diff:]
+        elif max_diff < 0:
+            new_wf[abs(max_diff) :] = wf[:max_diff]
+        else:
+            new_wf = wf
+        aligned_wf[ind] = new_wf
+    return aligned_wf
+
+
+class TestWaveform(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        template = -np.exp(-(((np.arange(32) - 10) / 2) ** 2))
+        template += 0.5 * np.exp(-(((np.arange(32) - 16) / 3) ** 2))
+        self.spk_wf = np.array(
+            [np.roll(template, shift) for shift in rng.integers(-4, 5, 200)]
+        )
+        self.spk_wf += rng.normal(0, 0.02, self.spk_wf.shape)
+
+    def test_align_same_as_loop(self):
+        for spk_wf in [self.spk_wf, -self.spk_wf]:
+            np.testing.assert_array_equal(
+                align_waveform(spk_wf), align_waveform_loop(spk_wf)
+            )
+
+    def test_features(self):
+        sample_rate = 1000
+        spk_wf = np.zeros((3, 12))
+        spk_wf[0, 3:8] = [-1, -2, -4, -2, -1]  # trough first
+        spk_wf[1, 2:6] = [1, 2, 2, 1]
+        spk_wf[2, 8:] = [1, 2, 3, 4]  # does not come back to half amplitude
+        spk_features = get_spk_features(spk_wf, sample_rate)
+
+        np.testing.assert_array_equal(spk_features["peak"], [0, 2, 4])
+        np.testing.assert_array_equal(spk_features["trough"], [-4, 0, 0])
+        np.testing.assert_array_equal(spk_features["width"], [6e3, 4e3, 12e3])
+        np.testing.assert_array_equal(spk_features["half_width"], [2e3, 3e3, np.nan])
+        np.testing.assert_array_equal(spk_features["energy"], [26, 10, 30])
+
+        # One row at a time gives the same result
+        spk_features = get_spk_features(self.spk_wf, sample_rate)
+        for ind in [0, 50, 199]:
+            spk_feature = get_spk_features(self.spk_wf[ind : ind + 1], sample_rate)
+            for key, value in spk_feature.items():
+                self.assertEqual(value[0], spk_features[key][ind])
+
+
+def bursting_loop(spk_list, duration_list, burst_hz):
+    """Original per-trial implementation of BurstingInfo"""
+    burst_spk_list, burst_duration_arr, nb_bursts, nb_burst_spk_list = [], [], [], []
+    for spks in spk_list:
+        bursts = np.where(1e3 / np.diff(spks) >= burst_hz)[0]
+        if not bursts.size:
+            continue
+        consecutive = np.where(np.diff(bursts) == 1)[0]
+        nb_bursts = np.append(nb_bursts, bursts.size - consecutive.size)
+        burst_onset_ind = np.delete(bursts, consecutive + 1)
+        burst_offset_ind = np.append(bursts[:-1][np.diff(bursts) > 1], bursts[-1]) + 1
+        burst_spk_list.append(spks[burst_onset_ind[0] : burst_offset_ind[0] + 1])
+        burst_duration_arr = np.append(
+            burst_duration_arr, spks[burst_offset_ind] - spks[burst_onset_ind]
+        )
+        nb_burst_spk_list += list(burst_offset_ind - burst_onset_ind + 1)
+    return {
+        "spk_list": burst_spk_list,
+        "nb_burst_spk": sum(nb_burst_spk_list),
+        "fraction": (
+            round(sum(nb_burst_spk_list) / sum([len(spks) for spks in spk_list]), 3)
+        )
+        * 100,
+        "duration": round(burst_duration_arr.sum(), 3),
+        "freq": round(nb_bursts.sum() / (sum(duration_list) / 1e3), 3),
+        "mean_nb_spk": round(np.array(nb_burst_spk_list).mean(), 3),
+        "mean_duration": round(burst_duration_arr.mean(), 3),
+    }
+
+
+class TestBursting(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.spk_ts = [
+            np.sort(rng.uniform(0, 500, rng.integers(0, 80))) for _ in range(40)
+        ]
+        self.spk_ts[5] = np.array([10.0, 12.0, 14.0])  # burst on the trial edges
+        self.spk_ts[6] = np.array([15.0, 30.0])
+        self.durations = rng.uniform(400, 600, 40)
+        self.contexts = "UD" * 20
+
+    def test_same_as_loop(self):
+        info = SimpleNamespace(
+            spk_ts=RaggedArray.from_list(self.spk_ts),
+            durations=self.durations,
+            contexts=self.contexts,
+        )
+        for context, burst_hz in [((), 200), (("U",), 200), (("D",), 500)]:
+            bi = BurstingInfo(info, *context, burst_hz=burst_hz)
+            ind = [not context or c == context[0] for c in self.contexts]
+            expected = bursting_loop(
+                [spk for spk, selected in zip(self.spk_ts, ind) if selected],
+                self.durations[ind],
+                burst_hz,
+            )
+            for key in expected.keys() - {"spk_list"}:
+                self.assertEqual(getattr(bi, key), expected[key])
+            self.assertEqual(len(bi.spk_list), len(expected["spk_list"]))
+            for spk, expected_spk in zip(bi.spk_list, expected["spk_list"]):
+                np.testing.assert_array_equal(spk, expected_spk)
+
+    def test_trial_edges(self):
+        bursts = get_bursts([[1.0, 2.0], [], [2.5, 3.0, 50.0], [51.0]], burst_hz=200)
+        np.testing.assert_array_equal(bursts["onset"], [1.0, 2.5])
+        np.testing.assert_array_equal(bursts["offset"], [2.0, 3.0])
+        np.testing.assert_array_equal(bursts["trial"], [0, 2])
+        np.testing.assert_array_equal(bursts["nb_bursts"], [1, 0, 1, 0])
+        np.testing.assert_array_equal(bursts["nb_burst_spk"], [2, 0, 2, 0])
+
+        bi = BurstingInfo(
+            SimpleNamespace(spk_ts=[np.array([1.0, 100.0])], durations=[200])
+        )
+        self.assertEqual(bi.spk_list, [])
+        self.assertTrue(np.isnan(bi.nb_burst_spk))
+
+    def test_empty(self):
+        info = SimpleNamespace(
+            spk_ts=RaggedArray.from_list([]), durations=np.array([]), contexts=[]
+        )
+        for context in [(), ("U",)]:
+            bi = BurstingInfo(info, *context)
+            self.assertEqual(bi.spk_list, [])
+            self.assertTrue(np.isnan(bi.nb_burst_spk))
+            self.assertTrue(np.isnan(bi.freq))
+
+
+class TestISI(unittest.TestCase):
+    def test_same_as_loop(self):
+        rng = np.random.default_rng(0)
+        spk_ts = [np.sort(rng.uniform(0, 1e3, rng.integers(0, 50))) for _ in range(30)]
+        isi = get_isi(spk_ts)
+        np.testing.assert_array_equal(
+            isi.data, np.concatenate([np.diff(spk) for spk in spk_ts])
+        )
+
+        # Histograms of parts merged into one
+        isi_hist = ISIHistogram().add_spikes(spk_ts[:10])
+        isi_hist.merge(ISIHistogram().add_spikes(RaggedArray.from_list(spk_ts[10:])))
+        isi_merged = ISI(isi_hist)
+        self.assertIsNone(isi_merged.data)
+        np.testing.assert_array_equal(isi_merged.hist, isi.hist)
+        np.testing.assert_array_equal(isi_merged.time_bin, isi.time_bin)
+        for key in ["peak_latency", "within_ref_prop", "cv"]:
+            self.assertEqual(getattr(isi_merged, key), getattr(isi, key))
+
+        with self.assertRaises(Exception):
+            isi_hist.merge(ISIHistogram(bins=np.arange(0, 2, 0.1)))
+
+
+class TestClusterViews(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+        write_song(self.path, nb_files=3, duration=4, delay=2500)
+        write_spk_txt(self.path / "Songs" / "b70r38_Ch17(merged).txt", nb_spk=2000)
+        self.path = self.path / "Songs"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _assert_same(self, view, info, keys):
+        self.assertEqual(view.name, info.name)
+        self.assertEqual(len(view.files), len(info.files))
+        self.assertGreater(len(view.files), 0)
+        for key in keys:
+            for value1, value2 in zip(getattr(view, key), getattr(info, key)):
+                np.testing.assert_array_equal(value1, value2)
+
+    def test_views(self):
+        ci = ClusterInfo(self.path, 17, 1)
+
+        mi = ci.motif("ab", update=True)
+        self.assertIsInstance(mi, MotifInfo)
+        self.assertFalse(hasattr(mi, "spk_wf"))
+        self.assertTrue(hasattr(ci, "spk_wf"))  # the cluster is not modified
+        self._assert_same(
+            mi,
+            MotifInfo(self.path, 17, 1, "ab", update=True),
+            ["spk_ts", "spk_ts_warp", "onsets", "durations", "files"],
+        )
+
+        bi = ci.bouts("abc", update=True)
+        self.assertIs(bi.spk_wf, ci.spk_wf)  # data are shared
+        self._assert_same(
+            bi,
+            BoutInfo(self.path, 17, 1, "abc", update=True),
+            ["spk_ts", "onsets", "durations", "files"],
+        )
+
+        bi = ci.baseline(update=True)
+        self._assert_same(
+            bi,
+            BaselineInfo(self.path, 17, 1, update=True),
+            ["spk_ts", "nb_spk", "durations", "files"],
+        )
+
+
+class TestNoteEntropy(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+        rng = np.random.default_rng(0)
+        for wav_file in write_song(self.path, nb_files=12):
+            data = rng.normal(0, 1000, 30000).astype(np.int16)
+            wavfile.write(wav_file, 30000, data)
+        write_spk_txt(self.path / "Songs" / "b70r38_Ch17(merged).txt")
+        self.path = self.path / "Songs"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_entropy(self):
+        ni = ClusterInfo(self.path, 17, 1).get_note_info("a")
+        audio = AudioData(self.path)
+        self.assertIsInstance(audio.data, np.memmap)
+
+        entropy_mean, entropy_var = ni.get_entropy(mode="spectro_temporal")
+        self.assertEqual(
+            list(entropy_mean), ["U"]
+        )  # no renditions in the other context
+        self.assertEqual(ni.entropy["U"].shape, (12,))
+
+        # Same as scoring each rendition separately
+        for ind, (start, end) in enumerate(zip(ni.onsets, ni.offsets)):
+            _, data = audio.extract([start, end])
+            spect, _, _ = spectrogram(data, audio.sample_rate, freq_range=[300, 8000])
+            se = get_spectral_entropy(spect, mode="spectro_temporal")
+            self.assertAlmostEqual(ni.entropy["U"][ind], se["mean"], places=12)
+            self.assertAlmostEqual(ni.entropy_var["U"][ind], se["var"], places=12)
+        self.assertEqual(entropy_mean["U"], round(ni.entropy["U"].mean(), 3))
+
+        # Chunks of renditions scored in worker processes
+        entropy = ni.entropy["U"]
+        self.assertEqual(
+            ni.get_entropy(
+                mode="spectro_temporal", audio=audio, chunk_size=5, nb_workers=2
+            ),
+            (entropy_mean, entropy_var),
+        )
+        np.testing.assert_array_equal(ni.entropy["U"], entropy)
+
+        # The signal file is replaced on update, the earlier memory map stays valid
+        data = np.array(audio.data)
+        wav_file = sorted(self.path.glob("*.wav"))[0]
+        wavfile.write(wav_file, 30000, np.zeros(30000, dtype=np.int16))
+        AudioData(self.path, update=True)
+        np.testing.assert_array_equal(audio.data, data)
+        self.assertEqual(len(list(self.path.glob("*.npy"))), 1)
+
+        entropy_mean = ni.get_entropy(audio=audio, chunk_size=5)
+        self.assertEqual(ni.entropy["U"].shape, (12,))
+        self.assertEqual(entropy_mean["U"], round(ni.entropy["U"].mean(), 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+
+from pyfinch.core.spkindex import SpikeIndex
+from pyfinch.utils.functions import extract_ind
+
+
+class TestSpikeIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.spk_ts = np.sort(rng.uniform(0, 1000, 500).round(1))
+        self.start = rng.uniform(-50, 1000, 100).round(1)
+        self.end = self.start + rng.uniform(-5, 100, 100).round(1)
+        self.spk_index = SpikeIndex(self.spk_ts[::-1])  # sorted on creation
+
+    def _mask(self, start, end):
+        return self.spk_ts[(self.spk_ts >= start) & (self.spk_ts <= end)]
+
+    def test_window(self):
+        for start, end in zip(self.start, self.end):
+            np.testing.assert_array_equal(
+                self.spk_index.window(start, end), self._mask(start, end)
+            )
+            self.assertEqual(
+                self.spk_index.count(start, end), self._mask(start, end).shape[0]
+            )
+
+    def test_windows(self):
+        windows = self.spk_index.windows(self.start, self.end)
+        self.assertEqual(len(windows), len(self.start))
+        for spk_ts, start, end in zip(windows, self.start, self.end):
+            np.testing.assert_array_equal(spk_ts, self._mask(start, end))
+        np.testing.assert_array_equal(
+            self.spk_index.count(self.start, self.end), windows.lengths
+        )
+
+    def test_extract_ind(self):
+        ind, spk_ts = extract_ind(self.spk_ts, [100, 200])
+        np.testing.assert_array_equal(spk_ts, self._mask(100, 200))
+        np.testing.assert_array_equal(self.spk_ts[ind], spk_ts)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from pyfinch.core.load import read_rhd
+from pyfinch.core.spike import NeuralData
+from pyfinch.core.timeaxis import TimeAxis
+from tests.test_intan import write_rhd
+
+
+class TestTimeAxis(unittest.TestCase):
+    def setUp(self):
+        # Two files of 5 and 3 samples at 1 kHz separated by a 10 ms gap
+        self.time_axis = TimeAxis.concatenate([5, 3], 1000, gap=10)
+        self.timestamp = np.array([0, 1, 2, 3, 4, 15, 16, 17], dtype=float)
+
+    def test_timestamp(self):
+        self.assertEqual(len(self.time_axis), 8)
+        np.testing.assert_array_equal(self.time_axis.end, [5, 18])
+        np.testing.assert_allclose(self.time_axis.to_array(), self.timestamp)
+        np.testing.assert_allclose(self.time_axis[-3:], self.timestamp[-3:])
+        self.assertEqual(self.time_axis[5], 15)
+        with self.assertRaises(IndexError):
+            self.time_axis[8]
+
+    def test_from_timestamp(self):
+        time_axis = TimeAxis.from_timestamp(self.timestamp, 1000)
+        np.testing.assert_array_equal(time_axis.start, [0, 15])
+        np.testing.assert_array_equal(time_axis.size, [5, 3])
+
+    def test_slice(self):
+        time_axis = TimeAxis.concatenate([300, 200, 500], 30000, gap=1 / 30000)
+        timestamp = time_axis.to_array()
+        rng = np.random.default_rng(0)
+        times = np.concatenate(
+            [rng.uniform(-1, 40, 500), timestamp[::7], [timestamp[0], timestamp[-1]]]
+        )
+        for side in ["left", "right"]:
+            np.testing.assert_array_equal(
+                time_axis.index(times, side=side),
+                np.searchsorted(timestamp, times, side=side),
+            )
+
+        ind = time_axis.slice(5, 10)
+        np.testing.assert_array_equal(
+            timestamp[ind], timestamp[(timestamp >= 5) & (timestamp <= 10)]
+        )
+        self.assertEqual(self.time_axis.slice(6, 14), slice(5, 5))
+
+
+class TestNeuralData(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+        for ind, nb_blocks in enumerate([10, 4]):
+            write_rhd(self.path / f"{ind}.rhd", nb_blocks=nb_blocks, seed=ind)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_extract(self):
+        nd = NeuralData(self.path, 2)
+        files = [self.path / file for file in nd.files]
+        data = np.concatenate([read_rhd(file)["amplifier_data"][2] for file in files])
+        np.testing.assert_array_equal(nd.data, data)
+        np.testing.assert_allclose(nd.timestamp, np.arange(840) / 30)
+
+        timestamp, data = nd.extract([19.9, 20.5])
+        np.testing.assert_allclose(timestamp, np.arange(597, 616) / 30)
+        self.assertTrue(np.shares_memory(data, nd.data))
+
+
+if __name__ == "__main__":
+    unittest.main()